@@ -66,23 +66,53 @@ export default function DailyRecap({ onClose }: DailyRecapProps) {
     }
   };
 
+  // The server's error message (FastAPI "detail"), or the HTTP status
+  const errorDetail = async (response: Response): Promise<string> => {
+    try {
+      const body = await response.json();
+      if (typeof body.detail === 'string') {
+        return body.detail;
+      }
+      if (Array.isArray(body.detail)) {
+        return body.detail.map((item: { msg?: string }) => item.msg).filter(Boolean).join(', ');
+      }
+    } catch {
+      // Not JSON
+    }
+    return `HTTP ${response.status}`;
+  };
+
   const generateRecap = async (sourceName: string, hours: number = 24) => {
     try {
       setGeneratingFor(sourceName);
       setError(null);
       
-      const response = await fetch(
-        `${API_BASE}/recap/generate?source_name=${encodeURIComponent(sourceName)}&hours=${hours}`,
+      // Start (or join) a recap job, then long-poll until it finishes
+      const jobResponse = await fetch(
+        `${API_BASE}/recap/jobs?source_name=${encodeURIComponent(sourceName)}&hours=${hours}`,
         { method: 'POST' }
       );
+      if (!jobResponse.ok) {
+        setError(`שגיאה ביצירת הסיכום עבור ${sourceName}: ${await errorDetail(jobResponse)}`);
+        return;
+      }
+      const { job_id } = await jobResponse.json();
       
-      const data = await response.json();
+      let data;
+      do {
+        const response = await fetch(`${API_BASE}/recap/jobs/${job_id}?wait=25`);
+        if (!response.ok) {
+          setError(`שגיאה ביצירת הסיכום עבור ${sourceName}: ${await errorDetail(response)}`);
+          return;
+        }
+        data = await response.json();
+      } while (data.status === 'queued' || data.status === 'running');
       
       if (data.success && data.recap) {
         setRecaps(prev => new Map(prev).set(sourceName, data.recap));
         setExpandedRecap(sourceName);
       } else {
-        setError(`שגיאה ביצירת הסיכום עבור ${sourceName}`);
+        setError(`שגיאה ביצירת הסיכום עבור ${sourceName}${data.error ? `: ${data.error}` : ''}`);
       }
     } catch (err) {
       console.error('Error generating recap:', err);
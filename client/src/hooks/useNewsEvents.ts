@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { NewsEvent, NewsEventsResponse, FilterState } from '../types';
 
 const API_BASE = '/api';
@@ -18,6 +18,8 @@ export function useNewsEvents(filters: FilterState): UseNewsEventsReturn {
   const [error, setError] = useState<string | null>(null);
   const [total, setTotal] = useState(0);
   const [lastUpdated, setLastUpdated] = useState<Date | null>(null);
+  // Ids in the list - the stream can replay events the last fetch already returned
+  const knownIds = useRef<Set<number>>(new Set());
 
   const fetchEvents = useCallback(async () => {
     try {
@@ -28,6 +30,8 @@ export function useNewsEvents(filters: FilterState): UseNewsEventsReturn {
       const params = new URLSearchParams();
       params.set('hours', filters.hours.toString());
       params.set('limit', '200');
+      // One marker per incident - later reports of a story are listed under /api/stories
+      params.set('collapse_stories', 'true');
       
       if (filters.category) {
         params.set('category', filters.category);
@@ -52,6 +56,7 @@ export function useNewsEvents(filters: FilterState): UseNewsEventsReturn {
         );
       }
       
+      knownIds.current = new Set(filteredEvents.map(e => e.id));
       setEvents(filteredEvents);
       setTotal(filteredEvents.length);
       setLastUpdated(new Date());
@@ -63,15 +68,52 @@ export function useNewsEvents(filters: FilterState): UseNewsEventsReturn {
     }
   }, [filters.hours, filters.category, filters.source, filters.location]);
 
-  // Initial fetch and polling
+  // Initial fetch and slow polling (drops events that aged out of the window)
   useEffect(() => {
     fetchEvents();
 
-    // Poll every 30 seconds
-    const interval = setInterval(fetchEvents, 30000);
+    // Poll every 5 minutes - new events arrive through the stream below
+    const interval = setInterval(fetchEvents, 300000);
     return () => clearInterval(interval);
   }, [fetchEvents]);
 
+  // Live updates over Server-Sent Events
+  useEffect(() => {
+    const params = new URLSearchParams();
+    // Same collapse as the list - later reports of a story don't become new markers
+    params.set('collapse_stories', 'true');
+    if (filters.category) {
+      params.set('category', filters.category);
+    }
+    if (filters.source) {
+      params.set('source', filters.source);
+    }
+
+    const source = new EventSource(`${API_BASE}/events/stream?${params}`);
+
+    source.addEventListener('news_event', (message) => {
+      const event: NewsEvent = JSON.parse((message as MessageEvent).data);
+
+      if (
+        filters.location &&
+        !event.location_name?.toLowerCase().includes(filters.location.toLowerCase())
+      ) {
+        return;
+      }
+
+      if (knownIds.current.has(event.id)) {
+        return;
+      }
+      knownIds.current.add(event.id);
+
+      setEvents(prev => [event, ...prev]);
+      setTotal(prev => prev + 1);
+      setLastUpdated(new Date());
+    });
+
+    return () => source.close();
+  }, [filters.category, filters.source, filters.location]);
+
   return {
     events,
     loading,
@@ -26,6 +26,91 @@ class Settings(BaseSettings):
     # Scraping intervals (seconds)
     rss_scrape_interval: int = 300  # 5 minutes
     
+    # Read endpoint result cache
+    query_cache_max_bytes: int = 32 * 1024 * 1024  # 32 MB
+    query_cache_ttl: int = 60  # seconds - bounds staleness of time-window queries
+    
+    # In-memory index of recent events (answers /api/events and /api/stats)
+    hot_window_enabled: bool = False
+    hot_window_hours: int = 168
+    
+    # Daily recap store
+    recap_bucket_minutes: int = 60  # Window-end bucket size for stored recaps
+    recap_max_reuse_hours: int = 6  # Regenerate from scratch once a stored recap is this old
+    recap_precompute_sources: int = 0  # Busiest sources to precompute recaps for (0 = disabled)
+    recap_precompute_interval: int = 1800  # seconds
+    
+    # Chunked (map-reduce) recap generation for large event sets
+    recap_chunk_size: int = 40  # Events per chunk - larger windows are summarized in chunks
+    recap_chunk_max_tokens: int = 800
+    recap_merge_fan_in: int = 8  # Partial summaries merged per LLM call
+    recap_max_concurrency: int = 4  # Concurrent LLM calls per recap
+    
+    # Recap input compaction (grouping duplicate reports)
+    recap_group_distance_km: float = 15.0
+    recap_group_gap_hours: float = 6.0
+    recap_group_similarity: float = 0.35  # Minimum Jaccard similarity of character shingles
+    recap_token_budget: int = 6000  # Estimated prompt tokens for the event list
+    
+    # Recap jobs
+    recap_max_jobs: int = 2  # Recap generations running at once across all workers - the rest queue
+    recap_job_abandon_seconds: int = 30  # Cancel jobs nobody polled for this long
+    recap_job_ttl_seconds: int = 600  # Keep finished job results for polling
+    
+    # Story grouping (reports of one incident across sources, /api/stories)
+    stories_enabled: bool = True
+    story_distance_km: float = 15.0
+    story_gap_hours: float = 6.0  # A story stays open this long after its latest report
+    story_similarity: float = 0.3  # Minimum Jaccard similarity of character shingles
+    
+    # Process roles (multi-worker deployments)
+    app_role: str = "all"  # all: API + ingestion, api: read-only API, worker: ingestion only
+    leader_lease_seconds: int = 60  # Scheduler lease - only the holder runs jobs
+    change_poll_interval: float = 1.0  # Seconds between checks for rows written by the worker
+    
+    # Startup
+    fast_start: bool = False  # Skip create_all when the schema is unchanged, delay the first scrape
+    startup_scrape_delay: int = 30  # Seconds after startup before the first scrape (fast start only)
+    
+    # RSS ingestion
+    feed_sharding_enabled: bool = False  # Split feeds between all running workers via leases
+    feed_lease_grace_seconds: int = 60  # Feed leases outlive a scrape cycle by this much
+    parse_workers: int = 0  # Feed parsing processes - 0 means one per available CPU, at most 4
+    
+    # Ingestion pipeline (workers per stage; dedupe and persist use one each)
+    ingest_fetch_workers: int = 8
+    ingest_parse_workers: int = 2  # Coroutines handing documents to the parse pool
+    ingest_enrich_workers: int = 4  # Concurrent LLM calls
+    ingest_queue_size: int = 100  # Bound of every stage queue
+    
+    # LLM calls
+    llm_max_retries: int = 2  # Retries for connection errors, timeouts, rate limits and 5xx
+    llm_calls_retention_days: int = 7  # Raw call records - hourly rollups are kept
+    
+    # Tracing of scrape cycles (/api/admin/traces)
+    tracing_sample_rate: float = 0.0  # Fraction of scrape cycles traced
+    tracing_buffer_size: int = 20  # Newest finished traces kept in the database
+    tracing_export_path: str = ""  # Also append traces to this JSON-lines file (rotated)
+    tracing_export_max_mb: int = 10
+    
+    # On-demand profiling (X-Profile header, /api/admin/profiles)
+    profile_keep: int = 50  # Newest profiles kept in the database
+    profile_scrape_cycles: int = 0  # Profile the first N scrape cycles after startup
+    profile_tracemalloc_frames: int = 10  # Stack depth recorded per allocation
+    
+    # Slow-query log (/api/admin/slow-queries)
+    slow_query_threshold_ms: float = 200.0  # 0 disables it
+    
+    # Health probes (/health/live, /health/ready)
+    health_max_scrape_age: int = 1800  # Scraping roles are not ready when no feed was fetched successfully for this long (0 = no check)
+    
+    # Metrics (/metrics, Prometheus text format)
+    metrics_enabled: bool = True
+    
+    # Admin API (X-Admin-Token header). Without a token admin routes are disabled
+    admin_token: str = ""
+    admin_open_without_token: bool = False  # Local development only - opens admin routes when no token is set
+    
     # CORS origins
     @property
     def cors_origins(self) -> list[str]:
@@ -1,10 +1,17 @@
 """
 Database configuration and session management
 """
+import hashlib
+import logging
+
+from sqlalchemy import delete, insert, inspect, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex, CreateTable
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from app.config import get_settings
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 # Create async engine
@@ -14,6 +21,16 @@ engine = create_async_engine(
     future=True
 )
 
+# Statement timing and pool metrics for /metrics
+if settings.metrics_enabled:
+    from app.services.metrics import instrument_engine
+    instrument_engine(engine)
+
+# Log slow statements and capture their query plans
+if settings.slow_query_threshold_ms > 0:
+    from app.services.slow_queries import slow_query_log
+    slow_query_log.instrument(engine)
+
 # Create async session factory
 async_session_maker = async_sessionmaker(
     engine,
@@ -36,10 +53,43 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+def schema_fingerprint() -> str:
+    """Hash of the DDL the models compile to - changes whenever a table, column or index does"""
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=engine.dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=engine.dialect)).encode())
+    return digest.hexdigest()
+
+
 async def init_db():
-    """Initialize database tables"""
+    """Initialize database tables (skipped under fast start when the schema is unchanged)"""
+    from app.models import SchemaVersion
+    
+    fingerprint = schema_fingerprint()
+    if settings.fast_start:
+        try:
+            async with engine.connect() as conn:
+                stored = (await conn.execute(
+                    select(SchemaVersion.fingerprint).where(SchemaVersion.name == "models")
+                )).scalar()
+                # The fingerprint outlives tables dropped by hand or restored from an older dump
+                existing = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+            missing = set(Base.metadata.tables) - existing
+            if stored == fingerprint and not missing:
+                logger.info("⚡ Schema unchanged - skipping table creation")
+                return
+            if stored == fingerprint:
+                logger.warning(f"⚠️  Schema unchanged but tables missing ({', '.join(sorted(missing))}) - creating them")
+        except DBAPIError:
+            # First start - the schema_version table doesn't exist yet
+            pass
+    
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(delete(SchemaVersion).where(SchemaVersion.name == "models"))
+        await conn.execute(insert(SchemaVersion).values(name="models", fingerprint=fingerprint))
 
 
 async def close_db():
@@ -6,12 +6,13 @@ import logging
 from contextlib import asynccontextmanager
 from datetime import datetime
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.config import get_settings
 from app.database import init_db, close_db
-from app.routers import events, recap
+from app.routers import events, recap, admin, stories
 from app.services.scheduler import start_scheduler, stop_scheduler
 
 # Configure logging
@@ -28,19 +29,41 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
-    logger.info("🚀 Starting GeoNews server...")
+    logger.info(f"🚀 Starting GeoNews server (role: {settings.app_role})...")
     await init_db()
     logger.info("✅ Database initialized")
     
-    # Start background scrapers
-    await start_scheduler()
-    logger.info("✅ Scheduler started")
+    if settings.metrics_enabled:
+        from app.services.metrics import start_loop_lag_monitor
+        start_loop_lag_monitor()
+    
+    if settings.hot_window_enabled:
+        from app.services.hot_window import hot_window
+        await hot_window.load()
+    
+    # Start background scrapers (the "api" role leaves ingestion to run_worker.py)
+    if settings.app_role in ("all", "worker"):
+        await start_scheduler()
+        logger.info("✅ Scheduler started")
+    
+    # Follow rows written by other processes (worker or scheduler leader)
+    if settings.app_role in ("all", "api"):
+        from app.services.change_follower import change_follower
+        await change_follower.start()
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down GeoNews server...")
+    if settings.app_role in ("all", "api"):
+        from app.services.change_follower import change_follower
+        await change_follower.stop()
     await stop_scheduler()
+    from app.services.llm_telemetry import llm_telemetry
+    await llm_telemetry.flush()
+    if settings.metrics_enabled:
+        from app.services.metrics import stop_loop_lag_monitor
+        stop_loop_lag_monitor()
     await close_db()
     logger.info("✅ Cleanup complete")
 
@@ -62,9 +85,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request count and latency per route for /metrics
+if settings.metrics_enabled:
+    from app.services.metrics import MetricsMiddleware
+    app.add_middleware(MetricsMiddleware)
+
+# Profile single requests on demand (X-Profile: 1 plus the admin token)
+from app.services.profiler import ProfilingMiddleware
+app.add_middleware(ProfilingMiddleware, is_authorized=admin.is_admin)
+
 # Include routers
 app.include_router(events.router, prefix="/api", tags=["events"])
 app.include_router(recap.router, prefix="/api", tags=["recap"])
+app.include_router(stories.router, prefix="/api", tags=["stories"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
 
 
 @app.get("/", tags=["root"])
@@ -74,24 +108,42 @@ async def root():
         "name": "GeoNews API",
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health/ready"
     }
 
 
-@app.get("/health", tags=["health"])
-async def health_check():
-    """Health check endpoint"""
-    from app.services.db_cleanup import get_database_stats
-    
-    db_stats = await get_database_stats()
+@app.get("/health/live", tags=["health"])
+async def liveness():
+    """Liveness probe - the process is up and serving (no I/O)"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["health"])
+@app.get("/health", tags=["health"], include_in_schema=False)
+async def readiness():
+    """
+    Readiness probe - database reachable, background tasks running and feeds
+    scraped recently. 503 when not ready. Statistics are in /api/admin/stats.
+    """
+    from app.services.health import check_readiness
     
-    return {
-        "status": "healthy",
-        "version": "1.0.0",
-        "database": "connected",
-        "timestamp": datetime.utcnow().isoformat(),
-        "stats": db_stats
-    }
+    ready, checks = await check_readiness()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "version": "1.0.0",
+            "timestamp": datetime.utcnow().isoformat(),
+            "checks": checks
+        }
+    )
+
+
+@app.get("/metrics", tags=["health"], include_in_schema=False, dependencies=[Depends(admin.require_admin)])
+async def metrics():
+    """Prometheus metrics"""
+    from app.services.metrics import registry
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@
 Database models for GeoNews
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Index
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, Index, UniqueConstraint, LargeBinary
 from app.database import Base
 
 
@@ -80,3 +80,229 @@ class ScraperState(Base):
             "last_run": self.last_run.isoformat() if self.last_run else None,
         }
 
+
+class FeedHealth(Base):
+    """Per-feed fetch and processing stats (rolling averages over recent cycles)"""
+    __tablename__ = "feed_health"
+    
+    id = Column(Integer, primary_key=True)
+    source_name = Column(String(100), unique=True, nullable=False)
+    
+    # Totals
+    fetches = Column(Integer, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    entries_seen_total = Column(Integer, nullable=False, default=0)
+    new_entries_total = Column(Integer, nullable=False, default=0)
+    saved_total = Column(Integer, nullable=False, default=0)
+    
+    # Last fetch
+    last_fetch_at = Column(DateTime, nullable=True)
+    last_success_at = Column(DateTime, nullable=True)
+    last_status = Column(Integer, nullable=True)  # HTTP status
+    last_error = Column(Text, nullable=True)
+    last_error_at = Column(DateTime, nullable=True)
+    last_sample_json = Column(Text, nullable=True)  # Every metric of the last fetch
+    
+    # Exponentially weighted averages
+    avg_dns_ms = Column(Float, nullable=True)
+    avg_connect_ms = Column(Float, nullable=True)
+    avg_ttfb_ms = Column(Float, nullable=True)
+    avg_download_ms = Column(Float, nullable=True)
+    avg_bytes = Column(Float, nullable=True)
+    avg_parse_ms = Column(Float, nullable=True)
+    avg_enrich_ms = Column(Float, nullable=True)  # LLM time per cycle
+    avg_duration_ms = Column(Float, nullable=True)  # Fetch start to last entry persisted
+    avg_entries_seen = Column(Float, nullable=True)
+    avg_new_entries = Column(Float, nullable=True)
+    avg_duplicate_ratio = Column(Float, nullable=True)
+
+
+class ServiceLease(Base):
+    """Time-bounded leases so only one instance runs a given piece of work"""
+    __tablename__ = "service_leases"
+    
+    name = Column(String(200), primary_key=True)  # e.g. "scheduler"
+    holder = Column(String(200), nullable=False)  # Instance id of the current holder
+    expires_at = Column(DateTime, nullable=False)
+    
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "holder": self.holder,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+        }
+
+
+class WorkerRequest(Base):
+    """Admin requests for whichever instance runs the scrape cycles (e.g. trace the next N)"""
+    __tablename__ = "worker_requests"
+    
+    name = Column(String(50), primary_key=True)  # "trace_cycles", "profile_cycles"
+    remaining = Column(Integer, nullable=False, default=0)  # Cycles still to handle
+    requested_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TraceRecord(Base):
+    """Finished scrape cycle traces, readable from every process"""
+    __tablename__ = "traces"
+    
+    trace_id = Column(String(16), primary_key=True)
+    name = Column(String(100), nullable=False)
+    started_at = Column(DateTime, nullable=False, index=True)
+    duration_ms = Column(Float, nullable=False)
+    span_count = Column(Integer, nullable=False)
+    error_count = Column(Integer, nullable=False, default=0)
+    attrs_json = Column(Text, nullable=True)
+    trace_json = Column(Text, nullable=False)  # The full trace (spans included)
+
+
+class ProfileFile(Base):
+    """Files of a saved profile session, readable from every process"""
+    __tablename__ = "profile_files"
+    
+    name = Column(String(200), primary_key=True)  # <profile_id>.<kind>
+    profile_id = Column(String(100), nullable=False, index=True)
+    size = Column(Integer, nullable=False)
+    content = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class DeletedEvent(Base):
+    """Tombstones for events removed by retention, used by delta sync clients"""
+    __tablename__ = "deleted_events"
+    
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    # Ids are client watermarks - SQLite must not reuse them once expiry empties the table
+    __table_args__ = {"sqlite_autoincrement": True}
+
+
+class UpdatedEvent(Base):
+    """Change log of events edited in place (e.g. backfilled coordinates), for followers and delta sync"""
+    __tablename__ = "updated_events"
+    
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    __table_args__ = {"sqlite_autoincrement": True}
+
+
+class StoredRecap(Base):
+    """Generated daily recaps, reused until new events arrive for the source"""
+    __tablename__ = "stored_recaps"
+    
+    id = Column(Integer, primary_key=True)
+    source_name = Column(String(100), nullable=False)
+    hours = Column(Integer, nullable=False)
+    window_end = Column(DateTime, nullable=False)  # Start of the time bucket the recap was generated in
+    last_event_id = Column(Integer, nullable=True)  # Newest event id covered by the recap
+    event_count = Column(Integer, nullable=False, default=0)
+    recap_json = Column(Text, nullable=False)
+    generated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    full_generated_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Last full generation - incremental updates keep it
+    
+    __table_args__ = (
+        UniqueConstraint('source_name', 'hours', 'window_end', name='uq_recap_source_hours_window'),
+    )
+
+
+class RecapJobRecord(Base):
+    """Recap generation jobs, shared by every API worker so any of them can answer a poll"""
+    __tablename__ = "recap_jobs"
+    
+    id = Column(String(32), primary_key=True)
+    source_name = Column(String(100), nullable=False)
+    hours = Column(Integer, nullable=False)
+    force = Column(Boolean, nullable=False, default=False)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, done, failed, cancelled
+    result_json = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True, index=True)
+    heartbeat_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Refreshed by the worker running the job
+    polled_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Last poll from any worker
+    
+    __table_args__ = (
+        Index('idx_recap_job_key', 'source_name', 'hours', 'force', 'status'),
+    )
+
+
+class LLMCall(Base):
+    """One OpenAI call (append-only; rolled up into llm_usage_hourly)"""
+    __tablename__ = "llm_calls"
+    
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    caller = Column(String(50), nullable=False)  # e.g. "news_processing", "recap_chunk"
+    feed = Column(String(100), nullable=True)  # Feed / source the call was made for
+    model = Column(String(50), nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Float, nullable=False)
+    retries = Column(Integer, nullable=False, default=0)
+    outcome = Column(String(20), nullable=False)  # ok, empty, json_error, error
+
+
+class LLMUsageHourly(Base):
+    """Hourly LLM usage per caller, feed and model"""
+    __tablename__ = "llm_usage_hourly"
+    
+    id = Column(Integer, primary_key=True)
+    hour = Column(DateTime, nullable=False, index=True)
+    caller = Column(String(50), nullable=False)
+    feed = Column(String(100), nullable=False, default="")
+    model = Column(String(50), nullable=False)
+    calls = Column(Integer, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)
+    json_errors = Column(Integer, nullable=False, default=0)
+    retries = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+    latency_ms_total = Column(Float, nullable=False, default=0.0)  # For exact means across hours
+    latency_ms_p50 = Column(Float, nullable=True)
+    latency_ms_p95 = Column(Float, nullable=True)
+    latency_ms_p99 = Column(Float, nullable=True)
+    latency_ms_max = Column(Float, nullable=True)
+    
+    __table_args__ = (
+        UniqueConstraint('hour', 'caller', 'feed', 'model', name='uq_llm_usage_hour_caller_feed_model'),
+    )
+
+
+class Story(Base):
+    """Reports of one incident from several sources, grouped as events arrive"""
+    __tablename__ = "stories"
+    
+    id = Column(Integer, primary_key=True)
+    title = Column(Text, nullable=True)  # Title of the first report
+    location_name = Column(String(200), nullable=True)
+    latitude = Column(Float, nullable=True)  # Centroid of the members
+    longitude = Column(Float, nullable=True)
+    category = Column(String(50), nullable=False, default="general")
+    event_count = Column(Integer, nullable=False, default=1)
+    located_count = Column(Integer, nullable=False, default=0)  # Members with coordinates (the centroid's weight)
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False, index=True)
+
+
+class StoryMember(Base):
+    """Assignment of an event to its story"""
+    __tablename__ = "story_members"
+    
+    event_id = Column(Integer, primary_key=True)  # One story per event
+    story_id = Column(Integer, nullable=False, index=True)
+    similarity = Column(Float, nullable=True)  # Text similarity when it joined (None for the first report)
+
+
+class SchemaVersion(Base):
+    """Fingerprint of the models the tables were last created from (lets startup skip create_all)"""
+    __tablename__ = "schema_version"
+    
+    name = Column(String(50), primary_key=True)  # "models"
+    fingerprint = Column(String(64), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
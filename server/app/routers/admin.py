@@ -0,0 +1,186 @@
+"""
+Admin API Router
+Operational endpoints, protected by the X-Admin-Token header
+"""
+import hmac
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+
+from app.config import get_settings
+from app.services.db_cleanup import get_cached_database_stats
+from app.services.feed_health import get_feed_health
+from app.services.ingest_pipeline import ingest_pipeline
+from app.services.llm_telemetry import get_usage_report
+from app.services.profiler import get_profile_file, list_profiles
+from app.services.slow_queries import slow_query_log
+from app.services.tracing import flame, timeline, trace_store
+from app.services.worker_requests import PROFILE_CYCLES, TRACE_CYCLES, pending_cycles, request_cycles
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+router = APIRouter()
+
+
+def is_admin(x_admin_token: Optional[str], authorization: Optional[str]) -> bool:
+    """Whether the credentials match the configured admin token (without one: only with the explicit dev opt-in)"""
+    if not settings.admin_token:
+        return settings.admin_open_without_token
+    # Metrics scrapers usually only support bearer tokens
+    if not x_admin_token and authorization and authorization.lower().startswith("bearer "):
+        x_admin_token = authorization[7:]
+    return bool(x_admin_token) and hmac.compare_digest(x_admin_token, settings.admin_token)
+
+
+async def require_admin(
+    x_admin_token: Optional[str] = Header(default=None),
+    authorization: Optional[str] = Header(default=None)
+):
+    """Allow the request only with the configured admin token (or with ADMIN_OPEN_WITHOUT_TOKEN and no token set)"""
+    if is_admin(x_admin_token, authorization):
+        return
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin API disabled - set ADMIN_TOKEN to enable it")
+    raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.get("/admin/stats", dependencies=[Depends(require_admin)])
+async def get_admin_stats(
+    refresh: bool = Query(default=False, description="Recompute instead of using the cached statistics")
+):
+    """
+    Event counts (total, last 24h/7d/30d) and retention, cached for a minute.
+    Moved here from /health so probes don't count the table.
+    """
+    stats = await get_cached_database_stats(refresh)
+    if stats is None:
+        raise HTTPException(status_code=503, detail="Database statistics unavailable")
+    return stats
+
+
+@router.get("/admin/pipeline", dependencies=[Depends(require_admin)])
+async def get_pipeline_stats():
+    """
+    Ingestion pipeline state: per-stage queue depth, busy workers and throughput.
+    Stages run in the process doing the ingestion (APP_ROLE=all or worker).
+    """
+    return ingest_pipeline.stats()
+
+
+@router.get("/admin/llm-usage", dependencies=[Depends(require_admin)])
+async def get_llm_usage(
+    hours: int = Query(default=24, ge=1, le=24 * 90, description="Hours to report")
+):
+    """
+    LLM tokens, cost and latency broken down per feed, caller and hour
+    """
+    return await get_usage_report(hours)
+
+
+@router.get("/admin/feeds", dependencies=[Depends(require_admin)])
+async def get_feeds_health():
+    """
+    Per-feed health: fetch timings, parse and LLM time, yields, duplicate ratio and errors.
+    Slowest feeds first.
+    """
+    feeds = await get_feed_health()
+    return {
+        "feeds": feeds,
+        "failing": [f["source_name"] for f in feeds if f["status"] == "failing"],
+    }
+
+
+@router.get("/admin/traces", dependencies=[Depends(require_admin)])
+async def list_traces():
+    """
+    Recently traced scrape cycles, newest first - from every instance, whichever role serves this.
+    Cycles are sampled with TRACING_SAMPLE_RATE or captured on request (POST /admin/traces/capture).
+    """
+    return {
+        "sample_rate": settings.tracing_sample_rate,
+        "pending_captures": await pending_cycles(TRACE_CYCLES),
+        "traces": await trace_store.summaries(),
+    }
+
+
+@router.post("/admin/traces/capture", dependencies=[Depends(require_admin)])
+async def capture_traces(
+    cycles: int = Query(default=1, ge=0, le=20, description="Scrape cycles to trace (0 cancels)")
+):
+    """Trace the next scrape cycles regardless of the sample rate (run by whichever instance scrapes)"""
+    await request_cycles(TRACE_CYCLES, cycles)
+    return {"capturing": cycles}
+
+
+@router.get("/admin/traces/{trace_id}", dependencies=[Depends(require_admin)])
+async def get_trace(
+    trace_id: str,
+    view: str = Query(default="timeline", pattern="^(timeline|flame|raw)$")
+):
+    """
+    One traced cycle:
+    - timeline: spans in start order with depth (waterfall)
+    - flame: self time per collapsed stack ("a;b;c")
+    - raw: the recorded spans
+    """
+    trace = await trace_store.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (only recent traces are kept)")
+    if view == "raw":
+        return trace
+    summary = {key: trace[key] for key in ("trace_id", "name", "started_at", "duration_ms", "attrs", "dropped_spans")}
+    if view == "flame":
+        return {**summary, "stacks": flame(trace)}
+    return {**summary, "spans": timeline(trace)}
+
+
+@router.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def get_profiles():
+    """
+    Saved profiles, newest first. Profile a request by sending it with
+    `X-Profile: 1` (or `?profile=1`) and the admin token.
+    """
+    return {
+        "pending_scrape_cycles": await pending_cycles(PROFILE_CYCLES),
+        "profiles": await list_profiles(),
+    }
+
+
+@router.post("/admin/profiles/scrape", dependencies=[Depends(require_admin)])
+async def profile_scrape_cycles(
+    cycles: int = Query(default=1, ge=0, le=10, description="Scrape cycles to profile (0 cancels)")
+):
+    """Profile the next scrape cycles, with tracemalloc allocation snapshots (run by whichever instance scrapes)"""
+    await request_cycles(PROFILE_CYCLES, cycles)
+    return {"pending_scrape_cycles": cycles}
+
+
+@router.get("/admin/profiles/{name}", dependencies=[Depends(require_admin)])
+async def download_profile(name: str):
+    """Download one profile file (.pstats, .collapsed, .tracemalloc or .txt)"""
+    content = await get_profile_file(name)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Profile file not found")
+    return Response(
+        content=content,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{name}"'}
+    )
+
+
+@router.get("/admin/slow-queries", dependencies=[Depends(require_admin)])
+async def get_slow_queries():
+    """
+    Statements over SLOW_QUERY_THRESHOLD_MS grouped by fingerprint, slowest total first,
+    with their query plans and index suggestions for repeated full table scans
+    """
+    return await slow_query_log.report()
+
+
+@router.delete("/admin/slow-queries", dependencies=[Depends(require_admin)])
+async def reset_slow_queries():
+    """Forget recorded slow queries (e.g. after adding an index)"""
+    slow_query_log.reset()
+    return {"status": "reset"}
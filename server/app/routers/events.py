@@ -4,24 +4,80 @@ Events API Router
 from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy import select, func, desc
+from fastapi import APIRouter, Depends, Query, HTTPException, Response, Request, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func, desc, exists
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.models import NewsEvent
-from app.schemas import NewsEventResponse, NewsEventsListResponse, StatsResponse
+from app.database import get_db, async_session_maker
+from app.models import NewsEvent, DeletedEvent, UpdatedEvent, StoryMember
+from app.schemas import (
+    NewsEventResponse, NewsEventsListResponse, StatsResponse,
+    EventChangesResponse
+)
+from app.services.event_hub import hub, to_published_event
+from app.services.event_rows import select_event_rows, rows_to_dicts, encode_events_list, dumps
+from app.services.heatmap import DEFAULT_RESOLUTION, MAX_RESOLUTION, build_heatmap, load_points, snap_bbox
+from app.services.hot_window import hot_window
+from app.services.query_cache import make_key, get_or_build
 
 router = APIRouter()
 
+# Seconds between SSE keep-alive comments on idle streams
+STREAM_HEARTBEAT_SECONDS = 15
+
+# Maximum number of events replayed from the database on resume
+STREAM_MAX_REPLAY = 500
+
+
+def parse_bbox(bbox: Optional[str]) -> Optional[tuple[float, float, float, float]]:
+    """Parse a "min_lon,min_lat,max_lon,max_lat" bounding box"""
+    if not bbox:
+        return None
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    # float() accepts nan and inf
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180 and -90 <= min_lat <= 90 and -90 <= max_lat <= 90):
+        raise HTTPException(status_code=422, detail="bbox longitudes must be within ±180 and latitudes within ±90")
+    if min_lon > max_lon or min_lat > max_lat:
+        raise HTTPException(status_code=422, detail="bbox minimums must not exceed maximums")
+    return (min_lon, min_lat, max_lon, max_lat)
+
+
+def event_conditions(
+    category: Optional[str] = None,
+    source: Optional[str] = None,
+    bbox: Optional[tuple[float, float, float, float]] = None
+) -> list:
+    """Build WHERE conditions shared by the event endpoints"""
+    conditions = []
+    if category:
+        conditions.append(NewsEvent.category == category.lower())
+    if source:
+        conditions.append(NewsEvent.source_name.ilike(f"%{source}%"))
+    if bbox:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        conditions.append(NewsEvent.latitude.between(min_lat, max_lat))
+        conditions.append(NewsEvent.longitude.between(min_lon, max_lon))
+    return conditions
+
+
+def not_story_member():
+    """Excludes events that joined a story another event opened (the first report has no similarity)"""
+    return ~exists().where(StoryMember.event_id == NewsEvent.id, StoryMember.similarity.is_not(None))
+
 
 @router.get("/events", response_model=NewsEventsListResponse)
 async def get_events(
     hours: int = Query(default=24, ge=1, le=168, description="Filter events from last N hours"),
     category: Optional[str] = Query(default=None, description="Filter by category"),
     source: Optional[str] = Query(default=None, description="Filter by source"),
+    bbox: Optional[str] = Query(default=None, description="Bounding box: min_lon,min_lat,max_lon,max_lat"),
     limit: int = Query(default=100, ge=1, le=500, description="Maximum number of events"),
     offset: int = Query(default=0, ge=0, description="Offset for pagination"),
+    collapse_stories: bool = Query(default=False, description="Only the first report of each story"),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -30,40 +86,326 @@ async def get_events(
     - **hours**: Filter events detected within last N hours (default: 24)
     - **category**: Optional category filter (military, political, casualties, infrastructure, general)
     - **source**: Optional source filter
+    - **bbox**: Optional bounding box filter (min_lon,min_lat,max_lon,max_lat)
     - **limit**: Maximum events to return (default: 100)
     - **offset**: Pagination offset
+    - **collapse_stories**: Drop later reports of an incident another source already reported (see /api/stories)
     """
+    bounds = parse_bbox(bbox)
+    key = make_key(
+        "events", hours=hours, category=category, source=source, bbox=bounds, limit=limit, offset=offset,
+        collapse_stories=collapse_stories
+    )
+    body, hit = await get_or_build(
+        key, lambda: _build_events_body(db, hours, category, source, bounds, limit, offset, collapse_stories)
+    )
+    return _json_response(body, hit)
+
+
+def _json_response(body: bytes, hit: bool) -> Response:
+    """Wrap an already serialized body so FastAPI skips re-validation"""
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"X-Cache": "HIT" if hit else "MISS"}
+    )
+
+
+async def _build_events_body(
+    db: AsyncSession,
+    hours: int,
+    category: Optional[str],
+    source: Optional[str],
+    bbox: Optional[tuple[float, float, float, float]],
+    limit: int,
+    offset: int,
+    collapse_stories: bool = False
+) -> bytes:
+    """Run the events query and serialize the response"""
+    if hot_window.covers(hours):
+        return hot_window.query_events(hours, category, source, bbox, limit, offset, collapse_stories)
+    
     # Calculate time threshold
     time_threshold = datetime.utcnow() - timedelta(hours=hours)
-    
-    # Build query
-    query = select(NewsEvent).where(NewsEvent.timestamp_detected >= time_threshold)
-    
-    if category:
-        query = query.where(NewsEvent.category == category.lower())
-    
-    if source:
-        query = query.where(NewsEvent.source_name.ilike(f"%{source}%"))
+    conditions = [NewsEvent.timestamp_detected >= time_threshold, *event_conditions(category, source, bbox)]
+    if collapse_stories:
+        conditions.append(not_story_member())
     
     # Get total count
-    count_query = select(func.count(NewsEvent.id)).where(NewsEvent.timestamp_detected >= time_threshold)
-    if category:
-        count_query = count_query.where(NewsEvent.category == category.lower())
-    if source:
-        count_query = count_query.where(NewsEvent.source_name.ilike(f"%{source}%"))
-    
+    count_query = select(func.count(NewsEvent.id)).where(*conditions)
     total_result = await db.execute(count_query)
     total = total_result.scalar() or 0
     
-    # Execute query with ordering and pagination
-    query = query.order_by(desc(NewsEvent.timestamp_detected)).offset(offset).limit(limit)
+    # Execute query with ordering and pagination - plain rows, no ORM objects
+    query = (
+        select_event_rows()
+        .where(*conditions)
+        .order_by(desc(NewsEvent.timestamp_detected))
+        .offset(offset)
+        .limit(limit)
+    )
     result = await db.execute(query)
-    events = result.scalars().all()
     
-    return NewsEventsListResponse(
-        events=[NewsEventResponse.model_validate(e) for e in events],
-        total=total,
-        filtered_hours=hours
+    return encode_events_list(result.all(), total, hours)
+
+
+@router.get("/events/changes", response_model=EventChangesResponse)
+async def get_event_changes(
+    since_id: Optional[int] = Query(default=None, ge=0, description="Return events with id above this watermark"),
+    since: Optional[datetime] = Query(default=None, description="Return events detected after this time (when no since_id)"),
+    since_deleted_id: Optional[int] = Query(default=None, ge=0, description="Return deletions after this tombstone id"),
+    since_updated_id: Optional[int] = Query(default=None, ge=0, description="Return events edited after this update log id"),
+    hours: int = Query(default=24, ge=1, le=168, description="Only include events from last N hours"),
+    category: Optional[str] = Query(default=None, description="Filter by category"),
+    source: Optional[str] = Query(default=None, description="Filter by source"),
+    limit: int = Query(default=500, ge=1, le=500, description="Maximum number of events"),
+    collapse_stories: bool = Query(default=False, description="Leave out later reports of a story"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get events inserted, edited and deleted since a watermark
+    
+    Pass the returned watermark back as since_id / since_deleted_id / since_updated_id
+    on the next call. Edited events come back in events again - clients replace the
+    copy they hold. Deleted ids are not filtered - clients simply ignore ids they don't hold.
+    """
+    time_threshold = datetime.utcnow() - timedelta(hours=hours)
+    conditions = [NewsEvent.timestamp_detected >= time_threshold, *event_conditions(category, source)]
+    if collapse_stories:
+        conditions.append(not_story_member())
+    
+    # New events - a primary key range scan (or timestamp index scan without since_id)
+    query = select_event_rows().where(*conditions)
+    if since_id is not None:
+        query = query.where(NewsEvent.id > since_id).order_by(NewsEvent.id)
+    else:
+        if since is not None:
+            query = query.where(NewsEvent.timestamp_detected > since)
+        query = query.order_by(NewsEvent.timestamp_detected, NewsEvent.id)
+    result = await db.execute(query.limit(limit))
+    events = result.all()
+    has_more = len(events) == limit
+    
+    if events:
+        event_watermark = max(e.id for e in events)
+        if since_id is not None:
+            event_watermark = max(event_watermark, since_id)
+    elif since_id is not None:
+        event_watermark = since_id
+    else:
+        max_id_result = await db.execute(select(func.max(NewsEvent.id)))
+        event_watermark = max_id_result.scalar() or 0
+    
+    # Deletions - a range scan over the tombstone primary key
+    deleted_ids = []
+    reset = False
+    if since_deleted_id is None:
+        max_deleted_result = await db.execute(select(func.max(DeletedEvent.id)))
+        deleted_watermark = max_deleted_result.scalar() or 0
+    else:
+        deleted_query = (
+            select(DeletedEvent.id, DeletedEvent.event_id)
+            .where(DeletedEvent.id > since_deleted_id)
+            .order_by(DeletedEvent.id)
+            .limit(limit)
+        )
+        deleted_rows = (await db.execute(deleted_query)).all()
+        deleted_ids = [row.event_id for row in deleted_rows]
+        deleted_watermark = deleted_rows[-1].id if deleted_rows else since_deleted_id
+        has_more = has_more or len(deleted_rows) == limit
+        
+        # Tombstones before the client's position were already expired
+        if deleted_rows and deleted_rows[0].id > since_deleted_id + 1:
+            min_deleted_result = await db.execute(select(func.min(DeletedEvent.id)))
+            reset = (min_deleted_result.scalar() or 0) > since_deleted_id + 1
+    
+    # Edits - a range scan over the update log, then the edited rows by primary key
+    if since_updated_id is None:
+        max_updated_result = await db.execute(select(func.max(UpdatedEvent.id)))
+        updated_watermark = max_updated_result.scalar() or 0
+    else:
+        updated_query = (
+            select(UpdatedEvent.id, UpdatedEvent.event_id)
+            .where(UpdatedEvent.id > since_updated_id)
+            .order_by(UpdatedEvent.id)
+            .limit(limit)
+        )
+        updated_rows = (await db.execute(updated_query)).all()
+        updated_watermark = updated_rows[-1].id if updated_rows else since_updated_id
+        has_more = has_more or len(updated_rows) == limit
+        
+        # Rows already in this response, or above the client's event watermark, are skipped
+        held = {e.id for e in events}
+        edited_ids = {
+            row.event_id for row in updated_rows
+            if row.event_id not in held and row.event_id <= event_watermark
+        }
+        if edited_ids:
+            edited_result = await db.execute(
+                select_event_rows().where(NewsEvent.id.in_(edited_ids), *conditions).order_by(NewsEvent.id)
+            )
+            events = [*events, *edited_result.all()]
+        
+        if updated_rows and updated_rows[0].id > since_updated_id + 1:
+            min_updated_result = await db.execute(select(func.min(UpdatedEvent.id)))
+            reset = reset or (min_updated_result.scalar() or 0) > since_updated_id + 1
+    
+    return Response(
+        content=dumps({
+            "events": rows_to_dicts(events),
+            "deleted_ids": deleted_ids,
+            "watermark": {
+                "event_id": event_watermark,
+                "deleted_id": deleted_watermark,
+                "updated_id": updated_watermark,
+            },
+            "has_more": has_more,
+            "reset": reset,
+        }),
+        media_type="application/json"
+    )
+
+
+@router.get("/events/heatmap")
+async def get_events_heatmap(
+    bbox: Optional[str] = Query(default=None, description="Bounding box: min_lon,min_lat,max_lon,max_lat (default: extent of the events)"),
+    resolution: int = Query(default=DEFAULT_RESOLUTION, ge=4, le=MAX_RESOLUTION, description="Grid cells along the longer side"),
+    hours: int = Query(default=24, ge=1, le=168, description="Events from last N hours"),
+    category: Optional[str] = Query(default=None, description="Filter by category"),
+    source: Optional[str] = Query(default=None, description="Filter by source"),
+    half_life: float = Query(default=0, ge=0, le=168, description="Time decay half-life in hours (0 = plain counts)"),
+    frames: bool = Query(default=False, description="One grid per hour instead of a single grid"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Event density grid for a heat layer. Cells are [row, col, value] with row 0
+    at the southern edge of bbox and col 0 at the western edge; empty cells are omitted.
+    """
+    bounds = snap_bbox(parse_bbox(bbox))
+    key = make_key(
+        "heatmap", bbox=bounds, resolution=resolution, hours=hours, category=category,
+        source=source, half_life=half_life, frames=frames
+    )
+    body, hit = await get_or_build(
+        key, lambda: _build_heatmap_body(db, hours, category, source, bounds, resolution, half_life, frames)
+    )
+    return _json_response(body, hit)
+
+
+async def _build_heatmap_body(
+    db: AsyncSession,
+    hours: int,
+    category: Optional[str],
+    source: Optional[str],
+    bbox: Optional[tuple[float, float, float, float]],
+    resolution: int,
+    half_life: float,
+    frames: bool
+) -> bytes:
+    """Load event coordinates as arrays, bin them and serialize the grid"""
+    latitudes, longitudes, epochs = await load_points(
+        db, hours, event_conditions(category, source, bbox), category, source, bbox
+    )
+    return dumps(build_heatmap(latitudes, longitudes, epochs, hours, bbox, resolution, half_life, frames))
+
+
+@router.get("/events/stream")
+async def stream_events(
+    request: Request,
+    category: Optional[str] = Query(default=None, description="Filter by category"),
+    source: Optional[str] = Query(default=None, description="Filter by source"),
+    bbox: Optional[str] = Query(default=None, description="Bounding box: min_lon,min_lat,max_lon,max_lat"),
+    last_event_id: Optional[int] = Query(default=None, description="Resume after this event id"),
+    collapse_stories: bool = Query(default=False, description="Leave out later reports of a story"),
+    last_event_id_header: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+):
+    """
+    Server-Sent Events stream of newly persisted events
+    
+    Each message carries the event id, so browsers resume automatically with
+    the Last-Event-ID header after a reconnect.
+    """
+    bounds = parse_bbox(bbox)
+    category = category.lower() if category else None
+    source_filter = source.lower() if source else None
+    
+    resume_id = last_event_id
+    if last_event_id_header and last_event_id_header.isdigit():
+        resume_id = int(last_event_id_header)
+    
+    async def replay_from_db(after_id: int) -> list:
+        conditions = event_conditions(category, source, bounds)
+        if collapse_stories:
+            conditions.append(not_story_member())
+        query = (
+            select(NewsEvent)
+            .where(NewsEvent.id > after_id, *conditions)
+            .order_by(NewsEvent.id)
+            .limit(STREAM_MAX_REPLAY)
+        )
+        async with async_session_maker() as db:
+            result = await db.execute(query)
+            return [to_published_event(e) for e in result.scalars().all()]
+    
+    async def event_stream():
+        # Hub position at connect time - events published from here on are delivered
+        cursor = hub.last_seq
+        last_id = resume_id
+        if last_id is None:
+            last_id = hub.last_id
+        if last_id is None:
+            async with async_session_maker() as db:
+                last_id = (await db.execute(select(func.max(NewsEvent.id)))).scalar() or 0
+        
+        yield "retry: 3000\n\n"
+        
+        hub.subscribers += 1
+        try:
+            async for message in follow(last_id, cursor):
+                yield message
+        finally:
+            hub.subscribers -= 1
+    
+    async def follow(last_id: int, cursor: int):
+        # cursor is a position in the hub - the hub is in arrival order, so events
+        # that commit late with a lower id still reach the client
+        # A resuming client may have missed events this process never buffered
+        replay = resume_id is not None
+        replayed: set[int] = set()
+        while True:
+            # Taken before reading the buffer - a publish while we yield or check the
+            # connection below sets it, so the wait returns at once
+            signal = hub.signal()
+            if replay:
+                # Replay from the database, then continue from the hub position taken before the query
+                cursor = hub.last_seq
+                pending = await replay_from_db(last_id)
+                replayed = {event.id for event in pending}
+                replay = len(pending) >= STREAM_MAX_REPLAY
+            else:
+                pending, cursor = hub.events_since(cursor)
+                if pending is None:
+                    # Fell behind the hub buffer - catch up from the database
+                    replay = True
+                    continue
+                pending = [event for event in pending if event.id not in replayed]
+            
+            for event in pending:
+                last_id = max(last_id, event.id)
+                if event.matches(category, source_filter, bounds, collapse_stories):
+                    yield f"id: {event.id}\nevent: news_event\ndata: {event.data}\n\n"
+            
+            if await request.is_disconnected():
+                break
+            if replay:
+                continue
+            if not await hub.wait(STREAM_HEARTBEAT_SECONDS, signal):
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
@@ -88,6 +430,15 @@ async def get_stats(
     db: AsyncSession = Depends(get_db)
 ):
     """Get statistics about news events"""
+    body, hit = await get_or_build(make_key("stats"), lambda: _build_stats_body(db))
+    return _json_response(body, hit)
+
+
+async def _build_stats_body(db: AsyncSession) -> bytes:
+    """Run the statistics queries and serialize the response"""
+    if hot_window.covers(24):
+        return dumps(hot_window.stats())
+    
     # Total events
     total_query = select(func.count(NewsEvent.id))
     total_result = await db.execute(total_query)
@@ -120,13 +471,14 @@ async def get_stats(
     last_update_result = await db.execute(last_update_query)
     last_update = last_update_result.scalar_one_or_none()
     
-    return StatsResponse(
+    response = StatsResponse(
         total_events=total_events,
         events_last_24h=events_last_24h,
         events_by_category=events_by_category,
         events_by_source=events_by_source,
         last_update=last_update
     )
+    return response.model_dump_json().encode()
 
 
 @router.get("/categories")
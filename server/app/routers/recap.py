@@ -3,11 +3,14 @@ Daily Recap API Router
 """
 import logging
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response, Request, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.services.daily_recap import get_available_sources, generate_daily_recap
+from app.services.daily_recap import get_available_sources
+from app.services.recap_jobs import recap_jobs
+from app.services.event_rows import dumps
+from app.services.query_cache import make_key, get_or_build
 
 logger = logging.getLogger(__name__)
 
@@ -21,30 +24,46 @@ async def get_recap_sources(
     """
     Get list of available sources with event counts for recap generation
     """
-    sources = await get_available_sources(db)
-    return {
-        "sources": sources,
-        "total": len(sources)
-    }
+    async def build() -> bytes:
+        sources = await get_available_sources(db)
+        return dumps({
+            "sources": sources,
+            "total": len(sources)
+        })
+    
+    body, hit = await get_or_build(make_key("recap_sources"), build)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"X-Cache": "HIT" if hit else "MISS"}
+    )
 
 
 @router.post("/recap/generate")
 async def create_daily_recap(
+    request: Request,
     source_name: str = Query(..., description="Source name to generate recap for"),
     hours: int = Query(24, ge=1, le=168, description="Time range in hours (1-168)"),
-    db: AsyncSession = Depends(get_db)
+    force: bool = Query(False, description="Ignore stored recaps and regenerate from scratch"),
 ):
     """
     Generate AI-powered daily recap for a specific source
     
     This is an on-demand operation that uses OpenAI to create a comprehensive
     summary of all events from the specified source within the time range.
+    A stored recap is returned while no new events arrived for the source.
+    
+    Holds the request until the recap is ready - prefer POST /recap/jobs.
     """
     logger.info(f"Generating recap for {source_name} (last {hours} hours)")
     
-    recap = await generate_daily_recap(db, source_name, hours)
+    job, _ = await recap_jobs.submit(source_name, hours, force)
+    while not job.finished:
+        job = await recap_jobs.wait(job, timeout=1)
+        if not job.finished and await request.is_disconnected():
+            return None
     
-    if not recap:
+    if job.status != "done" or not job.result:
         return {
             "success": False,
             "error": "Failed to generate recap"
@@ -52,6 +71,41 @@ async def create_daily_recap(
     
     return {
         "success": True,
-        "recap": recap
+        "recap": job.result
     }
 
+
+@router.post("/recap/jobs", status_code=202)
+async def create_recap_job(
+    source_name: str = Query(..., description="Source name to generate recap for"),
+    hours: int = Query(24, ge=1, le=168, description="Time range in hours (1-168)"),
+    force: bool = Query(False, description="Ignore stored recaps and regenerate from scratch"),
+):
+    """
+    Start (or join) a recap generation job
+    
+    Returns immediately with a job id. Identical requests in flight share one job.
+    Poll GET /recap/jobs/{job_id} - jobs nobody polls are cancelled.
+    """
+    job, coalesced = await recap_jobs.submit(source_name, hours, force)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "coalesced": coalesced
+    }
+
+
+@router.get("/recap/jobs/{job_id}")
+async def get_recap_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Long-poll: seconds to wait for the job to finish"),
+):
+    """Get the state of a recap job, with the recap once it is done"""
+    job = await recap_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Recap job not found")
+    
+    if wait and not job.finished:
+        job = await recap_jobs.wait(job, timeout=wait)
+    
+    return job.to_dict()
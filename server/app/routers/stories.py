@@ -0,0 +1,93 @@
+"""
+Stories API Router
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.models import NewsEvent, Story, StoryMember
+from app.routers.events import parse_bbox
+from app.services.event_rows import dumps
+from app.services.query_cache import make_key, get_or_build
+
+router = APIRouter()
+
+
+@router.get("/stories")
+async def get_stories(
+    hours: int = Query(default=24, ge=1, le=168, description="Stories updated in the last N hours"),
+    category: Optional[str] = Query(default=None, description="Filter by category"),
+    bbox: Optional[str] = Query(default=None, description="Bounding box: min_lon,min_lat,max_lon,max_lat"),
+    min_events: int = Query(default=2, ge=1, description="Only stories reported at least this many times"),
+    limit: int = Query(default=100, ge=1, le=500, description="Maximum number of stories"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Incidents reported by several events, most recently updated first. Each
+    story has its centroid, member event ids and the sources that reported it.
+    """
+    bounds = parse_bbox(bbox)
+    key = make_key("stories", hours=hours, category=category, bbox=bounds, min_events=min_events, limit=limit)
+    body, hit = await get_or_build(
+        key, lambda: _build_stories_body(db, hours, category, bounds, min_events, limit)
+    )
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"X-Cache": "HIT" if hit else "MISS"}
+    )
+
+
+async def _build_stories_body(
+    db: AsyncSession,
+    hours: int,
+    category: Optional[str],
+    bbox: Optional[tuple[float, float, float, float]],
+    min_events: int,
+    limit: int
+) -> bytes:
+    query = select(Story).where(
+        Story.last_seen >= datetime.utcnow() - timedelta(hours=hours),
+        Story.event_count >= min_events
+    )
+    if category:
+        query = query.where(Story.category == category.lower())
+    if bbox:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        query = query.where(Story.latitude.between(min_lat, max_lat), Story.longitude.between(min_lon, max_lon))
+    stories = (await db.execute(query.order_by(Story.last_seen.desc()).limit(limit))).scalars().all()
+
+    members: dict[int, list] = {story.id: [] for story in stories}
+    if members:
+        result = await db.execute(
+            select(StoryMember.story_id, NewsEvent.id, NewsEvent.source_name)
+            .join(NewsEvent, NewsEvent.id == StoryMember.event_id)
+            .where(StoryMember.story_id.in_(list(members)))
+            .order_by(NewsEvent.id)
+        )
+        for story_id, event_id, source_name in result.all():
+            members[story_id].append((event_id, source_name))
+
+    return dumps({
+        "stories": [
+            {
+                "id": story.id,
+                "title": story.title,
+                "location_name": story.location_name,
+                "latitude": story.latitude,
+                "longitude": story.longitude,
+                "category": story.category,
+                "event_count": story.event_count,
+                "first_seen": story.first_seen,
+                "last_seen": story.last_seen,
+                "event_ids": [event_id for event_id, _ in members[story.id]],
+                "sources": sorted({source for _, source in members[story.id]}),
+            }
+            for story in stories
+        ],
+        "total": len(stories),
+    })
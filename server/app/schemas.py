@@ -45,6 +45,22 @@ class NewsEventsListResponse(BaseModel):
     filtered_hours: int
 
 
+class ChangesWatermark(BaseModel):
+    """Position of a delta sync client"""
+    event_id: int = Field(..., description="Highest event id seen")
+    deleted_id: int = Field(..., description="Highest deletion tombstone id seen")
+    updated_id: int = Field(0, description="Highest update log id seen")
+
+
+class EventChangesResponse(BaseModel):
+    """Schema for events changed since a watermark"""
+    events: List[NewsEventResponse]
+    deleted_ids: List[int]
+    watermark: ChangesWatermark
+    has_more: bool = Field(False, description="More changes are pending - call again with the new watermark")
+    reset: bool = Field(False, description="Watermark is too old - client must reload the full list")
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
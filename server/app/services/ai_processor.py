@@ -4,17 +4,28 @@ Processes raw news text to extract locations, summaries, and categories
 """
 import json
 import logging
+from functools import lru_cache
 from typing import Optional
-from openai import AsyncOpenAI
 
 from app.config import get_settings
 from app.schemas import OpenAIProcessedResult
+from app.services.llm_telemetry import chat_json
+from app.services.tracing import span
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-# Initialize OpenAI client
-client = AsyncOpenAI(api_key=settings.openai_api_key) if settings.openai_api_key else None
+# Created on first use - importing openai takes longer than loading the rest of the app
+_client = None
+
+
+def get_openai_client():
+    """Shared AsyncOpenAI client, or None when no API key is configured"""
+    global _client
+    if _client is None and settings.openai_api_key:
+        from openai import AsyncOpenAI
+        _client = AsyncOpenAI(api_key=settings.openai_api_key)
+    return _client
 
 # Fallback coordinates for common locations (when AI fails to provide them)
 # This is a safety net - the AI should provide coordinates, but this ensures we never have null
@@ -98,31 +109,44 @@ LOCATION_FALLBACKS = {
 }
 
 
-def apply_location_fallback(location_name: Optional[str], latitude: Optional[float], longitude: Optional[float]) -> tuple[Optional[float], Optional[float]]:
+@lru_cache(maxsize=4096)
+def match_location_fallback(location_name: str) -> Optional[tuple[str, tuple[float, float]]]:
     """
-    Apply fallback coordinates if location name exists but coordinates are missing.
-    Returns (latitude, longitude) tuple.
+    (matched fallback name, coordinates) for a location name, or None.
+    Memoized - the substring scan over LOCATION_FALLBACKS runs once per distinct name.
     """
-    if not location_name or (latitude is not None and longitude is not None):
-        return (latitude, longitude)
-    
     # Normalize location name for matching
     normalized = location_name.strip().lower()
+    if not normalized:
+        return None
     
     # Check direct match
     if normalized in LOCATION_FALLBACKS:
-        coords = LOCATION_FALLBACKS[normalized]
-        logger.info(f"Applied fallback coordinates for '{location_name}': {coords}")
-        return coords
+        return normalized, LOCATION_FALLBACKS[normalized]
     
     # Check if any fallback location is contained in the name
     for fallback_location, coords in LOCATION_FALLBACKS.items():
         if fallback_location in normalized or normalized in fallback_location:
-            logger.info(f"Applied fallback coordinates for '{location_name}' (matched '{fallback_location}'): {coords}")
-            return coords
+            return fallback_location, coords
+    return None
+
+
+def apply_location_fallback(location_name: Optional[str], latitude: Optional[float], longitude: Optional[float]) -> tuple[Optional[float], Optional[float]]:
+    """
+    Apply fallback coordinates if location name exists but coordinates are missing.
+    Returns (latitude, longitude) tuple.
+    """
+    if not location_name or (latitude is not None and longitude is not None):
+        return (latitude, longitude)
+    
+    match = match_location_fallback(location_name)
+    if match is None:
+        logger.warning(f"No fallback coordinates found for location: '{location_name}'")
+        return (latitude, longitude)
     
-    logger.warning(f"No fallback coordinates found for location: '{location_name}'")
-    return (latitude, longitude)
+    fallback_location, coords = match
+    logger.info(f"Applied fallback coordinates for '{location_name}' (matched '{fallback_location}'): {coords}")
+    return coords
 
 # System prompt for news processing
 SYSTEM_PROMPT = """You are an expert intelligence analyst specializing in global geopolitical events. Your task is to analyze news text (in Hebrew, Arabic, or English) and extract structured information.
@@ -187,6 +211,14 @@ async def process_news_text(text: str, source_hint: str = "") -> Optional[OpenAI
     Returns:
         OpenAIProcessedResult with extracted information, or None if processing fails
     """
+    with span("process_news_text", chars=len(text or "")) as text_span:
+        result = await _process_news_text(text, source_hint)
+        text_span.set(location=result.location_name if result else None)
+        return result
+
+
+async def _process_news_text(text: str, source_hint: str) -> Optional[OpenAIProcessedResult]:
+    client = get_openai_client()
     if not client:
         logger.warning("OpenAI client not configured - skipping AI processing")
         return None
@@ -199,29 +231,25 @@ async def process_news_text(text: str, source_hint: str = "") -> Optional[OpenAI
         # Prepare user message with context
         user_message = f"Source: {source_hint}\n\nText to analyze:\n{text}" if source_hint else text
         
-        response = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.3,
-            max_tokens=500,
-            response_format={"type": "json_object"}
-        )
-        
-        # Parse the response
-        content = response.choices[0].message.content
-        if not content:
-            logger.warning("Empty response from OpenAI")
-            return None
-        
-        # Parse JSON response
+        # Request and parse the JSON response (recorded in LLM telemetry)
         try:
-            data = json.loads(content)
+            data = await chat_json(
+                client,
+                caller="news_processing",
+                feed=source_hint or None,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.3,
+                max_tokens=500
+            )
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse OpenAI JSON response: {e}")
-            logger.debug(f"Raw response: {content}")
+            return None
+        
+        if not data:
+            logger.warning("Empty response from OpenAI")
             return None
         
         # Validate and create result
@@ -0,0 +1,144 @@
+"""
+Change follower for API processes
+When ingestion runs in a separate worker, API processes never see save_event
+commits directly. The follower polls the event, tombstone and update-log
+watermarks and feeds new rows into the stream hub, the hot window and the
+result cache; rows edited in place (updated_events) replace their old copy in
+the hot window. Story memberships commit with their event, so they arrive with it.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import select, func
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import NewsEvent, DeletedEvent, UpdatedEvent, StoryMember
+from app.services.event_hub import hub, row_to_published_event
+from app.services.event_rows import select_event_rows
+from app.services.hot_window import hot_window
+from app.services.query_cache import bump_generation
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Maximum new rows fetched per query
+FOLLOW_BATCH_SIZE = 1000
+
+# Ids below the watermark that are checked again on every poll. With concurrent
+# writers (Postgres sequences) a lower id can commit after a higher one.
+FOLLOW_OVERLAP_IDS = 256
+
+
+class ChangeFollower:
+    """Polls the database for rows committed by other processes"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.event_id = 0
+        self.deleted_id = 0
+        self.updated_id = 0
+        # Ids already delivered within the overlap below the watermark
+        self._seen: set[int] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start following from the current watermarks"""
+        async with async_session_maker() as db:
+            self.event_id, self.deleted_id, self.updated_id = await self._watermarks(db)
+            # Rows already committed at start are not news
+            result = await db.execute(select(NewsEvent.id).where(NewsEvent.id > self.event_id - FOLLOW_OVERLAP_IDS))
+            self._seen = set(result.scalars().all())
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"👀 Change follower started at event {self.event_id} (every {self.interval}s)")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _watermarks(self, db) -> tuple[int, int, int]:
+        event_result = await db.execute(select(func.max(NewsEvent.id)))
+        deleted_result = await db.execute(select(func.max(DeletedEvent.id)))
+        updated_result = await db.execute(select(func.max(UpdatedEvent.id)))
+        return event_result.scalar() or 0, deleted_result.scalar() or 0, updated_result.scalar() or 0
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Change follower poll failed: {e}")
+
+    async def poll(self) -> bool:
+        """Pick up new, deleted and updated events. Returns True if anything changed."""
+        async with async_session_maker() as db:
+            max_deleted_id = (await db.execute(select(func.max(DeletedEvent.id)))).scalar() or 0
+            changed = False
+
+            # Ids in the overlap window and above that were not delivered yet
+            result = await db.execute(
+                select(NewsEvent.id).where(NewsEvent.id > self.event_id - FOLLOW_OVERLAP_IDS)
+            )
+            missing = sorted(set(result.scalars().all()) - self._seen)
+            for start in range(0, len(missing), FOLLOW_BATCH_SIZE):
+                batch = missing[start:start + FOLLOW_BATCH_SIZE]
+                result = await db.execute(
+                    select_event_rows().where(NewsEvent.id.in_(batch)).order_by(NewsEvent.id)
+                )
+                rows = result.all()
+                if not rows:
+                    continue
+                # Memberships commit with their event, so they are visible now too
+                result = await db.execute(
+                    select(StoryMember.event_id)
+                    .where(StoryMember.event_id.in_(batch), StoryMember.similarity.is_not(None))
+                )
+                story_members = set(result.scalars().all())
+                # Both consumers skip ids they already got from an in-process writer
+                hub.publish([row_to_published_event(row, row[0] in story_members) for row in rows])
+                if hot_window.ready:
+                    hot_window.append_rows(rows, story_members=story_members)
+                self._seen.update(row[0] for row in rows)
+                self.event_id = max(self.event_id, rows[-1][0])
+                changed = True
+            floor = self.event_id - FOLLOW_OVERLAP_IDS
+            self._seen = {event_id for event_id in self._seen if event_id > floor}
+
+            if max_deleted_id > self.deleted_id:
+                self.deleted_id = max_deleted_id
+                if hot_window.ready:
+                    await hot_window.refresh_totals()
+                changed = True
+
+            # Events edited in place - replace the copies the hot window holds
+            while True:
+                result = await db.execute(
+                    select(UpdatedEvent.id, UpdatedEvent.event_id)
+                    .where(UpdatedEvent.id > self.updated_id)
+                    .order_by(UpdatedEvent.id)
+                    .limit(FOLLOW_BATCH_SIZE)
+                )
+                log_rows = result.all()
+                if not log_rows:
+                    break
+                if hot_window.ready:
+                    result = await db.execute(
+                        select_event_rows().where(NewsEvent.id.in_({row.event_id for row in log_rows}))
+                    )
+                    hot_window.replace_rows(result.all())
+                self.updated_id = log_rows[-1].id
+                changed = True
+
+        if changed:
+            bump_generation()
+        return changed
+
+
+change_follower = ChangeFollower(interval=settings.change_poll_interval)
@@ -2,14 +2,19 @@
 Daily Recap Generator
 Generates AI-powered summaries of news events by source
 """
+import asyncio
+import dataclasses
+import json
 import logging
 from datetime import datetime, timedelta
 from typing import Optional
-from sqlalchemy import select, func
+from sqlalchemy import select, func, or_, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import NewsEvent
-from app.services.ai_processor import client as openai_client
+from app.services.ai_processor import get_openai_client
+from app.services.llm_telemetry import chat_json
+from app.services.recap_compaction import compact_for_prompt, merge_metadata
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -52,12 +57,46 @@ Return ONLY a JSON object with this structure:
 }"""
 
 
+RECAP_UPDATE_SYSTEM_PROMPT = RECAP_SYSTEM_PROMPT + """
+
+You will receive an EXISTING recap (JSON) together with only the NEW events that arrived since it was written.
+Update the existing recap: merge the new events into the relevant sections, add sections if needed,
+and revise the title, executive summary and insights only where the new events change the picture.
+Keep everything from the existing recap that is still relevant. Return the full updated recap in the same JSON structure."""
+
+CHUNK_SYSTEM_PROMPT = """You are an expert intelligence analyst. You receive one time-ordered slice of news events from a single source.
+Summarize the slice in HEBREW (עברית). Merge duplicate reports of the same incident and keep every distinct development.
+
+Return ONLY a JSON object with this structure:
+{
+  "period": "טווח הזמן של הפרוסה",
+  "highlights": ["ההתפתחות המשמעותית ביותר", "..."],
+  "sections": [
+    {
+      "heading": "כותרת נושא/אזור",
+      "items": ["פריט ראשון", "פריט שני"]
+    }
+  ]
+}"""
+
+MERGE_SYSTEM_PROMPT = """You are an expert intelligence analyst. You receive several partial summaries (JSON) of consecutive time slices from a single news source, in chronological order.
+Merge them into ONE partial summary in HEBREW (עברית): combine sections on the same theme/region, drop repetition, and keep every distinct development.
+
+Return ONLY a JSON object with the same structure as the inputs:
+{
+  "period": "טווח הזמן המשולב",
+  "highlights": ["..."],
+  "sections": [{"heading": "...", "items": ["..."]}]
+}"""
+
+
 async def get_events_by_source(
     db: AsyncSession,
     source_name: str,
-    hours: int = 24
+    hours: int = 24,
+    after_id: Optional[int] = None
 ) -> list[NewsEvent]:
-    """Get all events for a specific source within time range"""
+    """Get all events for a specific source within time range (optionally only ids above after_id)"""
     cutoff_time = datetime.utcnow() - timedelta(hours=hours)
     
     query = (
@@ -66,6 +105,8 @@ async def get_events_by_source(
         .where(NewsEvent.timestamp_detected >= cutoff_time)
         .order_by(NewsEvent.timestamp_detected.desc())
     )
+    if after_id is not None:
+        query = query.where(NewsEvent.id > after_id)
     
     result = await db.execute(query)
     return result.scalars().all()
@@ -98,6 +139,45 @@ async def get_available_sources(db: AsyncSession) -> list[dict]:
     return sources
 
 
+async def request_recap_json(
+    system_prompt: str,
+    user_message: str,
+    max_tokens: int = 2000,
+    caller: str = "recap",
+    source_name: Optional[str] = None
+) -> Optional[dict]:
+    """Call OpenAI with a recap prompt and parse the JSON reply"""
+    data = await chat_json(
+        get_openai_client(),
+        caller=caller,
+        feed=source_name,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ],
+        temperature=0.5,
+        max_tokens=max_tokens
+    )
+    if data is None:
+        logger.warning("Empty response from OpenAI")
+    return data
+
+
+def empty_recap(source_name: str, hours: int) -> dict:
+    """Recap returned when a source has no events in the time range"""
+    return {
+        "source_name": source_name,
+        "hours": hours,
+        "title": "לא נמצאו אירועים",
+        "executive_summary": f"לא נמצאו אירועים עבור {source_name} ב-{hours} השעות האחרונות.",
+        "sections": [],
+        "insights": None,
+        "total_events": 0,
+        "time_range": f"{hours} שעות אחרונות",
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+
 async def generate_daily_recap(
     db: AsyncSession,
     source_name: str,
@@ -105,77 +185,60 @@ async def generate_daily_recap(
 ) -> Optional[dict]:
     """Generate AI-powered daily recap for a specific source"""
     
-    if not openai_client:
+    if not get_openai_client():
         logger.warning("OpenAI client not configured")
         return None
     
+    # Large windows go through the chunked map-reduce pipeline
+    cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+    count_query = (
+        select(func.count(NewsEvent.id))
+        .where(NewsEvent.source_name == source_name)
+        .where(NewsEvent.timestamp_detected >= cutoff_time)
+    )
+    event_count = (await db.execute(count_query)).scalar() or 0
+    
+    if event_count > settings.recap_chunk_size:
+        recap_data = await generate_chunked_recap(db, source_name, hours, event_count)
+        if recap_data is None:
+            return None
+        recap_data["source_name"] = source_name
+        recap_data["hours"] = hours
+        recap_data["generated_at"] = datetime.utcnow().isoformat()
+        recap_data["total_events"] = event_count
+        return recap_data
+    
     # Get events for this source
     events = await get_events_by_source(db, source_name, hours)
     
     if not events:
         logger.info(f"No events found for {source_name} in last {hours} hours")
-        return {
-            "source_name": source_name,
-            "hours": hours,
-            "title": "לא נמצאו אירועים",
-            "executive_summary": f"לא נמצאו אירועים עבור {source_name} ב-{hours} השעות האחרונות.",
-            "sections": [],
-            "insights": None,
-            "total_events": 0,
-            "time_range": f"{hours} שעות אחרונות",
-            "generated_at": datetime.utcnow().isoformat()
-        }
-    
-    # Prepare events summary for AI
-    events_text = []
-    for i, event in enumerate(events, 1):
-        event_summary = f"{i}. "
-        if event.original_title:
-            event_summary += f"{event.original_title} - "
-        event_summary += f"{event.summary_text}"
-        if event.location_name:
-            event_summary += f" ({event.location_name})"
-        event_summary += f" [קטגוריה: {event.category}]"
-        events_text.append(event_summary)
-    
-    events_combined = "\n".join(events_text)
+        return empty_recap(source_name, hours)
+    
+    compacted = compact_for_prompt(events)
     
     user_message = f"""מקור: {source_name}
 טווח זמן: {hours} שעות אחרונות
 מספר אירועים: {len(events)}
 
-אירועים לסיכום:
-{events_combined}
+אירועים לסיכום (דיווחים כפולים על אותו אירוע אוחדו):
+{compacted.text}
 
 אנא צור סיכום יומי מקיף בעברית."""
     
     try:
-        response = await openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": RECAP_SYSTEM_PROMPT},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.5,
-            max_tokens=2000,
-            response_format={"type": "json_object"}
-        )
-        
-        content = response.choices[0].message.content
-        if not content:
-            logger.warning("Empty response from OpenAI")
+        recap_data = await request_recap_json(RECAP_SYSTEM_PROMPT, user_message, source_name=source_name)
+        if recap_data is None:
             return None
         
-        import json
-        recap_data = json.loads(content)
-        
         # Add metadata
         recap_data["source_name"] = source_name
         recap_data["hours"] = hours
         recap_data["generated_at"] = datetime.utcnow().isoformat()
         recap_data["total_events"] = len(events)
+        recap_data["compaction"] = compacted.metadata()
         
-        logger.info(f"Generated recap for {source_name}: {len(events)} events")
+        logger.info(f"Generated recap for {source_name}: {len(events)} events in {compacted.groups} groups")
         return recap_data
         
     except Exception as e:
@@ -183,6 +246,241 @@ async def generate_daily_recap(
         return None
 
 
+async def _summarize_chunk(source_name: str, chunk_text: str, event_count: int, period: str) -> Optional[dict]:
+    """Map step: summarize one time-ordered chunk of events"""
+    user_message = f"""מקור: {source_name}
+טווח זמן: {period}
+מספר אירועים: {event_count}
+
+אירועים:
+{chunk_text}"""
+    try:
+        return await request_recap_json(
+            CHUNK_SYSTEM_PROMPT,
+            user_message,
+            max_tokens=settings.recap_chunk_max_tokens,
+            caller="recap_chunk",
+            source_name=source_name
+        )
+    except Exception as e:
+        logger.error(f"Error summarizing recap chunk for {source_name}: {e}")
+        return None
+
+
+async def _merge_partials(source_name: str, hours: int, partials: list[dict], total_events: int, final: bool) -> Optional[dict]:
+    """Reduce step: merge partial summaries (into the final recap structure when final)"""
+    partials_text = "\n\n".join(
+        f"סיכום חלקי {i}:\n{json.dumps(partial, ensure_ascii=False)}"
+        for i, partial in enumerate(partials, 1)
+    )
+    user_message = f"""מקור: {source_name}
+טווח זמן: {hours} שעות אחרונות
+מספר אירועים: {total_events}
+
+{partials_text}"""
+    if final:
+        user_message += "\n\nאנא צור סיכום יומי מקיף בעברית על בסיס הסיכומים החלקיים."
+    
+    system_prompt = RECAP_SYSTEM_PROMPT if final else MERGE_SYSTEM_PROMPT
+    max_tokens = 2000 if final else settings.recap_chunk_max_tokens
+    try:
+        return await request_recap_json(
+            system_prompt,
+            user_message,
+            max_tokens=max_tokens,
+            caller="recap" if final else "recap_merge",
+            source_name=source_name
+        )
+    except Exception as e:
+        logger.error(f"Error merging recap summaries for {source_name}: {e}")
+        return None
+
+
+async def generate_chunked_recap(
+    db: AsyncSession,
+    source_name: str,
+    hours: int,
+    total_events: int
+) -> Optional[dict]:
+    """
+    Map-reduce recap for large event sets:
+    read events in time-ordered keyset pages, summarize the chunks concurrently,
+    then merge the partial summaries level by level into the final recap
+    """
+    chunk_size = settings.recap_chunk_size
+    fan_in = settings.recap_merge_fan_in
+    semaphore = asyncio.Semaphore(settings.recap_max_concurrency)
+    cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+    
+    async def limited(coro):
+        async with semaphore:
+            return await coro
+    
+    async def summarize_and_release(chunk_text: str, event_count: int, period: str):
+        try:
+            return await _summarize_chunk(source_name, chunk_text, event_count, period)
+        finally:
+            semaphore.release()
+    
+    # Only the prompt and grouping fields are read, as plain rows
+    query = (
+        select(
+            NewsEvent.id,
+            NewsEvent.original_title,
+            NewsEvent.summary_text,
+            NewsEvent.location_name,
+            NewsEvent.latitude,
+            NewsEvent.longitude,
+            NewsEvent.category,
+            NewsEvent.timestamp_detected
+        )
+        .where(NewsEvent.source_name == source_name)
+        .where(NewsEvent.timestamp_detected >= cutoff_time)
+        .order_by(NewsEvent.timestamp_detected, NewsEvent.id)
+        .limit(chunk_size)
+    )
+    
+    async def read_chunk(after: Optional[tuple[datetime, int]]) -> list:
+        # Keyset pages, each read to the end - no cursor (and on SQLite no read lock)
+        # stays open while we wait for a free LLM slot
+        page = query
+        if after is not None:
+            last_timestamp, last_id = after
+            page = page.where(or_(
+                NewsEvent.timestamp_detected > last_timestamp,
+                and_(NewsEvent.timestamp_detected == last_timestamp, NewsEvent.id > last_id)
+            ))
+        return (await db.execute(page)).all()
+    
+    # Map - reading the next chunk waits for a free slot, so memory stays bounded
+    tasks = []
+    periods = []
+    # Compaction statistics only - the chunk texts are released once summarized
+    compaction_stats = []
+    try:
+        after = None
+        while chunk := await read_chunk(after):
+            after = (chunk[-1].timestamp_detected, chunk[-1].id)
+            period = f"{chunk[0].timestamp_detected:%d/%m %H:%M} - {chunk[-1].timestamp_detected:%d/%m %H:%M}"
+            compacted = compact_for_prompt(chunk)
+            compaction_stats.append(dataclasses.replace(compacted, text=""))
+            periods.append(period)
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(summarize_and_release(compacted.text, len(chunk), period)))
+            if len(chunk) < chunk_size:
+                break
+        
+        chunk_count = len(tasks)
+        # Each partial with the chunk periods it covers - failures are recorded, not silently dropped
+        missing_periods = []
+        partials = []
+        for summary, period in zip(await asyncio.gather(*tasks), periods):
+            if summary:
+                partials.append((summary, [period]))
+            else:
+                missing_periods.append(period)
+        
+        # Reduce - merge groups of fan_in summaries until one final merge remains
+        levels = 1
+        while len(partials) > fan_in:
+            groups = [partials[i:i + fan_in] for i in range(0, len(partials), fan_in)]
+            tasks = [
+                asyncio.create_task(limited(_merge_partials(
+                    source_name, hours, [summary for summary, _ in group], total_events, final=False
+                )))
+                for group in groups
+            ]
+            merged = []
+            for summary, group in zip(await asyncio.gather(*tasks), groups):
+                covered = [period for _, group_periods in group for period in group_periods]
+                if summary:
+                    merged.append((summary, covered))
+                else:
+                    missing_periods.extend(covered)
+            partials = merged
+            levels += 1
+    except BaseException:
+        # A failed or cancelled recap must not leave summaries running
+        for task in tasks:
+            task.cancel()
+        raise
+    
+    if not partials:
+        logger.error(f"Chunked recap for {source_name} failed: no chunk or merge summary succeeded")
+        return None
+    
+    recap_data = await _merge_partials(
+        source_name, hours, [summary for summary, _ in partials], total_events, final=True
+    )
+    if recap_data is None:
+        return None
+    
+    recap_data["chunks"] = chunk_count
+    recap_data["merge_levels"] = levels
+    recap_data["compaction"] = merge_metadata(compaction_stats)
+    if missing_periods:
+        # Not stored for reuse (see recap_store) - the next request tries again
+        recap_data["partial"] = True
+        recap_data["missing_periods"] = missing_periods
+        logger.warning(
+            f"Chunked recap for {source_name} is missing {len(missing_periods)} of {chunk_count} chunk periods"
+        )
+    logger.info(f"Generated chunked recap for {source_name}: {total_events} events in {chunk_count} chunks, {levels} merge levels")
+    return recap_data
+
+
+async def update_daily_recap(
+    source_name: str,
+    hours: int,
+    previous_recap: dict,
+    new_events: list[NewsEvent],
+    total_events: int
+) -> Optional[dict]:
+    """Refresh an existing recap with only the events that arrived since it was generated"""
+    
+    if not get_openai_client():
+        logger.warning("OpenAI client not configured")
+        return None
+    
+    previous = {key: previous_recap.get(key) for key in ("title", "executive_summary", "sections", "insights")}
+    compacted = compact_for_prompt(new_events)
+    
+    user_message = f"""מקור: {source_name}
+טווח זמן: {hours} שעות אחרונות
+מספר אירועים כולל: {total_events}
+
+סיכום קיים (JSON):
+{json.dumps(previous, ensure_ascii=False)}
+
+אירועים חדשים מאז הסיכום הקיים:
+{compacted.text}
+
+אנא עדכן את הסיכום הקיים כך שישלב את האירועים החדשים, באותו מבנה JSON."""
+    
+    try:
+        recap_data = await request_recap_json(
+            RECAP_UPDATE_SYSTEM_PROMPT,
+            user_message,
+            caller="recap_update",
+            source_name=source_name
+        )
+        if recap_data is None:
+            return None
+        
+        recap_data["source_name"] = source_name
+        recap_data["hours"] = hours
+        recap_data["generated_at"] = datetime.utcnow().isoformat()
+        recap_data["total_events"] = total_events
+        recap_data["compaction"] = compacted.metadata()
+        
+        logger.info(f"Updated recap for {source_name}: {len(new_events)} new events")
+        return recap_data
+        
+    except Exception as e:
+        logger.error(f"Error updating recap for {source_name}: {e}")
+        return None
+
+
 async def test_recap_generator():
     """Test function for development"""
     from app.database import async_session_maker
@@ -209,6 +507,5 @@ async def test_recap_generator():
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(test_recap_generator())
 
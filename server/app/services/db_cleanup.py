@@ -2,17 +2,27 @@
 Database cleanup service to maintain data retention policy
 """
 import logging
+import time
 from datetime import datetime, timedelta
-from sqlalchemy import select, delete
+from typing import Optional
+from sqlalchemy import select, delete, insert, literal, func, case, DateTime
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import NewsEvent
+from app.models import NewsEvent, DeletedEvent, UpdatedEvent, Story, StoryMember
 from app.database import async_session_maker
 from app.config import get_settings
+from app.services.hot_window import hot_window
+from app.services.query_cache import bump_generation
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Tombstones and update log entries must outlive the longest /api/events window (168 hours)
+TOMBSTONE_RETENTION = timedelta(days=8)
+
+# Seconds /api/admin/stats reuses computed statistics (the counts scan the table)
+STATS_CACHE_SECONDS = 60
+
 
 async def cleanup_old_events():
     """
@@ -25,23 +35,56 @@ async def cleanup_old_events():
         
         async with async_session_maker() as db:
             # Count events to be deleted
-            count_query = select(NewsEvent).where(
+            count_query = select(func.count(NewsEvent.id)).where(
                 NewsEvent.timestamp_detected < cutoff_date
             )
             result = await db.execute(count_query)
-            events_to_delete = len(result.scalars().all())
+            events_to_delete = result.scalar() or 0
             
             if events_to_delete > 0:
+                # Record tombstones so delta sync clients can drop these events
+                tombstone_query = insert(DeletedEvent).from_select(
+                    ["event_id", "deleted_at"],
+                    select(NewsEvent.id, literal(datetime.utcnow(), DateTime)).where(
+                        NewsEvent.timestamp_detected < cutoff_date
+                    ).order_by(NewsEvent.id)
+                )
+                await db.execute(tombstone_query)
+                
+                # Story memberships of the deleted events, then stories with no recent report
+                await db.execute(
+                    delete(StoryMember).where(
+                        StoryMember.event_id.in_(select(NewsEvent.id).where(NewsEvent.timestamp_detected < cutoff_date))
+                    )
+                )
+                await db.execute(delete(Story).where(Story.last_seen < cutoff_date))
+                
                 # Delete old events
                 delete_query = delete(NewsEvent).where(
                     NewsEvent.timestamp_detected < cutoff_date
                 )
                 await db.execute(delete_query)
                 await db.commit()
+                bump_generation()
+                if hot_window.ready:
+                    await hot_window.refresh_totals()
                 
                 logger.info(f"🗑️  Database cleanup: Deleted {events_to_delete} events older than {retention_days} days")
             else:
                 logger.info(f"✅ Database cleanup: No events older than {retention_days} days found")
+            
+            # Expire tombstones and update log entries nobody can still need
+            await db.execute(
+                delete(DeletedEvent).where(
+                    DeletedEvent.deleted_at < datetime.utcnow() - TOMBSTONE_RETENTION
+                )
+            )
+            await db.execute(
+                delete(UpdatedEvent).where(
+                    UpdatedEvent.updated_at < datetime.utcnow() - TOMBSTONE_RETENTION
+                )
+            )
+            await db.commit()
                 
     except Exception as e:
         logger.error(f"❌ Error during database cleanup: {e}")
@@ -54,28 +97,22 @@ async def get_database_stats():
     """
     try:
         async with async_session_maker() as db:
-            # Total events
-            total_query = select(NewsEvent)
-            total_result = await db.execute(total_query)
-            total_events = len(total_result.scalars().all())
-            
-            # Events by age
+            # Total and events by age in a single pass, counted by the database
             now = datetime.utcnow()
             day_ago = now - timedelta(days=1)
             week_ago = now - timedelta(days=7)
             month_ago = now - timedelta(days=30)
             
-            day_query = select(NewsEvent).where(NewsEvent.timestamp_detected >= day_ago)
-            day_result = await db.execute(day_query)
-            day_events = len(day_result.scalars().all())
-            
-            week_query = select(NewsEvent).where(NewsEvent.timestamp_detected >= week_ago)
-            week_result = await db.execute(week_query)
-            week_events = len(week_result.scalars().all())
+            def count_since(since: datetime):
+                return func.coalesce(func.sum(case((NewsEvent.timestamp_detected >= since, 1), else_=0)), 0)
             
-            month_query = select(NewsEvent).where(NewsEvent.timestamp_detected >= month_ago)
-            month_result = await db.execute(month_query)
-            month_events = len(month_result.scalars().all())
+            counts_query = select(
+                func.count(NewsEvent.id),
+                count_since(day_ago),
+                count_since(week_ago),
+                count_since(month_ago),
+            )
+            total_events, day_events, week_events, month_events = (await db.execute(counts_query)).one()
             
             stats = {
                 "total_events": total_events,
@@ -92,3 +129,18 @@ async def get_database_stats():
         logger.error(f"❌ Error getting database stats: {e}")
         return None
 
+
+_stats_cache: Optional[tuple[float, dict]] = None
+
+
+async def get_cached_database_stats(refresh: bool = False) -> Optional[dict]:
+    """Database statistics, recomputed at most every STATS_CACHE_SECONDS unless refresh is set"""
+    global _stats_cache
+    if not refresh and _stats_cache is not None and time.monotonic() - _stats_cache[0] < STATS_CACHE_SECONDS:
+        return {**_stats_cache[1], "age_seconds": round(time.monotonic() - _stats_cache[0], 1)}
+    
+    stats = await get_database_stats()
+    if stats is not None:
+        _stats_cache = (time.monotonic(), stats)
+        stats = {**stats, "age_seconds": 0.0}
+    return stats
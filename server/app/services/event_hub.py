@@ -0,0 +1,148 @@
+"""
+In-process broadcast hub for newly persisted events
+The ingestion writer publishes events after commit; stream subscribers wait
+on a shared wakeup signal, so idle connections cost one sleeping coroutine each
+"""
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from app.models import NewsEvent
+from app.services.event_rows import EVENT_FIELDS, dumps
+
+logger = logging.getLogger(__name__)
+
+# Number of recent events kept in memory for Last-Event-ID resume
+HUB_BUFFER_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class PublishedEvent:
+    """An event serialized once at publish time and shared by all subscribers"""
+    id: int
+    category: str
+    source_name: str
+    latitude: Optional[float]
+    longitude: Optional[float]
+    data: str  # JSON encoded NewsEventResponse
+    story_member: bool = False  # A later report of a story another event opened
+
+    def matches(
+        self,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+        bbox: Optional[tuple[float, float, float, float]] = None,
+        collapse_stories: bool = False
+    ) -> bool:
+        """Apply the same filters as /api/events"""
+        if collapse_stories and self.story_member:
+            return False
+        if category and self.category != category:
+            return False
+        if source and source not in self.source_name.lower():
+            return False
+        if bbox:
+            if self.latitude is None or self.longitude is None:
+                return False
+            min_lon, min_lat, max_lon, max_lat = bbox
+            if not (min_lat <= self.latitude <= max_lat and min_lon <= self.longitude <= max_lon):
+                return False
+        return True
+
+
+def row_to_published_event(row, story_member: bool = False) -> PublishedEvent:
+    """Serialize an event row (EVENT_FIELDS order) for broadcasting"""
+    payload = dict(zip(EVENT_FIELDS, row))
+    return PublishedEvent(
+        id=payload["id"],
+        category=payload["category"],
+        source_name=payload["source_name"],
+        latitude=payload["latitude"],
+        longitude=payload["longitude"],
+        data=dumps(payload).decode(),
+        story_member=story_member,
+    )
+
+
+def to_published_event(event: NewsEvent, story_member: bool = False) -> PublishedEvent:
+    """Serialize an ORM event for broadcasting"""
+    return row_to_published_event(tuple(getattr(event, f) for f in EVENT_FIELDS), story_member)
+
+
+class EventHub:
+    """
+    Fan-out of new events to any number of waiting subscribers.
+    The buffer is kept in arrival order with a sequence number per event, so an
+    event that commits after one with a higher id (concurrent writers) is still
+    delivered; subscribers follow the sequence, not the event id.
+    """
+
+    def __init__(self, buffer_size: int = HUB_BUFFER_SIZE):
+        self._buffer: deque[tuple[int, PublishedEvent]] = deque()
+        self._buffer_size = buffer_size
+        self._ids: set[int] = set()
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self.last_id: Optional[int] = None
+        self.subscribers = 0
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def publish(self, events: list[PublishedEvent]):
+        """Add events to the buffer and wake up every subscriber"""
+        # Events can reach the hub twice (writer in this process + change follower)
+        events = [e for e in events if e.id not in self._ids]
+        if not events:
+            return
+        for event in sorted(events, key=lambda e: e.id):
+            if len(self._buffer) >= self._buffer_size:
+                _, dropped = self._buffer.popleft()
+                self._ids.discard(dropped.id)
+            self._seq += 1
+            self._buffer.append((self._seq, event))
+            self._ids.add(event.id)
+            self.last_id = max(self.last_id or 0, event.id)
+        # Swap the signal so waiters woken now don't see it set on their next wait
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
+
+    def events_since(self, seq: int) -> tuple[Optional[list[PublishedEvent]], int]:
+        """
+        Get events published after sequence number seq, with the new position.
+        Returns (None, seq) if some of them may already have left the buffer.
+        """
+        if seq >= self._seq:
+            return [], seq
+        if not self._buffer or seq < self._buffer[0][0] - 1:
+            return None, seq
+        return [event for event_seq, event in self._buffer if event_seq > seq], self._seq
+
+    def signal(self) -> asyncio.Event:
+        """
+        The event the next publish sets. Take it before reading the buffer and
+        wait on it, so a publish in between is not missed.
+        """
+        return self._wakeup
+
+    async def wait(self, timeout: float, signal: Optional[asyncio.Event] = None) -> bool:
+        """Wait for the next publish (or the one `signal` was taken for). Returns False on timeout."""
+        try:
+            await asyncio.wait_for((signal or self._wakeup).wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+hub = EventHub()
+
+
+def publish_events(events: list[NewsEvent], story_members: set[int] = frozenset()):
+    """Broadcast freshly committed events (story_members: ids that joined an existing story)"""
+    try:
+        hub.publish([to_published_event(e, e.id in story_members) for e in events])
+    except Exception as e:
+        logger.error(f"Failed to publish events to stream hub: {e}")
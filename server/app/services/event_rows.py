@@ -0,0 +1,57 @@
+"""
+ORM-free read path for list endpoints
+Selects plain Core rows and encodes them straight to JSON bytes with orjson,
+skipping ORM hydration and Pydantic validation
+"""
+from typing import Any, Iterable, Sequence
+
+import orjson
+from sqlalchemy import select, Select
+
+from app.models import NewsEvent
+
+# Columns of NewsEventResponse, in response field order
+EVENT_FIELDS = (
+    "id",
+    "source_name",
+    "original_url",
+    "original_title",
+    "original_text",
+    "summary_text",
+    "location_name",
+    "latitude",
+    "longitude",
+    "category",
+    "confidence_score",
+    "image_url",
+    "timestamp_detected",
+    "timestamp_original",
+)
+
+EVENT_COLUMNS = tuple(NewsEvent.__table__.c[name] for name in EVENT_FIELDS)
+
+
+def select_event_rows() -> Select:
+    """Core select of every NewsEventResponse column"""
+    return select(*EVENT_COLUMNS)
+
+
+def rows_to_dicts(rows: Iterable[Sequence[Any]]) -> list[dict]:
+    """Zip raw row tuples with the response field names"""
+    fields = EVENT_FIELDS
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def dumps(payload: Any) -> bytes:
+    """Encode a payload of plain values (datetimes included) to JSON bytes"""
+    return orjson.dumps(payload)
+
+
+def encode_events_list(rows: Iterable[Sequence[Any]], total: int, filtered_hours: int) -> bytes:
+    """Encode rows as a NewsEventsListResponse body"""
+    return orjson.dumps({
+        "events": rows_to_dicts(rows),
+        "total": total,
+        "filtered_hours": filtered_hours,
+    })
+
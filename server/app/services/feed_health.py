@@ -0,0 +1,180 @@
+"""
+Per-feed health and performance stats
+The ingestion pipeline fills a FeedSample for every feed in every cycle;
+samples are folded into the feed_health row as totals and exponentially
+weighted averages, so slow, failing and dead feeds stand out.
+"""
+import json
+import logging
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.database import async_session_maker
+from app.feeds_config import get_all_feeds
+from app.models import FeedHealth
+from app.services.parse_pool import FetchResult
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the rolling averages
+EWMA_ALPHA = 0.2
+
+
+@dataclass
+class FeedSample:
+    """Everything measured for one feed during one cycle"""
+    source_name: str
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    status: Optional[int] = None
+    dns_ms: Optional[float] = None
+    connect_ms: Optional[float] = None
+    ttfb_ms: Optional[float] = None
+    download_ms: Optional[float] = None
+    bytes: Optional[int] = None
+    redirects: int = 0
+    parse_ms: Optional[float] = None
+    entries_seen: int = 0
+    new_entries: int = 0  # Newer than the last scrape
+    duplicates: int = 0  # New entries that were already stored
+    failed_entries: int = 0  # Entries skipped after an enrich or persist error
+    saved: int = 0
+    enrich_ms: float = 0.0
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def duplicate_ratio(self) -> float:
+        return self.duplicates / self.new_entries if self.new_entries else 0.0
+
+    def add_fetch(self, result: FetchResult):
+        self.status = result.status
+        self.dns_ms = result.dns_ms
+        self.connect_ms = result.connect_ms
+        self.ttfb_ms = result.ttfb_ms
+        self.download_ms = result.download_ms
+        self.bytes = len(result.data)
+        self.redirects = result.redirects
+
+
+def _ewma(previous: Optional[float], value: Optional[float]) -> Optional[float]:
+    if value is None:
+        return previous
+    if previous is None:
+        return float(value)
+    return previous + EWMA_ALPHA * (value - previous)
+
+
+async def record_feed_sample(sample: FeedSample):
+    """Fold a cycle's sample into the feed's health row"""
+    async with async_session_maker() as db:
+        result = await db.execute(select(FeedHealth).where(FeedHealth.source_name == sample.source_name))
+        health = result.scalar_one_or_none()
+        if health is None:
+            health = FeedHealth(
+                source_name=sample.source_name,
+                fetches=0, failures=0, consecutive_failures=0,
+                entries_seen_total=0, new_entries_total=0, saved_total=0
+            )
+            db.add(health)
+
+        health.fetches += 1
+        health.last_fetch_at = sample.started_at
+        health.last_status = sample.status
+        health.last_sample_json = json.dumps(
+            {**asdict(sample), "started_at": sample.started_at.isoformat(), "duplicate_ratio": sample.duplicate_ratio}
+        )
+
+        if sample.error:
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.last_error = sample.error
+            health.last_error_at = sample.started_at
+        else:
+            health.consecutive_failures = 0
+            health.last_success_at = sample.started_at
+            health.entries_seen_total += sample.entries_seen
+            health.new_entries_total += sample.new_entries
+            health.saved_total += sample.saved
+            health.avg_entries_seen = _ewma(health.avg_entries_seen, sample.entries_seen)
+            health.avg_new_entries = _ewma(health.avg_new_entries, sample.new_entries)
+            health.avg_duplicate_ratio = _ewma(health.avg_duplicate_ratio, sample.duplicate_ratio)
+            health.avg_parse_ms = _ewma(health.avg_parse_ms, sample.parse_ms)
+            health.avg_enrich_ms = _ewma(health.avg_enrich_ms, sample.enrich_ms)
+            health.avg_bytes = _ewma(health.avg_bytes, sample.bytes)
+
+        # Network and total timings also count for failed fetches (timeouts are what we're after)
+        health.avg_dns_ms = _ewma(health.avg_dns_ms, sample.dns_ms)
+        health.avg_connect_ms = _ewma(health.avg_connect_ms, sample.connect_ms)
+        health.avg_ttfb_ms = _ewma(health.avg_ttfb_ms, sample.ttfb_ms)
+        health.avg_download_ms = _ewma(health.avg_download_ms, sample.download_ms)
+        health.avg_duration_ms = _ewma(health.avg_duration_ms, sample.duration_ms)
+        await db.commit()
+
+
+def _round(value: Optional[float], digits: int = 1) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+async def get_feed_health() -> list[dict]:
+    """Health of every configured feed, slowest first"""
+    async with async_session_maker() as db:
+        result = await db.execute(select(FeedHealth))
+        rows = {row.source_name: row for row in result.scalars().all()}
+
+    feeds = []
+    for feed in get_all_feeds():
+        row = rows.pop(feed["name"], None)
+        feeds.append(_health_to_dict(feed["name"], row, configured=True))
+    # Feeds removed from the configuration but still on record
+    for name, row in rows.items():
+        feeds.append(_health_to_dict(name, row, configured=False))
+
+    feeds.sort(key=lambda item: item["avg_duration_ms"] or 0, reverse=True)
+    return feeds
+
+
+def _health_to_dict(name: str, row: Optional[FeedHealth], configured: bool) -> dict:
+    if row is None:
+        return {"source_name": name, "configured": configured, "status": "never_fetched", "fetches": 0, "avg_duration_ms": None}
+
+    if row.consecutive_failures >= 3:
+        status = "failing"
+    elif row.consecutive_failures:
+        status = "degraded"
+    elif row.avg_entries_seen == 0:
+        status = "empty"
+    else:
+        status = "healthy"
+
+    return {
+        "source_name": name,
+        "configured": configured,
+        "status": status,
+        "fetches": row.fetches,
+        "failures": row.failures,
+        "error_rate": _round(row.failures / row.fetches, 3) if row.fetches else None,
+        "consecutive_failures": row.consecutive_failures,
+        "last_fetch_at": row.last_fetch_at.isoformat() if row.last_fetch_at else None,
+        "last_success_at": row.last_success_at.isoformat() if row.last_success_at else None,
+        "last_status": row.last_status,
+        "last_error": row.last_error,
+        "last_error_at": row.last_error_at.isoformat() if row.last_error_at else None,
+        "entries_seen_total": row.entries_seen_total,
+        "new_entries_total": row.new_entries_total,
+        "saved_total": row.saved_total,
+        "avg_dns_ms": _round(row.avg_dns_ms),
+        "avg_connect_ms": _round(row.avg_connect_ms),
+        "avg_ttfb_ms": _round(row.avg_ttfb_ms),
+        "avg_download_ms": _round(row.avg_download_ms),
+        "avg_bytes": _round(row.avg_bytes, 0),
+        "avg_parse_ms": _round(row.avg_parse_ms),
+        "avg_enrich_ms": _round(row.avg_enrich_ms),
+        "avg_duration_ms": _round(row.avg_duration_ms),
+        "avg_entries_seen": _round(row.avg_entries_seen),
+        "avg_new_entries": _round(row.avg_new_entries),
+        "avg_duplicate_ratio": _round(row.avg_duplicate_ratio, 3),
+        "last_sample": json.loads(row.last_sample_json) if row.last_sample_json else None,
+    }
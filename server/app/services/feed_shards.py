@@ -0,0 +1,75 @@
+"""
+Feed sharding across ingestion workers
+Every worker keeps a heartbeat lease ("worker:<id>") and claims its fair share
+of feeds through per-feed leases ("feed:<name>") at the start of each scrape cycle.
+A feed lease lasts one scrape interval plus a grace period, so a feed only
+changes hands once its previous holder's cycle is over - whether the holder
+gave it up (a worker joined) or stopped renewing it (a worker died).
+"""
+import logging
+import math
+import zlib
+
+from app.config import get_settings
+from app.services.leases import INSTANCE_ID, try_acquire_lease, release_lease, get_active_leases
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+WORKER_LEASE_PREFIX = "worker:"
+FEED_LEASE_PREFIX = "feed:"
+
+
+def feed_lease_name(feed_name: str) -> str:
+    return f"{FEED_LEASE_PREFIX}{feed_name}"
+
+
+def feed_lease_seconds() -> int:
+    return settings.rss_scrape_interval + settings.feed_lease_grace_seconds
+
+
+def worker_lease_name(holder: str = INSTANCE_ID) -> str:
+    return f"{WORKER_LEASE_PREFIX}{holder}"
+
+
+async def send_heartbeat(holder: str = INSTANCE_ID) -> bool:
+    """Announce this worker as alive (counts towards the fair share)"""
+    return await try_acquire_lease(worker_lease_name(holder), settings.leader_lease_seconds, holder)
+
+
+async def stop_heartbeat(holder: str = INSTANCE_ID):
+    """Leave the worker pool - feed leases are left to expire so nothing is scraped twice"""
+    await release_lease(worker_lease_name(holder), holder)
+
+
+async def claim_feeds(feeds: list[dict], holder: str = INSTANCE_ID) -> list[dict]:
+    """Renew and claim feed leases up to this worker's fair share. Returns the feeds to scrape."""
+    workers = await get_active_leases(WORKER_LEASE_PREFIX)
+    if worker_lease_name(holder) not in workers:
+        await send_heartbeat(holder)
+        workers[worker_lease_name(holder)] = holder
+    share = math.ceil(len(feeds) / len(workers))
+
+    holders = await get_active_leases(FEED_LEASE_PREFIX)
+    owned = [f for f in feeds if holders.get(feed_lease_name(f["name"])) == holder]
+    # Feeds nobody holds, rotated per worker so workers don't all race for the same ones
+    free = [f for f in feeds if feed_lease_name(f["name"]) not in holders]
+    if free:
+        start = zlib.crc32(holder.encode()) % len(free)
+        free = free[start:] + free[:start]
+
+    ttl = feed_lease_seconds()
+    claimed = []
+    # Keep our own feeds first; anything above the fair share is left to expire
+    for feed in owned[:share] + free:
+        if len(claimed) >= share:
+            break
+        if await try_acquire_lease(feed_lease_name(feed["name"]), ttl, holder):
+            claimed.append(feed)
+
+    dropped = len(owned) - len([f for f in claimed if f in owned])
+    logger.info(
+        f"🧩 Feed shard: {len(claimed)}/{len(feeds)} feeds claimed "
+        f"({len(workers)} workers, fair share {share}, {dropped} handed off)"
+    )
+    return claimed
@@ -0,0 +1,64 @@
+"""
+Readiness checks for platform health probes
+Constant time regardless of data volume: one aggregate over feed_health (a row
+per feed) proves the database answers and gives the last successful scrape,
+the rest is in-process state. Detailed statistics live in /api/admin/stats.
+"""
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import select, func
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import FeedHealth
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Monotonic time the process started - a fresh deploy gets a grace period before its first scrape
+STARTED_AT = time.monotonic()
+
+
+def _background_checks() -> tuple[bool, dict]:
+    """Scheduler (ingesting roles) and change follower (serving roles) state"""
+    ok = True
+    checks = {}
+    if settings.app_role in ("all", "worker"):
+        from app.services.scheduler import scheduler_state
+        state = scheduler_state()
+        checks["scheduler"] = {**state, "status": "ok" if state["running"] and state["lease_loop"] else "stopped"}
+        ok = ok and checks["scheduler"]["status"] == "ok"
+    if settings.app_role in ("all", "api"):
+        from app.services.change_follower import change_follower
+        checks["change_follower"] = "ok" if change_follower.running else "stopped"
+        ok = ok and change_follower.running
+    return ok, checks
+
+
+async def check_readiness() -> tuple[bool, dict]:
+    """Returns (ready, checks)"""
+    ready, checks = _background_checks()
+
+    try:
+        async with async_session_maker() as db:
+            last_success = (await db.execute(select(func.max(FeedHealth.last_success_at)))).scalar()
+        checks["database"] = "ok"
+    except Exception as e:
+        logger.warning(f"⚠️  Readiness check: database unavailable: {e}")
+        checks["database"] = f"error: {type(e).__name__}"
+        return False, checks
+
+    max_age = settings.health_max_scrape_age
+    age = (datetime.utcnow() - last_success).total_seconds() if last_success else None
+    uptime = time.monotonic() - STARTED_AT
+    stale = max_age > 0 and (age is None or age > max_age) and uptime > max_age
+    # Only roles that run the scheduler can fix a stale scrape - API-only processes still serve reads
+    scrapes_here = settings.app_role in ("all", "worker")
+    checks["last_scrape"] = {
+        "status": ("stale" if scrapes_here else "degraded") if stale else "ok",
+        "age_seconds": round(age) if age is not None else None,
+        "max_age_seconds": max_age,
+    }
+    return ready and not (stale and scrapes_here), checks
@@ -0,0 +1,160 @@
+"""
+Event density grids for the map heat layer
+Coordinates and timestamps are loaded as NumPy arrays (from the hot window
+when it covers the range, otherwise one narrow query) and binned with
+histogram2d / histogramdd. Only non-empty cells are returned.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import NewsEvent
+from app.services.hot_window import hot_window, to_epoch
+
+# Grid cells along the longer side of the bounding box
+DEFAULT_RESOLUTION = 64
+MAX_RESOLUTION = 256
+
+# Padding around the data extent when no bbox is given (degrees)
+EXTENT_PADDING = 0.05
+
+# Requested bboxes are widened to this grid (degrees) so panning by a few
+# pixels reuses the cached grid
+BBOX_SNAP = 0.01
+
+# Upper bound on hours x rows x cols for frames (8 MB of float64); resolution is lowered to fit
+MAX_FRAME_CELLS = 1_000_000
+
+
+def snap_bbox(bbox: Optional[tuple[float, float, float, float]]) -> Optional[tuple[float, float, float, float]]:
+    """Widen a bbox outwards to the BBOX_SNAP grid"""
+    if bbox is None:
+        return None
+    min_lon, min_lat, max_lon, max_lat = bbox
+    return (
+        max(-180.0, round(math.floor(min_lon / BBOX_SNAP) * BBOX_SNAP, 6)),
+        max(-90.0, round(math.floor(min_lat / BBOX_SNAP) * BBOX_SNAP, 6)),
+        min(180.0, round(math.ceil(max_lon / BBOX_SNAP) * BBOX_SNAP, 6)),
+        min(90.0, round(math.ceil(max_lat / BBOX_SNAP) * BBOX_SNAP, 6)),
+    )
+
+
+async def load_points(
+    db: AsyncSession,
+    hours: int,
+    conditions: list,
+    category: Optional[str] = None,
+    source: Optional[str] = None,
+    bbox: Optional[tuple[float, float, float, float]] = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Latitudes, longitudes and epoch timestamps of matching events with coordinates"""
+    if hot_window.covers(hours):
+        return hot_window.points(hours, category, source, bbox)
+
+    threshold = datetime.utcnow() - timedelta(hours=hours)
+    result = await db.execute(
+        select(NewsEvent.latitude, NewsEvent.longitude, NewsEvent.timestamp_detected)
+        .where(NewsEvent.timestamp_detected >= threshold)
+        .where(NewsEvent.latitude.is_not(None), NewsEvent.longitude.is_not(None))
+        .where(*conditions)
+    )
+    rows = result.all()
+    if not rows:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty, empty
+    latitudes, longitudes, timestamps = zip(*rows)
+    epochs = np.array(timestamps, dtype="datetime64[us]").astype(np.int64) / 1e6
+    return np.asarray(latitudes, dtype=np.float64), np.asarray(longitudes, dtype=np.float64), epochs
+
+
+def _grid_shape(bbox: tuple[float, float, float, float], resolution: int) -> tuple[int, int, float]:
+    """(rows, cols, cell size in degrees) with square cells and `resolution` cells along the longer side"""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    cell = max(max_lon - min_lon, max_lat - min_lat) / resolution or 1.0 / resolution
+    rows = max(1, int(np.ceil((max_lat - min_lat) / cell)))
+    cols = max(1, int(np.ceil((max_lon - min_lon) / cell)))
+    return rows, cols, cell
+
+
+def _sparse_cells(grid: np.ndarray, integer: bool) -> list[list]:
+    """Non-empty cells as [row, col, value] (row 0 is the southern edge)"""
+    row_idx, col_idx = np.nonzero(grid)
+    values = grid[row_idx, col_idx]
+    values = values.astype(np.int64) if integer else np.round(values, 3)
+    return [list(cell) for cell in zip(row_idx.tolist(), col_idx.tolist(), values.tolist())]
+
+
+def build_heatmap(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    epochs: np.ndarray,
+    hours: int,
+    bbox: Optional[tuple[float, float, float, float]],
+    resolution: int = DEFAULT_RESOLUTION,
+    half_life_hours: float = 0.0,
+    frames: bool = False
+) -> dict:
+    """
+    Bin points into a density grid. With half_life_hours, each event weighs
+    0.5 ** (age / half_life); with frames, one grid per clock hour, oldest first.
+    """
+    now_dt = datetime.utcnow()
+    now = to_epoch(now_dt)
+
+    if bbox is None:
+        if len(latitudes):
+            bbox = (
+                float(longitudes.min()) - EXTENT_PADDING, float(latitudes.min()) - EXTENT_PADDING,
+                float(longitudes.max()) + EXTENT_PADDING, float(latitudes.max()) + EXTENT_PADDING,
+            )
+        else:
+            bbox = (-180.0, -90.0, 180.0, 90.0)
+    min_lon, min_lat, max_lon, max_lat = bbox
+    rows, cols, cell = _grid_shape(bbox, resolution)
+    while frames and hours * rows * cols > MAX_FRAME_CELLS and resolution > 1:
+        # Cells scale with resolution squared
+        resolution = max(1, int(resolution * (MAX_FRAME_CELLS / (hours * rows * cols)) ** 0.5))
+        rows, cols, cell = _grid_shape(bbox, resolution)
+    # Grid covers whole cells, so the top/right edges may extend past the bbox
+    lat_range = (min_lat, min_lat + rows * cell)
+    lon_range = (min_lon, min_lon + cols * cell)
+
+    age_hours = np.clip((now - epochs) / 3600.0, 0.0, None)
+    weights = 0.5 ** (age_hours / half_life_hours) if half_life_hours > 0 else None
+    integer = weights is None
+
+    body = {
+        "bbox": [min_lon, min_lat, lon_range[1], lat_range[1]],
+        "rows": rows,
+        "cols": cols,
+        "cell_size": cell,
+        "hours": hours,
+        "resolution": resolution,
+        "half_life_hours": half_life_hours or None,
+        "points": int(len(latitudes)),
+    }
+
+    if frames:
+        # Frame hours-1 is the current clock hour; the partial hour before frame 0 joins it
+        frame_start = now_dt.replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+        frame_idx = np.clip(np.floor((epochs - to_epoch(frame_start)) / 3600.0), 0, hours - 1)
+        cube, _ = np.histogramdd(
+            (frame_idx, latitudes, longitudes),
+            bins=(hours, rows, cols),
+            range=((0, hours), lat_range, lon_range),
+            weights=weights
+        )
+        body["max"] = round(float(cube.max()), 3) if cube.size else 0.0
+        body["frames"] = [
+            {"start": frame_start + timedelta(hours=i), "cells": _sparse_cells(cube[i], integer)}
+            for i in range(hours)
+        ]
+    else:
+        grid, _, _ = np.histogram2d(latitudes, longitudes, bins=(rows, cols), range=(lat_range, lon_range), weights=weights)
+        body["max"] = round(float(grid.max()), 3) if grid.size else 0.0
+        body["cells"] = _sparse_cells(grid, integer)
+    return body
@@ -0,0 +1,368 @@
+"""
+Hot-window in-memory event index
+Keeps the most recent events (the /api/events 168 hour range) in NumPy columns
+so read queries are answered with vectorized masks instead of SQLite scans
+"""
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select, func
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import NewsEvent, StoryMember
+from app.services.event_rows import EVENT_FIELDS, select_event_rows, encode_events_list
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+EPOCH = datetime(1970, 1, 1)
+
+# Positions of the fields we index inside an event row tuple
+_ID = EVENT_FIELDS.index("id")
+_SOURCE = EVENT_FIELDS.index("source_name")
+_LOCATION = EVENT_FIELDS.index("location_name")
+_LAT = EVENT_FIELDS.index("latitude")
+_LON = EVENT_FIELDS.index("longitude")
+_CATEGORY = EVENT_FIELDS.index("category")
+_TIMESTAMP = EVENT_FIELDS.index("timestamp_detected")
+
+# Rows loaded from the database per round trip at startup
+LOAD_CHUNK_SIZE = 10000
+
+# Minimum seconds between time-based trims
+TRIM_INTERVAL = 60
+
+
+def to_epoch(value: Optional[datetime]) -> float:
+    """Naive UTC datetime to epoch seconds"""
+    return (value - EPOCH).total_seconds() if value else 0.0
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
+
+
+def _count(counter: dict[str, int], key: Optional[str], delta: int):
+    """Adjust a per-category/source counter, dropping buckets that reach zero"""
+    value = counter.get(key, 0) + delta
+    if value > 0:
+        counter[key] = value
+    else:
+        counter.pop(key, None)
+
+
+class HotWindow:
+    """Columnar store of recent events with dictionary-encoded category and source"""
+
+    def __init__(self, hours: int):
+        self.hours = hours
+        self.ready = False
+        self._reset()
+
+    def _reset(self):
+        self._size = 0
+        self.max_id = 0
+        # Ids held in the window - rows can arrive twice and out of id order
+        self._id_set: set[int] = set()
+        # Events that joined a story another event opened (hidden by collapse_stories)
+        self._story_member_ids: set[int] = set()
+        self._allocate(1024)
+        self.rows: list[tuple] = []
+        # Dictionary encoding for category and source
+        self.categories: list[str] = []
+        self.sources: list[str] = []
+        self._category_codes: dict[str, int] = {}
+        self._source_codes: dict[str, int] = {}
+        # All-time counters for /api/stats (the window only holds recent rows)
+        self.total_events = 0
+        self.events_by_category: dict[str, int] = {}
+        self.events_by_source: dict[str, int] = {}
+        self._last_trim = 0.0
+
+    def _allocate(self, capacity: int):
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.latitudes = np.full(capacity, np.nan, dtype=np.float64)
+        self.longitudes = np.full(capacity, np.nan, dtype=np.float64)
+        self.category_codes = np.zeros(capacity, dtype=np.int16)
+        self.source_codes = np.zeros(capacity, dtype=np.int32)
+        self.story_members = np.zeros(capacity, dtype=bool)
+
+    def _grow(self, needed: int):
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        old = self._columns()
+        self._allocate(capacity)
+        new = self._columns()
+        for src, dst in zip(old, new):
+            dst[:self._size] = src[:self._size]
+
+    def _columns(self) -> tuple[np.ndarray, ...]:
+        return (
+            self.ids, self.timestamps, self.latitudes, self.longitudes,
+            self.category_codes, self.source_codes, self.story_members
+        )
+
+    def _code(self, value: str, codes: dict[str, int], names: list[str]) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = len(names)
+            codes[value] = code
+            names.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return self._size
+
+    def covers(self, hours: int) -> bool:
+        """Whether a query for the last N hours can be answered from memory"""
+        return self.ready and hours <= self.hours
+
+    def append_rows(
+        self,
+        rows: Sequence[Sequence[Any]],
+        count_totals: bool = True,
+        story_members: Optional[set[int]] = None
+    ):
+        """Append event rows (EVENT_FIELDS order) - story_members: ids among them that joined a story"""
+        if story_members:
+            self._story_member_ids.update(story_members)
+        # Rows can arrive twice (writer in this process + change follower) and
+        # out of id order (load streams by timestamp, concurrent writers)
+        unique = []
+        for row in rows:
+            if row[_ID] not in self._id_set:
+                self._id_set.add(row[_ID])
+                unique.append(row)
+        rows = unique
+        if not rows:
+            return
+        start = self._size
+        self._grow(start + len(rows))
+        for offset, row in enumerate(rows):
+            row = list(row)
+            row[_SOURCE] = _intern(row[_SOURCE])
+            row[_CATEGORY] = _intern(row[_CATEGORY])
+            row[_LOCATION] = _intern(row[_LOCATION])
+            i = start + offset
+            self.ids[i] = row[_ID]
+            self.timestamps[i] = to_epoch(row[_TIMESTAMP])
+            self.latitudes[i] = row[_LAT] if row[_LAT] is not None else np.nan
+            self.longitudes[i] = row[_LON] if row[_LON] is not None else np.nan
+            self.category_codes[i] = self._code(row[_CATEGORY], self._category_codes, self.categories)
+            self.source_codes[i] = self._code(row[_SOURCE], self._source_codes, self.sources)
+            self.story_members[i] = row[_ID] in self._story_member_ids
+            self.rows.append(tuple(row))
+            if count_totals:
+                self.total_events += 1
+                self.events_by_category[row[_CATEGORY]] = self.events_by_category.get(row[_CATEGORY], 0) + 1
+                self.events_by_source[row[_SOURCE]] = self.events_by_source.get(row[_SOURCE], 0) + 1
+        self._size += len(rows)
+        self.max_id = max(self.max_id, max(row[_ID] for row in rows))
+        self.maybe_trim()
+
+    def append_events(self, events: list[NewsEvent], story_members: Optional[set[int]] = None):
+        """Append freshly committed ORM events"""
+        self.append_rows([tuple(getattr(e, f) for f in EVENT_FIELDS) for e in events], story_members=story_members)
+
+    def mark_story_members(self, ids: set[int]):
+        """Flag events that joined a story (ids not loaded yet are flagged when they arrive)"""
+        self._story_member_ids.update(ids)
+        self.story_members[:self._size] |= np.isin(self.ids[:self._size], list(ids))
+
+    def replace_rows(self, rows: Sequence[Sequence[Any]]) -> int:
+        """Overwrite held events with their edited rows. Returns how many were held."""
+        by_id = {row[_ID]: row for row in rows if row[_ID] in self._id_set}
+        if not by_id:
+            return 0
+        positions = np.flatnonzero(np.isin(self.ids[:self._size], list(by_id)))
+        for i in positions:
+            row = list(by_id[int(self.ids[i])])
+            row[_SOURCE] = _intern(row[_SOURCE])
+            row[_CATEGORY] = _intern(row[_CATEGORY])
+            row[_LOCATION] = _intern(row[_LOCATION])
+            # An edit can move the event to another category or source - move its count too
+            old = self.rows[i]
+            _count(self.events_by_category, old[_CATEGORY], -1)
+            _count(self.events_by_source, old[_SOURCE], -1)
+            _count(self.events_by_category, row[_CATEGORY], 1)
+            _count(self.events_by_source, row[_SOURCE], 1)
+            self.timestamps[i] = to_epoch(row[_TIMESTAMP])
+            self.latitudes[i] = row[_LAT] if row[_LAT] is not None else np.nan
+            self.longitudes[i] = row[_LON] if row[_LON] is not None else np.nan
+            self.category_codes[i] = self._code(row[_CATEGORY], self._category_codes, self.categories)
+            self.source_codes[i] = self._code(row[_SOURCE], self._source_codes, self.sources)
+            self.rows[i] = tuple(row)
+        return len(positions)
+
+    def maybe_trim(self):
+        if time.monotonic() - self._last_trim >= TRIM_INTERVAL:
+            self.trim()
+
+    def trim(self):
+        """Drop rows that fell out of the time window"""
+        self._last_trim = time.monotonic()
+        cutoff = to_epoch(datetime.utcnow() - timedelta(hours=self.hours))
+        n = self._size
+        keep = self.timestamps[:n] >= cutoff
+        if keep.all():
+            return
+        kept = np.flatnonzero(keep)
+        for column in self._columns():
+            column[:len(kept)] = column[kept]
+        self.rows = [self.rows[i] for i in kept]
+        self._size = len(kept)
+        self._id_set = set(self.ids[:self._size].tolist())
+        self._story_member_ids = {
+            event_id for event_id in self._story_member_ids if event_id in self._id_set or event_id > self.max_id
+        }
+        logger.debug(f"Hot window trimmed {n - self._size} events")
+
+    def _mask(
+        self,
+        hours: int,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+        bbox: Optional[tuple[float, float, float, float]] = None
+    ) -> np.ndarray:
+        """Vectorized equivalent of the /api/events WHERE clause"""
+        n = self._size
+        threshold = to_epoch(datetime.utcnow() - timedelta(hours=hours))
+        mask = self.timestamps[:n] >= threshold
+        if category:
+            code = self._category_codes.get(category.lower())
+            if code is None:
+                return np.zeros(n, dtype=bool)
+            mask &= self.category_codes[:n] == code
+        if source:
+            # Substring match (like ilike) resolved against the source dictionary
+            needle = source.lower()
+            codes = [code for name, code in self._source_codes.items() if needle in name.lower()]
+            if not codes:
+                return np.zeros(n, dtype=bool)
+            mask &= np.isin(self.source_codes[:n], codes)
+        if bbox:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            lat = self.latitudes[:n]
+            lon = self.longitudes[:n]
+            # Comparisons with NaN are False, so events without coordinates drop out
+            mask &= (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        return mask
+
+    def query_events(
+        self,
+        hours: int,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+        bbox: Optional[tuple[float, float, float, float]] = None,
+        limit: int = 100,
+        offset: int = 0,
+        collapse_stories: bool = False
+    ) -> bytes:
+        """Answer /api/events and return the serialized body"""
+        self.maybe_trim()
+        mask = self._mask(hours, category, source, bbox)
+        if collapse_stories:
+            mask &= ~self.story_members[:self._size]
+        matches = np.flatnonzero(mask)
+        total = len(matches)
+        # Newest first - the same ordering as the SQL path
+        order = np.argsort(-self.timestamps[matches], kind="stable")
+        page = matches[order[offset:offset + limit]]
+        rows = [self.rows[i] for i in page]
+        return encode_events_list(rows, total, hours)
+
+    def points(
+        self,
+        hours: int,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+        bbox: Optional[tuple[float, float, float, float]] = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Latitudes, longitudes and epoch timestamps of matching events with coordinates"""
+        self.maybe_trim()
+        n = self._size
+        mask = self._mask(hours, category, source, bbox)
+        mask &= ~np.isnan(self.latitudes[:n]) & ~np.isnan(self.longitudes[:n])
+        return self.latitudes[:n][mask], self.longitudes[:n][mask], self.timestamps[:n][mask]
+
+    def count_since(self, hours: int) -> int:
+        return int(np.count_nonzero(self._mask(hours)))
+
+    def last_update(self) -> Optional[datetime]:
+        if not self._size:
+            return None
+        return self.rows[int(np.argmax(self.timestamps[:self._size]))][_TIMESTAMP]
+
+    def stats(self) -> dict:
+        """Answer /api/stats (StatsResponse fields)"""
+        self.maybe_trim()
+        return {
+            "total_events": self.total_events,
+            "events_last_24h": self.count_since(24),
+            "events_by_category": dict(self.events_by_category),
+            "events_by_source": dict(self.events_by_source),
+            "last_update": self.last_update(),
+        }
+
+    async def load(self):
+        """Load the window and the all-time counters from the database"""
+        cutoff = datetime.utcnow() - timedelta(hours=self.hours)
+        self.ready = False
+        self._reset()
+
+        async with async_session_maker() as db:
+            query = (
+                select_event_rows()
+                .where(NewsEvent.timestamp_detected >= cutoff)
+                .order_by(NewsEvent.timestamp_detected)
+                .execution_options(yield_per=LOAD_CHUNK_SIZE)
+            )
+            result = await db.stream(query)
+            async for chunk in result.partitions():
+                self.append_rows(chunk, count_totals=False)
+            members = await db.execute(
+                select(StoryMember.event_id)
+                .join(NewsEvent, NewsEvent.id == StoryMember.event_id)
+                .where(NewsEvent.timestamp_detected >= cutoff, StoryMember.similarity.is_not(None))
+            )
+            self.mark_story_members(set(members.scalars().all()))
+
+        await self.refresh_totals()
+        self.ready = True
+        logger.info(f"🔥 Hot window loaded: {self._size} events from the last {self.hours} hours")
+
+    async def refresh_totals(self):
+        """Reload all-time counters (after retention deletes old rows)"""
+        async with async_session_maker() as db:
+            total_result = await db.execute(select(func.count(NewsEvent.id)))
+            category_result = await db.execute(
+                select(NewsEvent.category, func.count(NewsEvent.id)).group_by(NewsEvent.category)
+            )
+            source_result = await db.execute(
+                select(NewsEvent.source_name, func.count(NewsEvent.id)).group_by(NewsEvent.source_name)
+            )
+            self.total_events = total_result.scalar() or 0
+            self.events_by_category = {row[0]: row[1] for row in category_result.all()}
+            self.events_by_source = {row[0]: row[1] for row in source_result.all()}
+
+
+hot_window = HotWindow(hours=settings.hot_window_hours)
+
+
+def append_events(events: list[NewsEvent], story_members: Optional[set[int]] = None):
+    """Feed freshly committed events into the window (no-op when disabled)"""
+    if not hot_window.ready:
+        return
+    try:
+        hot_window.append_events(events, story_members)
+    except Exception as e:
+        logger.error(f"Failed to append events to hot window: {e}")
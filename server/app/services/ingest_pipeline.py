@@ -0,0 +1,358 @@
+"""
+Staged RSS ingestion pipeline
+fetch -> parse -> dedupe -> enrich -> persist, joined by bounded asyncio queues.
+Every stage has its own workers, so downloads, parsing, LLM calls and writes
+overlap; a full downstream queue blocks the stage feeding it, which keeps
+memory bounded when the LLM slows down.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import NewsEvent
+from app.services.feed_health import FeedSample, record_feed_sample
+from app.services.parse_pool import EntryRecord, FeedFetchError, fetch_feed, get_parse_pool, parse_feed_document
+from app.services.tracing import NOOP_SPAN, span, use_span
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Window for the per-stage throughput figure
+THROUGHPUT_WINDOW = 60
+
+# Stages whose items are single entries - a failure there skips the entry, not the feed
+ENTRY_STAGES = ("enrich", "persist")
+
+
+@dataclass
+class FeedRun:
+    """Progress of one feed through the pipeline during a cycle"""
+    name: str
+    url: str
+    max_entries_first_run: int
+    pending: int = 0  # Entries still somewhere in the pipeline
+    parsed: bool = False
+    newest_date: Optional[datetime] = None
+    oldest_failed: Optional[datetime] = None  # Publish date of the oldest entry that failed
+    saved: int = 0
+    finished: bool = False
+    started: float = field(default_factory=time.monotonic)
+    sample: Optional[FeedSample] = None
+    span: object = NOOP_SPAN  # Parent of the spans of this feed's entries
+
+    def __post_init__(self):
+        self.sample = FeedSample(source_name=self.name)
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    queue: asyncio.Queue
+    processed: int = 0
+    failed: int = 0
+    busy: int = 0
+    completions: deque = field(default_factory=deque)
+
+    def record(self, ok: bool = True):
+        if ok:
+            self.processed += 1
+        else:
+            self.failed += 1
+        now = time.monotonic()
+        self.completions.append(now)
+        while self.completions and now - self.completions[0] > THROUGHPUT_WINDOW:
+            self.completions.popleft()
+
+    def to_dict(self) -> dict:
+        now = time.monotonic()
+        recent = sum(1 for t in self.completions if now - t <= THROUGHPUT_WINDOW)
+        return {
+            "workers": self.workers,
+            "busy": self.busy,
+            "queue_depth": self.queue.qsize(),
+            "queue_max": self.queue.maxsize,
+            "processed": self.processed,
+            "failed": self.failed,
+            "per_minute": recent * 60 / THROUGHPUT_WINDOW,
+        }
+
+
+class IngestPipeline:
+    """Runs one scrape cycle through the staged pipeline"""
+
+    def __init__(self):
+        size = settings.ingest_queue_size
+        self.stages = {
+            "fetch": StageStats("fetch", settings.ingest_fetch_workers, asyncio.Queue(size)),
+            "parse": StageStats("parse", settings.ingest_parse_workers, asyncio.Queue(size)),
+            "dedupe": StageStats("dedupe", 1, asyncio.Queue(size)),
+            "enrich": StageStats("enrich", settings.ingest_enrich_workers, asyncio.Queue(size)),
+            "persist": StageStats("persist", 1, asyncio.Queue(size)),
+        }
+        self.running = False
+        self._claimed_hashes: set[str] = set()  # Entries already in flight this cycle
+        self.cycles = 0
+        self.last_cycle: Optional[dict] = None
+
+    def _queue(self, stage: str) -> asyncio.Queue:
+        return self.stages[stage].queue
+
+    async def _worker(self, stage: str, handle: Callable[..., Awaitable[None]]):
+        stats = self.stages[stage]
+        queue = stats.queue
+        while True:
+            item = await queue.get()
+            stats.busy += 1
+            run = self._run_of(item)
+            try:
+                with use_span(run.span if run else None):
+                    await handle(item)
+                stats.record()
+            except Exception as e:
+                stats.record(ok=False)
+                logger.error(f"Ingest {stage} stage failed: {e}")
+                if stage in ENTRY_STAGES:
+                    await self._entry_failed(item)
+                else:
+                    # Whatever the item was carrying won't reach the end of the pipeline
+                    await self._abandon(item, f"{stage} stage failed: {e}")
+            finally:
+                stats.busy -= 1
+                queue.task_done()
+
+    # --- Feed bookkeeping -------------------------------------------------
+
+    @staticmethod
+    def _run_of(item) -> Optional[FeedRun]:
+        run = item[0] if isinstance(item, tuple) else item
+        return run if isinstance(run, FeedRun) else None
+
+    async def _entry_done(self, run: FeedRun, count: int = 1):
+        run.pending -= count
+        await self._maybe_finish(run)
+
+    async def _entry_failed(self, item: tuple):
+        """Skip an entry that failed and let the rest of its feed finish"""
+        run, payload = item
+        pub_date = payload.pub_date if isinstance(payload, EntryRecord) else payload.get("timestamp_original")
+        run.sample.failed_entries += 1
+        if pub_date is not None and (run.oldest_failed is None or pub_date < run.oldest_failed):
+            run.oldest_failed = pub_date
+        await self._entry_done(run)
+
+    async def _maybe_finish(self, run: FeedRun):
+        if run.finished or not run.parsed or run.pending > 0:
+            return
+        run.finished = True
+        from app.services.rss_scraper import update_scraper_state
+        # Newest article date (or current time if none)
+        last_run = run.newest_date or datetime.utcnow()
+        if run.oldest_failed is not None:
+            # Stop short of the failed entries so the next cycle retries them (saved ones dedupe)
+            last_run = min(last_run, run.oldest_failed - timedelta(seconds=1))
+        async with async_session_maker() as db:
+            await update_scraper_state(db, run.name, last_run)
+        failed = run.sample.failed_entries
+        logger.info(f"RSS feed {run.name}: {run.saved} new events saved" + (f", {failed} entries failed" if failed else ""))
+        run.span.end(saved=run.saved, failed_entries=failed)
+        await self._record_health(run)
+
+    async def _fail(self, run: FeedRun, error: str):
+        """End a feed's cycle early - scraper state is left untouched so entries are retried"""
+        if run.finished:
+            return
+        run.finished = True
+        logger.error(f"Error scraping RSS feed {run.name}: {error}")
+        run.sample.error = error
+        run.span.end(error=error)
+        await self._record_health(run)
+
+    async def _abandon(self, item, error: str):
+        run = self._run_of(item)
+        if run is not None:
+            await self._fail(run, error)
+
+    async def _record_health(self, run: FeedRun):
+        run.sample.saved = run.saved
+        run.sample.duration_ms = (time.monotonic() - run.started) * 1000
+        try:
+            await record_feed_sample(run.sample)
+        except Exception as e:
+            logger.error(f"Failed to record health for {run.name}: {e}")
+
+    # --- Stages -------------------------------------------------------------
+
+    async def _fetch(self, run: FeedRun):
+        logger.info(f"Scraping RSS feed: {run.name} ({run.url})")
+        run.started = time.monotonic()
+        run.span = span("scrape_rss_feed", feed=run.name)
+        fetch_span = span("fetch", parent=run.span)
+        try:
+            fetched = await fetch_feed(run.name, run.url)
+        except FeedFetchError as e:
+            run.sample.add_fetch(e.result)
+            fetch_span.end(error=str(e), status=e.result.status)
+            await self._fail(run, f"fetch failed: {e}")
+            return
+        run.sample.add_fetch(fetched)
+        fetch_span.end(status=fetched.status, bytes=len(fetched.data), ttfb_ms=round(fetched.ttfb_ms, 1))
+        await self._queue("parse").put((run, fetched.data, fetched.headers))
+
+    async def _parse(self, item: tuple):
+        from app.services.rss_scraper import get_last_scrape_time
+        run, data, headers = item
+        loop = asyncio.get_running_loop()
+        with span("parse") as parse_span:
+            parsed = await loop.run_in_executor(get_parse_pool(), parse_feed_document, run.name, run.url, data, headers)
+            # Wait for a pool process vs time spent parsing in it
+            parse_span.set(entries=len(parsed.entries), parse_ms=round(parsed.parse_ms, 1))
+        run.sample.parse_ms = parsed.parse_ms
+        if parsed.error:
+            await self._fail(run, parsed.error)
+            return
+        if parsed.bozo_exception:
+            logger.warning(f"RSS feed {run.name} has parsing issues: {parsed.bozo_exception}")
+        if not parsed.entries:
+            logger.warning(f"No entries found in RSS feed: {run.name}")
+            run.finished = True
+            await self._record_health(run)
+            return
+
+        async with async_session_maker() as db:
+            last_scrape = await get_last_scrape_time(db, run.name)
+
+        if last_scrape is None:
+            # First run: take up to N most recent entries
+            entries = list(parsed.entries[:run.max_entries_first_run])
+        else:
+            # Entries without a publish date are included to be safe
+            entries = [e for e in parsed.entries if e.pub_date is None or e.pub_date > last_scrape]
+
+        logger.info(f"Found {len(entries)} new entries of {len(parsed.entries)} in {run.name}")
+        run.sample.entries_seen = len(parsed.entries)
+        run.sample.new_entries = len(entries)
+        if not entries:
+            # Still update scraper state to current time so we don't recheck the same empty feed
+            run.newest_date = datetime.utcnow()
+        dates = [e.pub_date for e in entries if e.pub_date]
+        if dates:
+            run.newest_date = max(dates)
+
+        run.pending += 1
+        run.parsed = True
+        await self._queue("dedupe").put((run, entries))
+
+    async def _dedupe(self, item: tuple):
+        run, entries = item
+        # One query per feed instead of one per entry - and before paying for the LLM
+        hashes = [e.content_hash for e in entries]
+        existing = set()
+        dedupe_span = span("dedupe", entries=len(entries))
+        if hashes:
+            async with async_session_maker() as db:
+                result = await db.execute(select(NewsEvent.content_hash).where(NewsEvent.content_hash.in_(hashes)))
+                existing = set(result.scalars().all())
+
+        # Also skip entries another feed already sent to the LLM this cycle
+        fresh: list[EntryRecord] = []
+        for entry in entries:
+            if entry.content_hash in existing or entry.content_hash in self._claimed_hashes:
+                continue
+            self._claimed_hashes.add(entry.content_hash)
+            fresh.append(entry)
+
+        run.sample.duplicates = len(entries) - len(fresh)
+        dedupe_span.end(duplicates=run.sample.duplicates)
+        run.pending += len(fresh)
+        for entry in fresh:
+            await self._queue("enrich").put((run, entry))
+        await self._entry_done(run)
+
+    async def _enrich(self, item: tuple):
+        from app.services.rss_scraper import process_rss_entry
+        run, entry = item
+        started = time.perf_counter()
+        event_data = await process_rss_entry(entry, run.name)
+        run.sample.enrich_ms += (time.perf_counter() - started) * 1000
+        if event_data is None:
+            await self._entry_done(run)
+            return
+        await self._queue("persist").put((run, event_data))
+
+    async def _persist(self, item: tuple):
+        from app.services.rss_scraper import save_event
+        run, event_data = item
+        async with async_session_maker() as db:
+            if await save_event(db, event_data):
+                run.saved += 1
+        await self._entry_done(run)
+
+    # --- Cycle ----------------------------------------------------------------
+
+    async def run(self, feeds: list[dict], max_entries_first_run: int = 10) -> int:
+        """Push feeds through every stage and wait for the pipeline to drain. Returns events saved."""
+        if self.running:
+            raise RuntimeError("An ingestion cycle is already running")
+        self.running = True
+        self._claimed_hashes.clear()
+        started = time.monotonic()
+        handlers = {
+            "fetch": self._fetch,
+            "parse": self._parse,
+            "dedupe": self._dedupe,
+            "enrich": self._enrich,
+            "persist": self._persist,
+        }
+        workers = [
+            asyncio.create_task(self._worker(stage, handlers[stage]))
+            for stage, stats in self.stages.items()
+            for _ in range(stats.workers)
+        ]
+        runs = [FeedRun(feed["name"], feed["url"], max_entries_first_run) for feed in feeds]
+        try:
+            for run in runs:
+                await self._queue("fetch").put(run)
+            # Each stage only enqueues downstream before finishing an item,
+            # so joining the queues in order drains the whole pipeline
+            for stage in self.stages:
+                await self._queue(stage).join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Drop leftovers of an interrupted cycle
+            for stats in self.stages.values():
+                while not stats.queue.empty():
+                    stats.queue.get_nowait()
+                    stats.queue.task_done()
+            self.running = False
+
+        total_saved = sum(run.saved for run in runs)
+        self.cycles += 1
+        self.last_cycle = {
+            "feeds": len(runs),
+            "events_saved": total_saved,
+            "duration_seconds": round(time.monotonic() - started, 2),
+            "finished_at": datetime.utcnow().isoformat(),
+        }
+        return total_saved
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "cycles": self.cycles,
+            "last_cycle": self.last_cycle,
+            "stages": {name: stats.to_dict() for name, stats in self.stages.items()},
+        }
+
+
+ingest_pipeline = IngestPipeline()
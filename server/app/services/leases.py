@@ -0,0 +1,83 @@
+"""
+Database-backed leases
+A lease is a row in service_leases owned by one instance until it expires.
+Holders renew before expiry; a crashed holder's lease simply runs out.
+"""
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update, delete, or_
+from sqlalchemy.exc import IntegrityError
+
+from app.database import async_session_maker
+from app.models import ServiceLease
+
+logger = logging.getLogger(__name__)
+
+# Unique id of this process, used as the lease holder
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+async def try_acquire_lease(name: str, ttl_seconds: float, holder: str = INSTANCE_ID) -> bool:
+    """Acquire or renew a lease. Returns True if this holder owns it afterwards."""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    
+    async with async_session_maker() as db:
+        # Take over the lease if we hold it or it expired - a single atomic UPDATE
+        result = await db.execute(
+            update(ServiceLease)
+            .where(ServiceLease.name == name)
+            .where(or_(ServiceLease.holder == holder, ServiceLease.expires_at < now))
+            .values(holder=holder, expires_at=expires_at)
+        )
+        if result.rowcount:
+            await db.commit()
+            return True
+        
+        existing = await db.execute(select(ServiceLease.name).where(ServiceLease.name == name))
+        if existing.scalar_one_or_none() is not None:
+            await db.rollback()
+            return False
+        
+        # First claim ever - the primary key makes concurrent inserts race safely
+        db.add(ServiceLease(name=name, holder=holder, expires_at=expires_at))
+        try:
+            await db.commit()
+            return True
+        except IntegrityError:
+            await db.rollback()
+            return False
+
+
+async def release_lease(name: str, holder: str = INSTANCE_ID):
+    """Give up a lease early so another instance can take over right away"""
+    async with async_session_maker() as db:
+        await db.execute(
+            delete(ServiceLease).where(ServiceLease.name == name, ServiceLease.holder == holder)
+        )
+        await db.commit()
+
+
+async def get_lease_holder(name: str) -> Optional[str]:
+    """Current holder of an unexpired lease"""
+    async with async_session_maker() as db:
+        result = await db.execute(
+            select(ServiceLease.holder)
+            .where(ServiceLease.name == name, ServiceLease.expires_at >= datetime.utcnow())
+        )
+        return result.scalar_one_or_none()
+
+
+async def get_active_leases(prefix: str) -> dict[str, str]:
+    """Unexpired leases whose name starts with prefix, as {name: holder}"""
+    async with async_session_maker() as db:
+        result = await db.execute(
+            select(ServiceLease.name, ServiceLease.holder)
+            .where(ServiceLease.name.startswith(prefix), ServiceLease.expires_at >= datetime.utcnow())
+        )
+        return {name: holder for name, holder in result.all()}
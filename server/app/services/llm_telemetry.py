@@ -0,0 +1,303 @@
+"""
+LLM call telemetry
+Every OpenAI call goes through chat_json, which records caller, feed, model,
+token usage, latency, retries and outcome. Records are buffered in memory,
+written to llm_calls in batches and rolled up hourly into llm_usage_hourly.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Optional
+
+from sqlalchemy import select, delete, insert
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import LLMCall, LLMUsageHourly
+from app.services.tracing import span
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# USD per 1M (prompt, completion) tokens
+LLM_PRICING = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+# Buffered records are written when this many are pending or every FLUSH_INTERVAL seconds
+FLUSH_SIZE = 100
+FLUSH_INTERVAL = 10
+
+# Hours the hourly job recomputes on each run - the report reads these from raw calls
+ROLLUP_HOURS = 2
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = LLM_PRICING.get(model, LLM_PRICING["gpt-4o-mini"])
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LLMTelemetry:
+    """Buffered writer for LLM call records"""
+
+    def __init__(self):
+        self._buffer: list[dict] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    def record(self, **call):
+        call.setdefault("created_at", datetime.utcnow())
+        self._buffer.append(call)
+        if len(self._buffer) >= FLUSH_SIZE:
+            asyncio.create_task(self.flush())
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(FLUSH_INTERVAL)
+        await self.flush()
+
+    async def flush(self):
+        """Write buffered records in one batch"""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            records, self._buffer = self._buffer, []
+            try:
+                async with async_session_maker() as db:
+                    await db.execute(insert(LLMCall), records)
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Failed to write {len(records)} LLM call records: {e}")
+
+    async def aggregate(self, hours: int = ROLLUP_HOURS) -> int:
+        """Recompute hourly rollups for the last N hours from raw calls. Returns rows written."""
+        start = _hour_start(hours)
+        async with async_session_maker() as db:
+            rows = await _rollup_calls(db, start)
+            # Rollups for these hours are rebuilt from scratch, so reruns are idempotent
+            await db.execute(delete(LLMUsageHourly).where(LLMUsageHourly.hour >= start))
+            if rows:
+                await db.execute(insert(LLMUsageHourly), rows)
+            await db.commit()
+        return len(rows)
+
+    async def prune(self) -> int:
+        """Drop raw call records past the retention period (hourly rollups are kept)"""
+        cutoff = datetime.utcnow() - timedelta(days=settings.llm_calls_retention_days)
+        async with async_session_maker() as db:
+            result = await db.execute(delete(LLMCall).where(LLMCall.created_at < cutoff))
+            await db.commit()
+            return result.rowcount or 0
+
+
+llm_telemetry = LLMTelemetry()
+
+
+def _hour_start(hours: int) -> datetime:
+    """Start of the clock hour that makes the last N hours (the current one included)"""
+    return datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+
+
+async def _rollup_calls(db, start: datetime) -> list[dict]:
+    """Hourly rollup rows (llm_usage_hourly columns) computed from raw calls since start"""
+    result = await db.execute(
+        select(
+            LLMCall.created_at, LLMCall.caller, LLMCall.feed, LLMCall.model,
+            LLMCall.prompt_tokens, LLMCall.completion_tokens,
+            LLMCall.latency_ms, LLMCall.retries, LLMCall.outcome
+        ).where(LLMCall.created_at >= start)
+    )
+    groups: dict[tuple, list] = defaultdict(list)
+    for row in result.all():
+        hour = row.created_at.replace(minute=0, second=0, microsecond=0)
+        groups[(hour, row.caller, row.feed or "", row.model)].append(row)
+
+    rows = []
+    for (hour, caller, feed, model), calls in groups.items():
+        latencies = sorted(c.latency_ms for c in calls)
+        prompt_tokens = sum(c.prompt_tokens for c in calls)
+        completion_tokens = sum(c.completion_tokens for c in calls)
+        rows.append({
+            "hour": hour,
+            "caller": caller,
+            "feed": feed,
+            "model": model,
+            "calls": len(calls),
+            "failures": sum(1 for c in calls if c.outcome != "ok"),
+            "json_errors": sum(1 for c in calls if c.outcome == "json_error"),
+            "retries": sum(c.retries for c in calls),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost_usd": estimate_cost(model, prompt_tokens, completion_tokens),
+            "latency_ms_total": sum(latencies),
+            "latency_ms_p50": _percentile(latencies, 0.50),
+            "latency_ms_p95": _percentile(latencies, 0.95),
+            "latency_ms_p99": _percentile(latencies, 0.99),
+            "latency_ms_max": latencies[-1],
+        })
+    return rows
+
+
+def _summarize(rows: list) -> dict:
+    calls = sum(r.calls for r in rows)
+    latency_total = sum(r.latency_ms_total for r in rows)
+    return {
+        "calls": calls,
+        "failures": sum(r.failures for r in rows),
+        "json_errors": sum(r.json_errors for r in rows),
+        "retries": sum(r.retries for r in rows),
+        "prompt_tokens": sum(r.prompt_tokens for r in rows),
+        "completion_tokens": sum(r.completion_tokens for r in rows),
+        "cost_usd": round(sum(r.cost_usd for r in rows), 6),
+        "latency_ms_avg": round(latency_total / calls, 1) if calls else None,
+        # Percentiles can't be merged across hours - report the worst hour
+        "latency_ms_p95_worst_hour": max((r.latency_ms_p95 or 0 for r in rows), default=None),
+        "latency_ms_p99_worst_hour": max((r.latency_ms_p99 or 0 for r in rows), default=None),
+    }
+
+
+async def get_usage_report(hours: int = 24) -> dict:
+    """
+    Cost and latency per feed, per caller and per hour. Read-only: stored rollups
+    for finished hours, and the hours the rollup job still rewrites computed from raw calls.
+    """
+    since = _hour_start(hours)
+    recent_start = max(since, _hour_start(ROLLUP_HOURS))
+    async with async_session_maker() as db:
+        result = await db.execute(
+            select(LLMUsageHourly)
+            .where(LLMUsageHourly.hour >= since, LLMUsageHourly.hour < recent_start)
+            .order_by(LLMUsageHourly.hour)
+        )
+        rows = list(result.scalars().all())
+        recent = sorted(await _rollup_calls(db, recent_start), key=lambda row: row["hour"])
+        rows += [SimpleNamespace(**row) for row in recent]
+
+    def grouped(key) -> dict[str, list]:
+        groups: dict[str, list] = defaultdict(list)
+        for row in rows:
+            groups[key(row)].append(row)
+        return groups
+
+    by_feed = [{"feed": feed or None, **_summarize(group)} for feed, group in grouped(lambda r: r.feed).items()]
+    by_feed.sort(key=lambda item: item["cost_usd"], reverse=True)
+    by_caller = [{"caller": caller, **_summarize(group)} for caller, group in grouped(lambda r: r.caller).items()]
+    by_hour = [
+        {
+            "hour": hour,
+            **_summarize(group),
+            # Percentiles of the slowest caller/feed/model group in the hour, not of the whole hour
+            "latency_ms_p50_worst_group": max((r.latency_ms_p50 or 0 for r in group), default=None),
+            "latency_ms_p99_worst_group": max((r.latency_ms_p99 or 0 for r in group), default=None),
+        }
+        for hour, group in grouped(lambda r: r.hour.isoformat()).items()
+    ]
+
+    return {
+        "hours": hours,
+        "totals": _summarize(rows),
+        "by_feed": by_feed,
+        "by_caller": by_caller,
+        "by_hour": by_hour,
+    }
+
+
+def _retryable_errors() -> tuple:
+    """Errors worth another attempt (openai is only imported once a call is made)"""
+    import openai
+    return (
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+
+# Copies of the OpenAI clients with SDK retries turned off
+_no_retry_clients: dict[int, object] = {}
+
+
+async def chat_json(
+    client,
+    caller: str,
+    messages: list[dict],
+    feed: Optional[str] = None,
+    model: str = "gpt-4o-mini",
+    temperature: float = 0.3,
+    max_tokens: int = 500
+) -> Optional[dict]:
+    """
+    Request a JSON completion and record the call.
+    Returns None for an empty reply; API and JSON decoding errors are recorded and re-raised.
+    """
+    retries = 0
+    started = time.perf_counter()
+    usage = None
+    outcome = "error"
+    llm_span = span("chat_json", caller=caller, model=model)
+    # Retries are done here instead of inside the SDK so they can be counted
+    retryable_errors = _retryable_errors()
+    no_retry_client = _no_retry_clients.get(id(client))
+    if no_retry_client is None:
+        no_retry_client = _no_retry_clients[id(client)] = client.with_options(max_retries=0)
+    try:
+        while True:
+            try:
+                response = await no_retry_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_format={"type": "json_object"}
+                )
+                break
+            except retryable_errors:
+                if retries >= settings.llm_max_retries:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** retries)
+                retries += 1
+
+        usage = response.usage
+        content = response.choices[0].message.content
+        if not content:
+            outcome = "empty"
+            return None
+        outcome = "json_error"
+        data = json.loads(content)
+        outcome = "ok"
+        return data
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        llm_telemetry.record(
+            caller=caller,
+            feed=feed,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            retries=retries,
+            outcome=outcome,
+        )
+        llm_span.end(
+            error=None if outcome == "ok" else outcome,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            retries=retries
+        )
@@ -0,0 +1,299 @@
+"""
+In-process metrics registry (Prometheus text format)
+Counters, gauges and histograms kept in plain dicts - no client library or
+external service. Collects HTTP request latency per route, SQL statement
+timing per fingerprint, connection pool checkout wait and event loop lag.
+"""
+import asyncio
+import logging
+import re
+import time
+from bisect import bisect_left
+from typing import Callable, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Distinct SQL fingerprints tracked before the rest are reported as "other"
+MAX_FINGERPRINTS = 200
+
+# Seconds between event loop lag probes
+LOOP_LAG_INTERVAL = 0.5
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0):
+        self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Gauge:
+    """A gauge set directly or computed by a callback at scrape time"""
+
+    def __init__(self, name: str, help: str, labels: tuple = (), callback: Optional[Callable[[], dict]] = None):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, *label_values):
+        self.values[label_values] = value
+
+    def render(self) -> list[str]:
+        values = self.values
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} callback failed: {e}")
+                values = {}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for label_values, value in values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [bucket counts..., +Inf count, sum]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values):
+        series = self.values.get(label_values)
+        if series is None:
+            series = [0] * (len(self.buckets) + 1) + [0.0]
+            self.values[label_values] = series
+        # Counts are stored per bucket and accumulated at render time
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        label_names = self.labels + ("le",)
+        for label_values, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(label_names, label_values + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "geonews_http_requests_total", "HTTP requests", ("method", "route", "status")
+))
+http_latency = registry.register(Histogram(
+    "geonews_http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+))
+http_in_flight = registry.register(Gauge(
+    "geonews_http_requests_in_flight", "HTTP requests being served"
+))
+sql_latency = registry.register(Histogram(
+    "geonews_sql_statement_duration_seconds", "SQL statement latency", ("fingerprint",)
+))
+pool_wait = registry.register(Histogram(
+    "geonews_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection"
+))
+loop_lag = registry.register(Histogram(
+    "geonews_event_loop_lag_seconds", "Event loop scheduling delay",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+))
+
+
+# --- HTTP ---------------------------------------------------------------------
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count and latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: dict = {}
+
+    def _route(self, scope) -> str:
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            path = "unmatched"
+            for candidate in scope["app"].routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    path = candidate.path
+                    break
+            self._route_paths[endpoint] = path
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        http_in_flight.set(http_in_flight.values.get((), 0) + 1)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.set(http_in_flight.values.get((), 0) - 1)
+            labels = (scope["method"], self._route(scope), str(status))
+            http_requests.inc(*labels)
+            http_latency.observe(time.perf_counter() - started, *labels)
+
+
+# --- SQL ------------------------------------------------------------------------
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAM_LISTS = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_SELECT_LIST = re.compile(r"^SELECT (.{60,}?) FROM ")
+_fingerprints: dict[str, str] = {}  # statement -> fingerprint
+_distinct_fingerprints: set[str] = set()
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so executions with different values share a label"""
+    cached = _fingerprints.get(statement)
+    if cached is not None:
+        return cached
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _LITERALS.sub("?", normalized)
+    normalized = _PARAM_LISTS.sub("(...)", normalized)
+    # Long column lists push the interesting part (FROM/WHERE) out of the label
+    normalized = _SELECT_LIST.sub("SELECT ... FROM ", normalized)
+    normalized = normalized[:300]
+    if normalized not in _distinct_fingerprints:
+        if len(_distinct_fingerprints) >= MAX_FINGERPRINTS:
+            normalized = "other"
+        else:
+            _distinct_fingerprints.add(normalized)
+    if len(_fingerprints) < MAX_FINGERPRINTS * 10:
+        _fingerprints[statement] = normalized
+    return normalized
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the execution context, so a statement that raises leaves nothing behind
+    if context is not None:
+        context._metrics_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_query_start", None)
+    if start is None:
+        return
+    sql_latency.observe(time.perf_counter() - start, fingerprint(statement))
+
+
+def _pool_gauges(pool) -> dict:
+    values = {}
+    for name in ("size", "checkedout", "overflow", "checkedin"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            values[(name,)] = method()
+    return values
+
+
+def instrument_engine(engine):
+    """Attach statement timing and pool instrumentation to an async engine"""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+    pool = sync_engine.pool
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            pool_wait.observe(time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+    registry.register(Gauge(
+        "geonews_db_pool_connections", "Connection pool state", ("state",),
+        callback=lambda: _pool_gauges(sync_engine.pool)
+    ))
+
+
+# --- Event loop -------------------------------------------------------------------
+
+_lag_task: Optional[asyncio.Task] = None
+
+
+async def _measure_loop_lag():
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        loop_lag.observe(max(0.0, time.perf_counter() - started - LOOP_LAG_INTERVAL))
+
+
+def start_loop_lag_monitor():
+    global _lag_task
+    if _lag_task is None or _lag_task.done():
+        _lag_task = asyncio.create_task(_measure_loop_lag())
+
+
+def stop_loop_lag_monitor():
+    global _lag_task
+    if _lag_task is not None:
+        _lag_task.cancel()
+        _lag_task = None
@@ -0,0 +1,347 @@
+"""
+Process-pool parse stage for RSS ingestion
+Feed documents are downloaded in threads and parsed/normalized in worker
+processes, so feedparser's sanitizing and the content hashing never run on
+the event loop shared with the API. Workers return compact picklable records.
+"""
+import asyncio
+import functools
+import hashlib
+import http.client
+import logging
+import math
+import multiprocessing
+import os
+import socket
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Seconds before a feed download is abandoned (per socket operation / whole download)
+FETCH_TIMEOUT = 30
+FETCH_DEADLINE = 90
+
+# Bytes read from the socket at a time, checking the download deadline in between
+READ_CHUNK = 64 * 1024
+
+# Feed downloads running at once
+FETCH_CONCURRENCY = 8
+
+# Redirects followed per download
+MAX_REDIRECTS = 5
+
+# Parse processes started when parse_workers is 0 - parsing a cycle's feeds
+# doesn't need more, and each process costs its own interpreter's memory
+MAX_DEFAULT_PARSE_WORKERS = 4
+
+
+@dataclass(frozen=True)
+class EntryRecord:
+    """A normalized RSS entry - everything ingestion needs, nothing feedparser-specific"""
+    title: str
+    full_text: str
+    link: str
+    pub_date: Optional[datetime]
+    content_hash: str
+
+
+@dataclass(frozen=True)
+class ParsedFeed:
+    """Result of parsing one feed document"""
+    feed_name: str
+    entries: tuple[EntryRecord, ...]
+    bozo_exception: Optional[str] = None
+    error: Optional[str] = None
+    parse_ms: float = 0.0
+
+
+@dataclass
+class FetchResult:
+    """A downloaded feed document with the timing of each phase"""
+    data: bytes = b""
+    headers: dict = field(default_factory=dict)
+    status: Optional[int] = None
+    dns_ms: float = 0.0
+    connect_ms: float = 0.0  # TCP + TLS handshake
+    ttfb_ms: float = 0.0  # Request sent until response headers
+    download_ms: float = 0.0  # Reading the body
+    redirects: int = 0
+
+
+class _Deadline:
+    """
+    Deadline of a whole download, applied through socket timeouts so a stalled
+    download fails in its own thread instead of being abandoned by the caller
+    """
+
+    def __init__(self, seconds: float):
+        self.at = time.monotonic() + seconds
+        self.connections = []
+
+    def timeout(self) -> float:
+        """Socket timeout for the next operation - never past the deadline"""
+        remaining = self.at - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout(f"timed out after {FETCH_DEADLINE}s")
+        return min(FETCH_TIMEOUT, remaining)
+
+    def shrink(self):
+        """Apply the remaining time to the open connections"""
+        timeout = self.timeout()
+        for connection in self.connections:
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+
+
+class FeedFetchError(Exception):
+    """Download failed - carries whatever timing was collected"""
+
+    def __init__(self, message: str, result: FetchResult):
+        super().__init__(message)
+        self.result = result
+
+
+def get_content_hash(text: str, url: str) -> str:
+    """Generate a unique hash for content deduplication"""
+    content = f"{text[:200]}_{url}"
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _entry_date(entry) -> Optional[datetime]:
+    parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+    if not parsed:
+        return None
+    try:
+        return datetime(*parsed[:6])
+    except Exception:
+        return None
+
+
+def _normalize_entry(entry, feed_url: str) -> EntryRecord:
+    title = entry.get('title', '')
+
+    # Try to get content from various fields
+    content = ''
+    if 'summary' in entry:
+        content = entry.get('summary', '')
+    elif 'description' in entry:
+        content = entry.get('description', '')
+    elif 'content' in entry:
+        content_list = entry.get('content', [])
+        if content_list and len(content_list) > 0:
+            content = content_list[0].get('value', '')
+
+    full_text = f"{title}\n\n{content}" if content else title
+    link = entry.get('link', feed_url)
+    return EntryRecord(
+        title=title,
+        full_text=full_text,
+        link=link,
+        pub_date=_entry_date(entry),
+        content_hash=get_content_hash(full_text, link),
+    )
+
+
+def parse_feed_document(feed_name: str, feed_url: str, data: bytes, headers: Optional[dict] = None) -> ParsedFeed:
+    """Parse and normalize a downloaded feed (runs in a worker process)"""
+    import feedparser
+
+    started = time.perf_counter()
+    try:
+        feed = feedparser.parse(data, response_headers=headers or {})
+        entries = tuple(_normalize_entry(entry, feed_url) for entry in feed.entries)
+        bozo = str(feed.bozo_exception) if feed.bozo else None
+        parse_ms = (time.perf_counter() - started) * 1000
+        return ParsedFeed(feed_name=feed_name, entries=entries, bozo_exception=bozo, parse_ms=parse_ms)
+    except Exception as e:
+        parse_ms = (time.perf_counter() - started) * 1000
+        return ParsedFeed(feed_name=feed_name, entries=(), error=f"parse failed: {e}", parse_ms=parse_ms)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_fetch_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def available_cpus() -> int:
+    """CPUs this process may use - affinity mask and cgroup v2 quota, not the host core count"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on macOS/Windows
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def pool_size() -> int:
+    return settings.parse_workers or min(available_cpus(), MAX_DEFAULT_PARSE_WORKERS)
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Lazily start the parse worker processes"""
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and DB connections is unsafe
+        _pool = ProcessPoolExecutor(max_workers=pool_size(), mp_context=multiprocessing.get_context("spawn"))
+        logger.info(f"⚙️  Parse pool started with {pool_size()} worker processes")
+    return _pool
+
+
+def shutdown_parse_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class _TimedConnection:
+    """
+    Connection mixin that records DNS and connect (TCP + TLS) time. Every resolved
+    address is tried in turn, like socket.create_connection.
+    """
+
+    def __init__(self, *args, timings: FetchResult, deadline: _Deadline, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timings = timings
+        self.deadline = deadline
+        self._create_connection = self._timed_create_connection
+
+    def connect(self):
+        started = time.perf_counter()
+        dns_before = self.timings.dns_ms
+        # Redirects reuse the first request's timeout - connect within what is left
+        self.timeout = self.deadline.timeout()
+        super().connect()
+        self.deadline.connections.append(self)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.timings.connect_ms += elapsed - (self.timings.dns_ms - dns_before)
+
+    def _timed_create_connection(self, address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+        host, port = address
+        started = time.perf_counter()
+        addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        self.timings.dns_ms += (time.perf_counter() - started) * 1000
+
+        last_error = None
+        for family, socktype, proto, _, sockaddr in addresses:
+            sock = socket.socket(family, socktype, proto)
+            try:
+                if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                sock.connect(sockaddr)
+                return sock
+            except OSError as e:
+                last_error = e
+                sock.close()
+        raise last_error or OSError(f"no addresses found for {host}")
+
+
+class _TimedHTTPConnection(_TimedConnection, http.client.HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnection, http.client.HTTPSConnection):
+    pass
+
+
+class _TimedHTTPHandler(urllib.request.HTTPHandler):
+    def __init__(self, timings: FetchResult, deadline: _Deadline):
+        super().__init__()
+        self.timings = timings
+        self.deadline = deadline
+
+    def http_open(self, req):
+        return self.do_open(
+            functools.partial(_TimedHTTPConnection, timings=self.timings, deadline=self.deadline), req
+        )
+
+
+class _TimedHTTPSHandler(urllib.request.HTTPSHandler):
+    def __init__(self, timings: FetchResult, deadline: _Deadline):
+        super().__init__()
+        self.timings = timings
+        self.deadline = deadline
+
+    def https_open(self, req):
+        return self.do_open(
+            functools.partial(_TimedHTTPSConnection, timings=self.timings, deadline=self.deadline),
+            req,
+            context=self._context,
+        )
+
+
+class _CountingRedirectHandler(urllib.request.HTTPRedirectHandler):
+    max_redirections = MAX_REDIRECTS
+
+    def __init__(self, timings: FetchResult):
+        super().__init__()
+        self.timings = timings
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        self.timings.redirects += 1
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def _download(feed_url: str) -> FetchResult:
+    """Blocking download through urllib (proxies, redirects) with DNS, connect, first byte and body timings"""
+    # Imported on first use so API-only processes never load feedparser
+    from feedparser import USER_AGENT
+
+    result = FetchResult()
+    deadline = _Deadline(FETCH_DEADLINE)
+    # The default opener's other handlers (HTTP(S)_PROXY, errors) are kept
+    opener = urllib.request.build_opener(
+        _TimedHTTPHandler(result, deadline), _TimedHTTPSHandler(result, deadline), _CountingRedirectHandler(result)
+    )
+    request = urllib.request.Request(feed_url, headers={"User-Agent": USER_AGENT, "Accept": "*/*"})
+    try:
+        started = time.perf_counter()
+        with opener.open(request, timeout=FETCH_TIMEOUT) as response:
+            # Until the headers of the final response, less the time spent resolving and connecting
+            result.ttfb_ms = (time.perf_counter() - started) * 1000 - result.dns_ms - result.connect_ms
+            result.status = response.status
+            started = time.perf_counter()
+            # A server trickling bytes resets a per-read timeout - bound the whole body by the deadline
+            body = bytearray()
+            while True:
+                deadline.shrink()
+                chunk = response.read1(READ_CHUNK)
+                if not chunk:
+                    break
+                body += chunk
+            result.data = bytes(body)
+            result.download_ms = (time.perf_counter() - started) * 1000
+            result.headers = {key.lower(): value for key, value in response.headers.items()}
+        return result
+    except urllib.error.HTTPError as e:
+        result.status = e.code
+        raise FeedFetchError(f"HTTP {e.code}", result) from e
+    except Exception as e:
+        raise FeedFetchError(f"{type(e).__name__}: {e}", result) from e
+
+
+async def fetch_feed(feed_name: str, feed_url: str) -> FetchResult:
+    """Download a feed document in a thread"""
+    global _fetch_semaphore
+    if _fetch_semaphore is None:
+        _fetch_semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+    async with _fetch_semaphore:
+        # The deadline is enforced inside the download, so the thread ends with it
+        return await asyncio.to_thread(_download, feed_url)
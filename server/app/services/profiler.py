@@ -0,0 +1,317 @@
+"""
+On-demand profiling of API requests and scrape cycles
+A profile session runs cProfile together with a sampling thread that records
+the event loop thread's stack, and optionally tracemalloc. Results are
+stored in the profile_files table - so profiles of a separate worker can be
+listed and downloaded through any API process - as .pstats (snakeviz,
+pstats), .collapsed (flame graph tools, speedscope) and .txt summaries.
+Only one session runs at a time.
+"""
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Callable, Optional
+from urllib.parse import parse_qs
+
+from sqlalchemy import select, delete
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import ProfileFile
+from app.services.worker_requests import PROFILE_CYCLES, consume_cycle
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.005
+
+# Lines in the text summaries
+SUMMARY_LINES = 40
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# Only one cProfile can be active per process
+_session_lock = threading.Lock()
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack into collapsed-stack counts"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def _label(code) -> str:
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                frames.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class ProfileSession:
+    """cProfile + stack sampling (+ tracemalloc) around a block of work"""
+
+    def __init__(self, label: str, memory: bool = False):
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")[:-3]
+        self.profile_id = f"{stamp}-{_SAFE_NAME.sub('_', label).strip('_')[:60]}"
+        self.label = label
+        self.memory = memory
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident())
+        self.started = 0.0
+        self.duration = 0.0
+        self._started_tracemalloc = False
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._peak_bytes = 0
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(settings.profile_tracemalloc_frames)
+            self._started_tracemalloc = True
+        self.started = time.perf_counter()
+        self.profiler.enable()
+        self.sampler.start()
+
+    def stop(self):
+        self.sampler.stop()
+        self.profiler.disable()
+        self.duration = time.perf_counter() - self.started
+        if self.memory and tracemalloc.is_tracing():
+            self._snapshot = tracemalloc.take_snapshot()
+            self._peak_bytes = tracemalloc.get_traced_memory()[1]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+    def render(self) -> dict[str, bytes]:
+        """Produce the profile files (blocking - run it in a thread). Returns name -> content."""
+        with tempfile.TemporaryDirectory(prefix="profile-") as tmp_dir:
+            files = self._write(os.path.join(tmp_dir, self.profile_id))
+            contents = {}
+            for name in files:
+                with open(os.path.join(tmp_dir, name), "rb") as f:
+                    contents[name] = f.read()
+            return contents
+
+    def _write(self, base: str) -> list[str]:
+        files = []
+
+        self.profiler.dump_stats(f"{base}.pstats")
+        files.append(f"{self.profile_id}.pstats")
+
+        with open(f"{base}.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in self.sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        files.append(f"{self.profile_id}.collapsed")
+
+        out = io.StringIO()
+        out.write(f"{self.label}: {self.duration * 1000:.1f} ms, {sum(self.sampler.stacks.values())} stack samples\n\n")
+        stats = pstats.Stats(self.profiler, stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_LINES)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(SUMMARY_LINES)
+        with open(f"{base}.txt", "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+        files.append(f"{self.profile_id}.txt")
+
+        if self._snapshot is not None:
+            self._snapshot.dump(f"{base}.tracemalloc")
+            files.append(f"{self.profile_id}.tracemalloc")
+            with open(f"{base}.memory.txt", "w", encoding="utf-8") as f:
+                f.write(_memory_summary(self._snapshot, self._peak_bytes))
+            files.append(f"{self.profile_id}.memory.txt")
+        return files
+
+
+def _memory_summary(snapshot: tracemalloc.Snapshot, peak_bytes: int) -> str:
+    """Allocation hot spots still alive at the end of the session"""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+    by_line = snapshot.statistics("lineno")
+    lines = [
+        f"Peak traced memory: {peak_bytes / 1024 / 1024:.1f} MiB",
+        f"Live at end: {sum(s.size for s in by_line) / 1024 / 1024:.1f} MiB in {sum(s.count for s in by_line)} blocks",
+        "",
+        f"Top {SUMMARY_LINES} lines:",
+    ]
+    lines.extend(str(stat) for stat in by_line[:SUMMARY_LINES])
+    lines.append("")
+    lines.append("Top 10 tracebacks:")
+    for stat in snapshot.statistics("traceback")[:10]:
+        lines.append(f"{stat.count} blocks, {stat.size / 1024:.1f} KiB")
+        lines.extend(f"    {line}" for line in stat.traceback.format())
+    return "\n".join(lines) + "\n"
+
+
+@asynccontextmanager
+async def profile_session(label: str, memory: bool = False):
+    """
+    Profile the enclosed block. Yields the session, or None when another
+    session is already running. Work of other coroutines sharing the event
+    loop during the block is included in the profile.
+    """
+    if not _session_lock.acquire(blocking=False):
+        yield None
+        return
+    session = ProfileSession(label, memory=memory)
+    try:
+        session.start()
+        try:
+            yield session
+        finally:
+            session.stop()
+    finally:
+        _session_lock.release()
+    try:
+        # Serializing the stats and snapshot takes a while - off the event loop
+        files = await asyncio.to_thread(session.render)
+        await store_profile(session.profile_id, files)
+        logger.info(f"📊 Profile {session.profile_id} saved ({session.duration * 1000:.0f} ms): {', '.join(files)}")
+    except Exception as e:
+        logger.error(f"Failed to save profile {session.profile_id}: {e}")
+
+
+# --- Scrape cycles -----------------------------------------------------------
+
+# PROFILE_SCRAPE_CYCLES applies to the cycles of this process after startup
+_startup_cycles = settings.profile_scrape_cycles
+
+
+@asynccontextmanager
+async def scrape_cycle_profile():
+    """
+    Profile this scrape cycle if one was requested (PROFILE_SCRAPE_CYCLES or
+    /api/admin/profiles/scrape from any process) - otherwise does nothing
+    """
+    global _startup_cycles
+    wanted = _startup_cycles > 0 or await consume_cycle(PROFILE_CYCLES)
+    if not wanted:
+        yield None
+        return
+    async with profile_session("scrape-cycle", memory=True) as session:
+        if session is not None and _startup_cycles > 0:
+            _startup_cycles -= 1
+        yield session
+
+
+# --- API requests --------------------------------------------------------------
+
+def _wants_profile(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value.strip().lower() in (b"1", b"true", b"yes")
+    query = scope.get("query_string", b"")
+    if b"profile" not in query:
+        return False
+    values = parse_qs(query.decode("latin-1")).get("profile", [])
+    return any(v.lower() in ("1", "true", "yes") for v in values)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request sent with `X-Profile: 1` or `?profile=1` by an admin.
+    The response carries X-Profile-Id; files are listed under /api/admin/profiles.
+    """
+
+    def __init__(self, app, is_authorized: Callable[[Optional[str], Optional[str]], bool]):
+        self.app = app
+        self.is_authorized = is_authorized
+
+    def _authorized(self, scope) -> bool:
+        headers = {name: value.decode("latin-1") for name, value in scope["headers"]
+                   if name in (b"x-admin-token", b"authorization")}
+        return self.is_authorized(headers.get(b"x-admin-token"), headers.get(b"authorization"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope) or not self._authorized(scope):
+            await self.app(scope, receive, send)
+            return
+
+        label = f"{scope['method']}-{scope['path']}"
+        profile_id = None
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", (profile_id or "busy").encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        async with profile_session(label) as session:
+            profile_id = session.profile_id if session else None
+            await self.app(scope, receive, send_wrapper)
+
+
+# --- Stored profiles ---------------------------------------------------------------
+
+async def store_profile(profile_id: str, files: dict[str, bytes]):
+    """Save a profile's files and drop all but the newest profile_keep profiles"""
+    async with async_session_maker() as db:
+        for name, content in files.items():
+            db.add(ProfileFile(name=name, profile_id=profile_id, size=len(content), content=content))
+        await db.flush()
+        # Profile ids start with their timestamp, so they sort by age
+        oldest_kept = (
+            select(ProfileFile.profile_id)
+            .group_by(ProfileFile.profile_id)
+            .order_by(ProfileFile.profile_id.desc())
+            .offset(settings.profile_keep - 1)
+            .limit(1)
+            .scalar_subquery()
+        )
+        await db.execute(delete(ProfileFile).where(ProfileFile.profile_id < oldest_kept))
+        await db.commit()
+
+
+async def list_profiles() -> list[dict]:
+    """Saved profiles, newest first"""
+    async with async_session_maker() as db:
+        result = await db.execute(
+            select(ProfileFile.profile_id, ProfileFile.name, ProfileFile.size)
+            .order_by(ProfileFile.profile_id.desc(), ProfileFile.name)
+        )
+        profiles: dict[str, dict] = {}
+        for profile_id, name, size in result.all():
+            entry = profiles.setdefault(profile_id, {"profile_id": profile_id, "files": [], "bytes": 0})
+            entry["files"].append(name)
+            entry["bytes"] += size
+        return list(profiles.values())
+
+
+async def get_profile_file(name: str) -> Optional[bytes]:
+    """Content of a saved profile file, or None if the name isn't one"""
+    if _SAFE_NAME.search(name) or name.startswith("."):
+        return None
+    async with async_session_maker() as db:
+        result = await db.execute(select(ProfileFile.content).where(ProfileFile.name == name))
+        return result.scalar()
@@ -0,0 +1,149 @@
+"""
+In-process result cache for read endpoints
+Stores serialized response bodies keyed by normalized query parameters and
+invalidated by a data generation counter that the ingestion writer bumps on commit
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Data generation - bumped every time new data is committed
+_generation = 0
+
+
+def get_generation() -> int:
+    """Get the current data generation"""
+    return _generation
+
+
+def bump_generation() -> int:
+    """Mark all cached results as stale (call after committing new data)"""
+    global _generation
+    _generation += 1
+    result_cache.clear()
+    return _generation
+
+
+class QueryResultCache:
+    """LRU cache of serialized bodies bounded by total size in bytes"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float, bytes]] = OrderedDict()
+        self._size = 0
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0  # Requests that waited for another request's build
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, body = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return body
+
+    def set(self, key: tuple, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic(), body)
+        self._size += len(body)
+        # Evict least recently used entries until we fit
+        while self._size > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def _remove(self, key: tuple):
+        _, body = self._entries.pop(key)
+        self._size -= len(body)
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "generation": _generation,
+        }
+
+
+result_cache = QueryResultCache(
+    max_bytes=settings.query_cache_max_bytes,
+    ttl_seconds=settings.query_cache_ttl,
+)
+
+
+def make_key(namespace: str, **params) -> tuple:
+    """Build a cache key from normalized query parameters"""
+    normalized = []
+    for name, value in sorted(params.items()):
+        if isinstance(value, str):
+            value = value.strip().lower() or None
+        normalized.append((name, value))
+    return (namespace, _generation, tuple(normalized))
+
+
+async def get_or_build(key: tuple, build: Callable[[], Awaitable[bytes]]) -> tuple[bytes, bool]:
+    """
+    Return (body, hit) for a cache key, building the body on a miss.
+    Concurrent misses for the same key share a single build - requests that
+    waited for another request's build count as coalesced and report a hit.
+    """
+    body = result_cache.get(key)
+    if body is not None:
+        result_cache.hits += 1
+        return body, True
+
+    pending = result_cache._inflight.get(key)
+    while pending is not None:
+        try:
+            body = await asyncio.shield(pending)
+            result_cache.coalesced += 1
+            return body, True
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            # The building request went away (client disconnect) - build it ourselves
+            pending = result_cache._inflight.get(key)
+
+    result_cache.misses += 1
+    future = asyncio.get_running_loop().create_future()
+    result_cache._inflight[key] = future
+    try:
+        body = await build()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        # Avoid "exception was never retrieved" when nobody else was waiting
+        future.exception()
+        raise
+    finally:
+        result_cache._inflight.pop(key, None)
+
+    future.set_result(body)
+    # Don't store results computed against a generation that is already stale
+    if key[1] == _generation:
+        result_cache.set(key, body)
+    return body, False
@@ -0,0 +1,191 @@
+"""
+Recap input compaction
+Groups near-identical reports of the same incident (close in space and time, similar text)
+so the recap prompt lists one representative per group within a token budget
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Optional, Sequence
+
+from app.config import get_settings
+from app.services.similarity import shingles, jaccard, haversine_km, normalize_text, estimate_tokens
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Representative summaries are cut to this length when the prompt is over budget
+TRUNCATED_SUMMARY_CHARS = 200
+
+
+@dataclass
+class EventGroup:
+    """Reports of one incident, represented by its most detailed member"""
+    representative: Any
+    text_shingles: frozenset
+    count: int = 1
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+
+
+@dataclass
+class CompactedEvents:
+    """Prompt text for a list of events plus compaction statistics"""
+    text: str
+    input_events: int
+    groups: int
+    dropped_groups: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    def metadata(self) -> dict:
+        return {
+            "input_events": self.input_events,
+            "groups": self.groups,
+            "dropped_groups": self.dropped_groups,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "compression_ratio": round(self.tokens_before / self.tokens_after, 2) if self.tokens_after else 1.0,
+        }
+
+
+def _event_text(event: Any) -> str:
+    return f"{event.original_title or ''} {event.summary_text or ''}"
+
+
+def _same_place(a: Any, b: Any, max_distance_km: float) -> bool:
+    """Both events have coordinates within range, or share the same (non-empty) location name"""
+    if None not in (a.latitude, a.longitude, b.latitude, b.longitude):
+        return haversine_km(a.latitude, a.longitude, b.latitude, b.longitude) <= max_distance_km
+    # Two events without any location are not known to be in the same place
+    location = normalize_text(a.location_name)
+    return bool(location) and location == normalize_text(b.location_name)
+
+
+def group_events(
+    events: Sequence[Any],
+    max_distance_km: Optional[float] = None,
+    max_gap: Optional[timedelta] = None,
+    min_similarity: Optional[float] = None
+) -> list[EventGroup]:
+    """Greedily assign events (in time order) to the most similar open group"""
+    max_distance_km = max_distance_km if max_distance_km is not None else settings.recap_group_distance_km
+    max_gap = max_gap if max_gap is not None else timedelta(hours=settings.recap_group_gap_hours)
+    min_similarity = min_similarity if min_similarity is not None else settings.recap_group_similarity
+    
+    ordered = sorted(events, key=lambda e: e.timestamp_detected or datetime.min)
+    groups: list[EventGroup] = []
+    
+    for event in ordered:
+        event_shingles = shingles(_event_text(event))
+        timestamp = event.timestamp_detected
+        best_group, best_similarity = None, min_similarity
+        
+        for group in groups:
+            if timestamp and group.last_seen and timestamp - group.last_seen > max_gap:
+                continue
+            if not _same_place(group.representative, event, max_distance_km):
+                continue
+            similarity = jaccard(group.text_shingles, event_shingles)
+            if similarity >= best_similarity:
+                best_group, best_similarity = group, similarity
+        
+        if best_group is None:
+            groups.append(EventGroup(
+                representative=event,
+                text_shingles=event_shingles,
+                first_seen=timestamp,
+                last_seen=timestamp
+            ))
+            continue
+        
+        best_group.count += 1
+        if timestamp:
+            best_group.first_seen = min(filter(None, (best_group.first_seen, timestamp)))
+            best_group.last_seen = max(filter(None, (best_group.last_seen, timestamp)))
+        # Keep the most detailed report as the representative
+        if len(event.summary_text or "") > len(best_group.representative.summary_text or ""):
+            best_group.representative = event
+            best_group.text_shingles = event_shingles
+    
+    return groups
+
+
+def format_event_line(event: Any, summary_chars: Optional[int] = None) -> str:
+    """Render one event for the recap prompt"""
+    summary = event.summary_text or ""
+    if summary_chars and len(summary) > summary_chars:
+        summary = summary[:summary_chars] + "…"
+    line = ""
+    if event.original_title:
+        line += f"{event.original_title} - "
+    line += summary
+    if event.location_name:
+        line += f" ({event.location_name})"
+    line += f" [קטגוריה: {event.category}]"
+    return line
+
+
+def _format_group(group: EventGroup, summary_chars: Optional[int] = None) -> str:
+    line = format_event_line(group.representative, summary_chars)
+    if group.count > 1:
+        span = ""
+        if group.first_seen and group.last_seen:
+            span = f", {group.first_seen:%d/%m %H:%M} - {group.last_seen:%d/%m %H:%M}"
+        line += f" ({group.count} דיווחים{span})"
+    return line
+
+
+def _numbered(lines: list[str]) -> str:
+    return "\n".join(f"{i}. {line}" for i, line in enumerate(lines, 1))
+
+
+def compact_for_prompt(events: Sequence[Any], token_budget: Optional[int] = None) -> CompactedEvents:
+    """Group events and render one line per group within the token budget"""
+    token_budget = token_budget or settings.recap_token_budget
+    tokens_before = estimate_tokens(_numbered([format_event_line(e) for e in events]))
+    
+    groups = group_events(events)
+    text = _numbered([_format_group(g) for g in groups])
+    dropped = 0
+    
+    if estimate_tokens(text) > token_budget:
+        # First shorten the representatives' summaries
+        text = _numbered([_format_group(g, TRUNCATED_SUMMARY_CHARS) for g in groups])
+    
+    if estimate_tokens(text) > token_budget:
+        # Then keep the most reported groups that fit, in chronological order
+        lines = [_format_group(g, TRUNCATED_SUMMARY_CHARS) for g in groups]
+        by_priority = sorted(range(len(groups)), key=lambda i: (groups[i].count, i), reverse=True)
+        kept, used = set(), 0
+        for i in by_priority:
+            cost = estimate_tokens(lines[i])
+            if used + cost > token_budget:
+                continue
+            kept.add(i)
+            used += cost
+        dropped = len(groups) - len(kept)
+        text = _numbered([lines[i] for i in sorted(kept)])
+        logger.warning(f"Recap prompt over token budget: dropped {dropped} of {len(groups)} event groups")
+    
+    return CompactedEvents(
+        text=text,
+        input_events=len(events),
+        groups=len(groups),
+        dropped_groups=dropped,
+        tokens_before=tokens_before,
+        tokens_after=estimate_tokens(text),
+    )
+
+
+def merge_metadata(parts: list[CompactedEvents]) -> dict:
+    """Combine compaction statistics of several chunks"""
+    total = CompactedEvents(
+        text="",
+        input_events=sum(p.input_events for p in parts),
+        groups=sum(p.groups for p in parts),
+        dropped_groups=sum(p.dropped_groups for p in parts),
+        tokens_before=sum(p.tokens_before for p in parts),
+        tokens_after=sum(p.tokens_after for p in parts),
+    )
+    return total.metadata()
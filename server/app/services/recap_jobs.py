@@ -0,0 +1,379 @@
+"""
+Asynchronous recap jobs
+Recap generation runs in background jobs: identical in-flight requests share one job
+(single-flight), a global limit caps concurrent generations, and jobs nobody waits
+for anymore are cancelled.
+
+Job state is mirrored to the recap_jobs table, so with several API workers a poll
+can land on any of them: the worker running a job keeps its row up to date and
+heartbeats it, the others answer from the row and record their polls in it.
+The concurrency limit is cluster-wide: a job runs only while it holds one of
+recap_max_jobs slot leases.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update, delete
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import RecapJobRecord
+from app.services.leases import INSTANCE_ID, release_lease, try_acquire_lease
+from app.services.recap_store import get_or_generate_recap
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Seconds between sweeps for abandoned and expired jobs (and job heartbeats)
+SWEEP_INTERVAL = 5
+
+# An unfinished job whose worker missed this many heartbeats is considered dead
+STALE_AFTER = timedelta(seconds=SWEEP_INTERVAL * 6)
+
+# Seconds between reads of a job running on another worker while waiting for it
+REMOTE_POLL_INTERVAL = 1
+
+# Seconds between attempts to take a generation slot while all are busy
+SLOT_POLL_INTERVAL = 2
+
+# Seconds between polled_at writes for one job from this worker
+TOUCH_INTERVAL = SWEEP_INTERVAL
+
+SLOT_LEASE_PREFIX = "recap-slot:"
+
+UNFINISHED = ("queued", "running")
+
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    return (value - datetime(1970, 1, 1)).total_seconds() if value else None
+
+
+@dataclass
+class RecapJob:
+    """A single recap generation shared by every request for the same key"""
+    id: str
+    source_name: str
+    hours: int
+    force: bool
+    status: str = "queued"  # queued, running, done, failed, cancelled
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    waiters: int = 0
+    last_interest: float = field(default_factory=time.monotonic)
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+    remote: bool = False  # Running on another worker - state read from its row
+    slot: Optional[str] = None  # Generation slot lease held while running
+
+    @classmethod
+    def from_record(cls, record: RecapJobRecord) -> "RecapJob":
+        job = cls(
+            id=record.id,
+            source_name=record.source_name,
+            hours=record.hours,
+            force=record.force,
+            status=record.status,
+            result=json.loads(record.result_json) if record.result_json else None,
+            error=record.error,
+            created_at=_epoch(record.created_at),
+            finished_at=_epoch(record.finished_at),
+            remote=True,
+        )
+        if job.status in UNFINISHED and datetime.utcnow() - record.heartbeat_at > STALE_AFTER:
+            job.status = "failed"
+            job.error = "The worker running this job stopped"
+        return job
+
+    @property
+    def key(self) -> tuple:
+        return (self.source_name, self.hours, self.force)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "source_name": self.source_name,
+            "hours": self.hours,
+            "status": self.status,
+            "success": self.status == "done" and self.result is not None,
+            "recap": self.result,
+            "error": self.error,
+            "waiters": self.waiters,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class RecapJobManager:
+    """Single-flight registry of recap jobs with a global concurrency limit"""
+
+    def __init__(self, max_concurrent: int, abandon_after: float, keep_finished_for: float):
+        self.max_concurrent = max_concurrent
+        self.abandon_after = abandon_after
+        self.keep_finished_for = keep_finished_for
+        self._jobs: dict[str, RecapJob] = {}
+        # Last polled_at write per job id, so polls don't UPDATE on every read
+        self._touched: dict[str, float] = {}
+        self._inflight: dict[tuple, RecapJob] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+    async def get(self, job_id: str) -> Optional[RecapJob]:
+        """A job of this worker, or the stored state of a job from another worker"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.last_interest = time.monotonic()
+            return job
+        return await self._load(job_id, touch=self._touch_due(job_id))
+
+    async def submit(self, source_name: str, hours: int, force: bool = False) -> tuple[RecapJob, bool]:
+        """Get the in-flight job for this request or start a new one. Returns (job, coalesced)."""
+        key = (source_name, hours, force)
+        job = self._inflight.get(key)
+        if job is not None:
+            job.last_interest = time.monotonic()
+            return job, True
+
+        job = await self._find_remote(source_name, hours, force)
+        if job is not None:
+            return job, True
+
+        job = RecapJob(id=uuid.uuid4().hex, source_name=source_name, hours=hours, force=force)
+        try:
+            async with async_session_maker() as db:
+                db.add(RecapJobRecord(id=job.id, source_name=source_name, hours=hours, force=force))
+                await db.commit()
+            # Another worker may have stored the same request at the same time - the oldest row wins
+            winner = await self._find_remote(source_name, hours, force, touch=False)
+            if winner is not None and winner.id != job.id:
+                async with async_session_maker() as db:
+                    await db.execute(delete(RecapJobRecord).where(RecapJobRecord.id == job.id))
+                    await db.commit()
+                return winner, True
+        except Exception as e:
+            # The job still runs - only polls through other workers miss it
+            logger.error(f"Failed to store recap job {job.id[:8]}: {e}")
+        # A local submit may have raced us while we talked to the database
+        existing = self._inflight.get(key)
+        if existing is not None:
+            return existing, True
+        self._jobs[job.id] = job
+        self._inflight[key] = job
+        job.task = asyncio.create_task(self._run(job))
+
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep())
+        return job, False
+
+    async def wait(self, job: RecapJob, timeout: float) -> RecapJob:
+        """Wait up to timeout for a job to finish. Returns its latest state."""
+        if job.remote:
+            return await self._wait_remote(job, timeout)
+        job.waiters += 1
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            job.waiters -= 1
+            job.last_interest = time.monotonic()
+        return job
+
+    async def _wait_remote(self, job: RecapJob, timeout: float) -> RecapJob:
+        deadline = time.monotonic() + timeout
+        last_touch = time.monotonic()
+        while not job.finished and time.monotonic() < deadline:
+            await asyncio.sleep(min(REMOTE_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+            # Record interest about as often as the owner sweeps, not on every read
+            touch = time.monotonic() - last_touch >= SWEEP_INTERVAL
+            if touch:
+                last_touch = time.monotonic()
+            job = await self._load(job.id, touch=touch) or job
+        return job
+
+    async def _load(self, job_id: str, touch: bool) -> Optional[RecapJob]:
+        async with async_session_maker() as db:
+            if touch:
+                await db.execute(
+                    update(RecapJobRecord).where(RecapJobRecord.id == job_id).values(polled_at=datetime.utcnow())
+                )
+                await db.commit()
+            record = await db.get(RecapJobRecord, job_id)
+            return RecapJob.from_record(record) if record else None
+
+    def _touch_due(self, job_id: str) -> bool:
+        """Whether a poll of this job should refresh its polled_at (at most every TOUCH_INTERVAL)"""
+        now = time.monotonic()
+        if now - self._touched.get(job_id, 0.0) < TOUCH_INTERVAL:
+            return False
+        if len(self._touched) > 1000:
+            self._touched = {k: t for k, t in self._touched.items() if now - t < self.keep_finished_for}
+        self._touched[job_id] = now
+        return True
+
+    async def _find_remote(self, source_name: str, hours: int, force: bool, touch: bool = True) -> Optional[RecapJob]:
+        """The oldest unfinished job for the same request (normally running on another worker)"""
+        try:
+            async with async_session_maker() as db:
+                query = (
+                    select(RecapJobRecord)
+                    .where(
+                        RecapJobRecord.source_name == source_name,
+                        RecapJobRecord.hours == hours,
+                        RecapJobRecord.force == force,
+                        RecapJobRecord.status.in_(UNFINISHED),
+                        RecapJobRecord.heartbeat_at >= datetime.utcnow() - STALE_AFTER
+                    )
+                    .order_by(RecapJobRecord.created_at, RecapJobRecord.id)
+                    .limit(1)
+                )
+                record = (await db.execute(query)).scalar_one_or_none()
+                if record is None:
+                    return None
+                if touch and self._touch_due(record.id):
+                    record.polled_at = datetime.utcnow()
+                    await db.commit()
+                return RecapJob.from_record(record)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not look up shared recap jobs: {e}")
+            return None
+
+    async def _store(self, job: RecapJob, **values):
+        try:
+            async with async_session_maker() as db:
+                await db.execute(update(RecapJobRecord).where(RecapJobRecord.id == job.id).values(**values))
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to update recap job {job.id[:8]}: {e}")
+
+    async def _acquire_slot(self, job: RecapJob):
+        """Wait for one of the cluster-wide generation slots"""
+        holder = f"{INSTANCE_ID}:{job.id}"
+        while True:
+            for i in range(self.max_concurrent):
+                name = f"{SLOT_LEASE_PREFIX}{i}"
+                try:
+                    if await try_acquire_lease(name, STALE_AFTER.total_seconds(), holder):
+                        job.slot = name
+                        return
+                except Exception as e:
+                    logger.warning(f"⚠️  Recap slot lease {name} failed: {e}")
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+
+    async def _release_slot(self, job: RecapJob):
+        if job.slot is None:
+            return
+        try:
+            await release_lease(job.slot, f"{INSTANCE_ID}:{job.id}")
+        except Exception as e:
+            # It simply expires
+            logger.warning(f"⚠️  Could not release recap slot {job.slot}: {e}")
+        job.slot = None
+
+    async def _run(self, job: RecapJob):
+        try:
+            await self._acquire_slot(job)
+            job.status = "running"
+            await self._store(job, status="running")
+            logger.info(f"Recap job {job.id[:8]} started for {job.source_name} ({job.hours}h) in {job.slot}")
+            async with async_session_maker() as db:
+                job.result = await get_or_generate_recap(db, job.source_name, job.hours, force=job.force)
+            job.status = "done" if job.result is not None else "failed"
+            if job.result is None:
+                job.error = "Failed to generate recap"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            job.error = "Cancelled - nobody was waiting for the result"
+            logger.info(f"Recap job {job.id[:8]} for {job.source_name} cancelled")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Recap job {job.id[:8]} for {job.source_name} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            job.last_interest = time.monotonic()
+            self._inflight.pop(job.key, None)
+            job.done.set()
+        await self._release_slot(job)
+        await self._store(
+            job,
+            status=job.status,
+            result_json=json.dumps(job.result, ensure_ascii=False, default=str) if job.result is not None else None,
+            error=job.error,
+            finished_at=datetime.utcnow(),
+        )
+
+    async def _sweep(self):
+        """Heartbeat running jobs, cancel abandoned ones and forget old finished ones"""
+        while self._jobs:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            running = [job for job in self._jobs.values() if not job.finished]
+            polled_at = await self._heartbeat(running)
+
+            now = time.monotonic()
+            for job in list(self._jobs.values()):
+                idle = now - job.last_interest
+                if job.id in polled_at:
+                    # Polls that went through other workers count as interest too
+                    idle = min(idle, (datetime.utcnow() - polled_at[job.id]).total_seconds())
+                if job.finished:
+                    if idle > self.keep_finished_for:
+                        del self._jobs[job.id]
+                elif job.waiters == 0 and idle > self.abandon_after and job.task:
+                    job.task.cancel()
+
+    async def _heartbeat(self, running: list[RecapJob]) -> dict[str, datetime]:
+        """Refresh the heartbeat of this worker's jobs, expire old rows. Returns last poll per job."""
+        now = datetime.utcnow()
+        for job in running:
+            # Renew the slot leases along with the heartbeat
+            if job.slot is not None:
+                try:
+                    await try_acquire_lease(job.slot, STALE_AFTER.total_seconds(), f"{INSTANCE_ID}:{job.id}")
+                except Exception as e:
+                    logger.warning(f"⚠️  Could not renew recap slot {job.slot}: {e}")
+        try:
+            async with async_session_maker() as db:
+                polled_at = {}
+                if running:
+                    ids = [job.id for job in running]
+                    await db.execute(
+                        update(RecapJobRecord).where(RecapJobRecord.id.in_(ids)).values(heartbeat_at=now)
+                    )
+                    result = await db.execute(
+                        select(RecapJobRecord.id, RecapJobRecord.polled_at).where(RecapJobRecord.id.in_(ids))
+                    )
+                    polled_at = dict(result.all())
+                await db.execute(
+                    delete(RecapJobRecord).where(
+                        RecapJobRecord.finished_at < now - timedelta(seconds=self.keep_finished_for)
+                    )
+                )
+                await db.commit()
+                return polled_at
+        except Exception as e:
+            logger.warning(f"⚠️  Recap job heartbeat failed: {e}")
+            return {}
+
+    def stats(self) -> dict:
+        statuses: dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {"jobs": len(self._jobs), "in_flight": len(self._inflight), "by_status": statuses}
+
+
+recap_jobs = RecapJobManager(
+    max_concurrent=settings.recap_max_jobs,
+    abandon_after=settings.recap_job_abandon_seconds,
+    keep_finished_for=settings.recap_job_ttl_seconds,
+)
@@ -0,0 +1,159 @@
+"""
+Daily recap store
+Reuses generated recaps until new events arrive for the source, refreshes them
+incrementally from the previous recap, and precomputes recaps for the busiest sources
+"""
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, func, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import NewsEvent, StoredRecap
+from app.services.daily_recap import (
+    get_available_sources,
+    get_events_by_source,
+    generate_daily_recap,
+    update_daily_recap,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def window_bucket(now: Optional[datetime] = None) -> datetime:
+    """Round a time down to the start of its recap bucket"""
+    now = now or datetime.utcnow()
+    bucket_seconds = settings.recap_bucket_minutes * 60
+    epoch_seconds = int((now - datetime(1970, 1, 1)).total_seconds())
+    return datetime(1970, 1, 1) + timedelta(seconds=epoch_seconds - epoch_seconds % bucket_seconds)
+
+
+async def get_source_watermark(db: AsyncSession, source_name: str, hours: int) -> tuple[Optional[int], int]:
+    """Get (newest event id, event count) for a source within the time range"""
+    cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+    query = (
+        select(func.max(NewsEvent.id), func.count(NewsEvent.id))
+        .where(NewsEvent.source_name == source_name)
+        .where(NewsEvent.timestamp_detected >= cutoff_time)
+    )
+    row = (await db.execute(query)).one()
+    return row[0], row[1] or 0
+
+
+async def get_latest_stored_recap(db: AsyncSession, source_name: str, hours: int) -> Optional[StoredRecap]:
+    query = (
+        select(StoredRecap)
+        .where(StoredRecap.source_name == source_name, StoredRecap.hours == hours)
+        .order_by(StoredRecap.window_end.desc())
+        .limit(1)
+    )
+    return (await db.execute(query)).scalar_one_or_none()
+
+
+async def save_recap(
+    db: AsyncSession,
+    source_name: str,
+    hours: int,
+    recap: dict,
+    last_event_id: Optional[int],
+    event_count: int,
+    full_generated_at: Optional[datetime] = None
+):
+    """
+    Store a recap under the current bucket and drop expired ones.
+    full_generated_at is when the chain of incremental updates started (now for a full generation).
+    """
+    bucket = window_bucket()
+    query = select(StoredRecap).where(
+        StoredRecap.source_name == source_name,
+        StoredRecap.hours == hours,
+        StoredRecap.window_end == bucket
+    )
+    stored = (await db.execute(query)).scalar_one_or_none()
+    if stored is None:
+        stored = StoredRecap(source_name=source_name, hours=hours, window_end=bucket)
+        db.add(stored)
+    
+    stored.last_event_id = last_event_id
+    stored.event_count = event_count
+    stored.recap_json = json.dumps(recap, ensure_ascii=False)
+    stored.generated_at = datetime.utcnow()
+    stored.full_generated_at = full_generated_at or stored.generated_at
+    
+    await db.execute(
+        delete(StoredRecap).where(
+            StoredRecap.source_name == source_name,
+            StoredRecap.hours == hours,
+            StoredRecap.window_end < bucket - timedelta(hours=settings.recap_max_reuse_hours)
+        )
+    )
+    await db.commit()
+
+
+async def get_or_generate_recap(
+    db: AsyncSession,
+    source_name: str,
+    hours: int = 24,
+    force: bool = False
+) -> Optional[dict]:
+    """
+    Get a recap for a source, generating as little as possible:
+    - stored recap with no new events since -> returned as is
+    - stored recap with new events -> updated incrementally with only the new events
+    - nothing usable stored (or force) -> full generation
+    """
+    last_event_id, event_count = await get_source_watermark(db, source_name, hours)
+    
+    stored = None if force else await get_latest_stored_recap(db, source_name, hours)
+    if stored is not None:
+        # Incremental updates chain on the previous recap, so age counts from the last full generation
+        age = datetime.utcnow() - stored.full_generated_at
+        if age > timedelta(hours=settings.recap_max_reuse_hours):
+            stored = None
+    
+    if stored is not None and event_count > 0:
+        previous_recap = json.loads(stored.recap_json)
+        
+        if stored.last_event_id == last_event_id:
+            logger.info(f"Reusing stored recap for {source_name} ({hours}h)")
+            previous_recap["cached"] = True
+            return previous_recap
+        
+        if stored.last_event_id is not None:
+            new_events = await get_events_by_source(db, source_name, hours, after_id=stored.last_event_id)
+            # Too many new events for one update prompt - regenerate through the chunked pipeline
+            if new_events and len(new_events) <= settings.recap_chunk_size:
+                recap = await update_daily_recap(source_name, hours, previous_recap, new_events, event_count)
+                if recap:
+                    recap["incremental"] = True
+                    await save_recap(
+                        db, source_name, hours, recap, last_event_id, event_count,
+                        full_generated_at=stored.full_generated_at
+                    )
+                    return recap
+    
+    recap = await generate_daily_recap(db, source_name, hours)
+    # A recap missing chunk periods is served but never reused as if complete
+    if recap and event_count > 0 and not recap.get("partial"):
+        await save_recap(db, source_name, hours, recap, last_event_id, event_count)
+    return recap
+
+
+async def precompute_busiest_recaps(limit: int, hours: int = 24) -> int:
+    """Refresh stored recaps for the sources with the most events. Returns number refreshed."""
+    refreshed = 0
+    async with async_session_maker() as db:
+        sources = await get_available_sources(db)
+        sources.sort(key=lambda s: s["event_count"], reverse=True)
+        
+        for source in sources[:limit]:
+            recap = await get_or_generate_recap(db, source["source_name"], hours)
+            if recap:
+                refreshed += 1
+    
+    return refreshed
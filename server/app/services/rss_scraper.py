@@ -2,31 +2,37 @@
 RSS Feed Scraper Service
 Fetches and processes news from RSS feeds using feedparser
 """
-import hashlib
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict
-import feedparser
+from datetime import datetime
+from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import select, update, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.feeds_config import get_all_feeds
 from app.database import async_session_maker
 from app.models import NewsEvent, ScraperState
 from app.services.ai_processor import process_news_text
+from app.services.event_hub import publish_events
+from app.services.hot_window import append_events
+from app.services.parse_pool import EntryRecord
+from app.services.query_cache import bump_generation
+from app.services.stories import assign_story
+from app.services.tracing import span, start_trace
 
 logger = logging.getLogger(__name__)
 
 
-def get_content_hash(text: str, url: str) -> str:
-    """Generate a unique hash for content deduplication"""
-    content = f"{text[:200]}_{url}"
-    return hashlib.sha256(content.encode()).hexdigest()
-
-
 async def save_event(db: AsyncSession, event_data: dict) -> bool:
     """Save a processed event to database, returns True if saved"""
+    with span("save_event", hash=event_data["content_hash"][:16]) as save_span:
+        saved = await _save_event(db, event_data)
+        save_span.set(saved=saved)
+        return saved
+
+
+async def _save_event(db: AsyncSession, event_data: dict) -> bool:
     # Check for duplicate
     query = select(NewsEvent).where(NewsEvent.content_hash == event_data["content_hash"])
     result = await db.execute(query)
@@ -38,7 +44,32 @@ async def save_event(db: AsyncSession, event_data: dict) -> bool:
     
     event = NewsEvent(**event_data)
     db.add(event)
-    await db.commit()
+    try:
+        await db.flush()
+        try:
+            # Committed together, so no reader sees the event without its story
+            assignment = await assign_story(db, event)
+        except IntegrityError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to assign event to a story, saving it without one: {e}")
+            await db.rollback()
+            event = NewsEvent(**event_data)
+            db.add(event)
+            await db.flush()
+            assignment = None
+        await db.commit()
+    except IntegrityError:
+        # Another worker saved the same content between our check and commit
+        await db.rollback()
+        logger.debug(f"Duplicate event skipped: {event_data['content_hash'][:16]}...")
+        return False
+    if assignment is not None:
+        assignment.apply()
+    story_members = {event.id} if assignment is not None and assignment.joined else set()
+    publish_events([event], story_members)
+    append_events([event], story_members)
+    bump_generation()
     logger.info(f"Saved RSS event: {event_data.get('original_title', event_data['summary_text'][:50])}...")
     return True
 
@@ -53,58 +84,51 @@ async def get_last_scrape_time(db: AsyncSession, source_name: str) -> Optional[d
 
 async def update_scraper_state(db: AsyncSession, source_name: str, last_article_date: Optional[datetime] = None):
     """Update the scraper state with the newest article's publish date (or current time if none)"""
-    query = select(ScraperState).where(ScraperState.source_name == source_name)
-    result = await db.execute(query)
-    state = result.scalar_one_or_none()
-    
+    with span("update_scraper_state", feed=source_name):
+        await _update_scraper_state(db, source_name, last_article_date)
+
+
+async def _update_scraper_state(db: AsyncSession, source_name: str, last_article_date: Optional[datetime] = None):
     # Use the newest article date if provided, otherwise use current time
     update_time = last_article_date if last_article_date else datetime.utcnow()
     
-    if state:
-        # Only update if the new time is newer than existing
-        if state.last_run is None or update_time > state.last_run:
-            state.last_run = update_time
-    else:
-        state = ScraperState(
-            source_name=source_name,
-            last_run=update_time
-        )
-        db.add(state)
+    # Only move forward - a single conditional UPDATE, so repeated or concurrent
+    # updates from several workers can't move last_run backwards
+    result = await db.execute(
+        update(ScraperState)
+        .where(ScraperState.source_name == source_name)
+        .where(or_(ScraperState.last_run.is_(None), ScraperState.last_run < update_time))
+        .values(last_run=update_time)
+    )
+    if result.rowcount:
+        await db.commit()
+        return
     
-    await db.commit()
-
-
-def parse_rss_date(date_str: str) -> Optional[datetime]:
-    """Parse RSS date string to datetime"""
+    existing = await db.execute(select(ScraperState.id).where(ScraperState.source_name == source_name))
+    if existing.scalar_one_or_none() is not None:
+        await db.rollback()
+        return
+    
+    db.add(ScraperState(source_name=source_name, last_run=update_time))
     try:
-        # feedparser returns time.struct_time
-        if hasattr(date_str, 'timetuple'):
-            return datetime(*date_str.timetuple()[:6])
-        return None
-    except Exception as e:
-        logger.debug(f"Failed to parse date: {e}")
-        return None
+        await db.commit()
+    except IntegrityError:
+        # Created concurrently - retry as an update
+        await db.rollback()
+        await _update_scraper_state(db, source_name, update_time)
 
 
-async def process_rss_entry(entry: Dict, feed_name: str, feed_url: str) -> Optional[dict]:
+async def process_rss_entry(entry: EntryRecord, feed_name: str) -> Optional[dict]:
     """Process a single RSS entry"""
+    with span("process_rss_entry", feed=feed_name, hash=entry.content_hash[:16]) as entry_span:
+        event_data = await _process_rss_entry(entry, feed_name)
+        entry_span.set(processed=event_data is not None)
+        return event_data
+
+
+async def _process_rss_entry(entry: EntryRecord, feed_name: str) -> Optional[dict]:
     try:
-        # Extract title and content
-        title = entry.get('title', '')
-        
-        # Try to get content from various fields
-        content = ''
-        if 'summary' in entry:
-            content = entry.get('summary', '')
-        elif 'description' in entry:
-            content = entry.get('description', '')
-        elif 'content' in entry:
-            content_list = entry.get('content', [])
-            if content_list and len(content_list) > 0:
-                content = content_list[0].get('value', '')
-        
-        # Combine title and content for AI processing
-        full_text = f"{title}\n\n{content}" if content else title
+        full_text = entry.full_text
         
         # Skip if too short
         if len(full_text.strip()) < 20:
@@ -118,20 +142,10 @@ async def process_rss_entry(entry: Dict, feed_name: str, feed_url: str) -> Optio
             logger.debug(f"AI processing failed for RSS entry from {feed_name}")
             return None
         
-        # Get publish date
-        pub_date = None
-        if 'published_parsed' in entry:
-            pub_date = parse_rss_date(entry.published_parsed)
-        elif 'updated_parsed' in entry:
-            pub_date = parse_rss_date(entry.updated_parsed)
-        
-        # Get entry URL
-        entry_url = entry.get('link', feed_url)
-        
         # Build event data
         event_data = {
             "source_name": feed_name,
-            "original_url": entry_url,
+            "original_url": entry.link,
             "original_text": full_text[:2000],
             "original_title": ai_result.title,
             "summary_text": ai_result.summary,
@@ -142,8 +156,8 @@ async def process_rss_entry(entry: Dict, feed_name: str, feed_url: str) -> Optio
             "confidence_score": ai_result.confidence_score,
             "image_url": None,  # Could extract from enclosures if needed
             "timestamp_detected": datetime.utcnow(),
-            "timestamp_original": pub_date,
-            "content_hash": get_content_hash(full_text, entry_url),
+            "timestamp_original": entry.pub_date,
+            "content_hash": entry.content_hash,
         }
         
         return event_data
@@ -153,128 +167,31 @@ async def process_rss_entry(entry: Dict, feed_name: str, feed_url: str) -> Optio
         return None
 
 
-async def scrape_rss_feed(feed_name: str, feed_url: str, max_entries_first_run: int = 10) -> int:
-    """
-    Scrape a single RSS feed and save events
-    - On first run: fetch up to max_entries_first_run articles
-    - On subsequent runs: fetch all articles published since last scrape
-    
-    Returns number of events saved
-    """
-    logger.info(f"Scraping RSS feed: {feed_name} ({feed_url})")
-    
-    try:
-        async with async_session_maker() as db:
-            # Get last scrape time
-            last_scrape = await get_last_scrape_time(db, feed_name)
-            is_first_run = last_scrape is None
-            
-            if is_first_run:
-                logger.info(f"First run for {feed_name} - fetching up to {max_entries_first_run} articles")
-            else:
-                logger.info(f"Fetching articles published after {last_scrape} for {feed_name}")
-        
-        # Parse RSS feed
-        feed = feedparser.parse(feed_url)
-        
-        if feed.bozo:
-            logger.warning(f"RSS feed {feed_name} has parsing issues: {feed.bozo_exception}")
-        
-        entries = feed.entries
-        
-        if not entries:
-            logger.warning(f"No entries found in RSS feed: {feed_name}")
-            return 0
-        
-        logger.info(f"Found {len(entries)} total entries in {feed_name}")
-        
-        # Filter entries based on publish date
-        entries_to_process = []
-        
-        if is_first_run:
-            # First run: take up to N most recent entries
-            entries_to_process = entries[:max_entries_first_run]
-            logger.info(f"Processing {len(entries_to_process)} most recent entries (first run)")
-        else:
-            # Subsequent runs: only process entries newer than last scrape
-            for entry in entries:
-                pub_date = None
-                if 'published_parsed' in entry:
-                    pub_date = parse_rss_date(entry.published_parsed)
-                elif 'updated_parsed' in entry:
-                    pub_date = parse_rss_date(entry.updated_parsed)
-                
-                # If we can't determine publish date, include it to be safe
-                # Or if it's newer than last scrape
-                if pub_date is None or pub_date > last_scrape:
-                    entries_to_process.append(entry)
-            
-            logger.info(f"Found {len(entries_to_process)} new entries since last scrape")
-        
-        if not entries_to_process:
-            logger.info(f"No new entries to process for {feed_name}")
-            async with async_session_maker() as db:
-                # Still update scraper state to current time so we don't recheck the same empty feed
-                await update_scraper_state(db, feed_name, datetime.utcnow())
-            return 0
-        
-        # Track the newest article date
-        newest_article_date = None
-        
-        events_saved = 0
-        async with async_session_maker() as db:
-            for entry in entries_to_process:
-                # Track the newest publish date
-                pub_date = None
-                if 'published_parsed' in entry:
-                    pub_date = parse_rss_date(entry.published_parsed)
-                elif 'updated_parsed' in entry:
-                    pub_date = parse_rss_date(entry.updated_parsed)
-                
-                if pub_date and (newest_article_date is None or pub_date > newest_article_date):
-                    newest_article_date = pub_date
-                
-                event_data = await process_rss_entry(entry, feed_name, feed_url)
-                
-                if event_data:
-                    if await save_event(db, event_data):
-                        events_saved += 1
-            
-            # Update scraper state with the newest article date (or current time if none)
-            await update_scraper_state(db, feed_name, newest_article_date)
-        
-        logger.info(f"RSS feed {feed_name}: {events_saved} new events saved")
-        return events_saved
-        
-    except Exception as e:
-        logger.error(f"Error scraping RSS feed {feed_name}: {e}")
-        return 0
-
-
-async def scrape_all_rss_feeds(max_entries_first_run: int = 10):
+async def scrape_all_rss_feeds(max_entries_first_run: int = 10, sharded: bool = False):
     """
     Scrape all configured RSS feeds
     - First run: fetch up to max_entries_first_run from each
     - Subsequent runs: fetch all new articles since last scrape
+    - Sharded: only the feeds this worker holds leases for
     
     Returns total number of events saved
     """
     logger.info("Starting RSS feeds scraping...")
     
-    feeds = get_all_feeds()
-    total_saved = 0
-    
-    for feed in feeds:
-        try:
-            saved = await scrape_rss_feed(
-                feed["name"],
-                feed["url"],
-                max_entries_first_run
-            )
-            total_saved += saved
-        except Exception as e:
-            logger.error(f"Failed to scrape {feed['name']}: {e}")
-            continue
+    # Captures requested through /api/admin/traces/capture, possibly from another process
+    from app.services.worker_requests import TRACE_CYCLES, consume_cycle
+    forced = await consume_cycle(TRACE_CYCLES)
+    with start_trace("scrape_all_rss_feeds", force=forced, sharded=sharded) as cycle_span:
+        feeds = get_all_feeds()
+        if sharded:
+            from app.services.feed_shards import claim_feeds
+            with span("claim_feeds"):
+                feeds = await claim_feeds(feeds)
+        
+        # Fetch, parse, dedupe, enrich and persist run as overlapping pipeline stages
+        from app.services.ingest_pipeline import ingest_pipeline
+        total_saved = await ingest_pipeline.run(feeds, max_entries_first_run)
+        cycle_span.set(feeds=len(feeds), saved=total_saved)
     
     logger.info(f"RSS scraping complete: {total_saved} total events saved from {len(feeds)} feeds")
     return total_saved
@@ -294,7 +211,9 @@ async def test_single_feed(feed_name: str):
     print(f"Language: {feed['language']}")
     print(f"Category: {feed['category']}\n")
     
-    saved = await scrape_rss_feed(feed["name"], feed["url"], max_entries_first_run=10)
+    # Same stages as a scheduled cycle, for just this feed
+    from app.services.ingest_pipeline import ingest_pipeline
+    saved = await ingest_pipeline.run([feed], max_entries_first_run=10)
     print(f"\n✅ Saved {saved} events from {feed_name}")
 
 
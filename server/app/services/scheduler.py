@@ -1,25 +1,47 @@
 """
 Background task scheduler for data collection
 """
+import asyncio
 import logging
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+from datetime import datetime, timedelta
+from typing import Optional
 
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-# Global scheduler instance
-scheduler = AsyncIOScheduler()
+# Global scheduler instance (created by start_scheduler, so API-only processes never import apscheduler)
+scheduler = None
+
+# Lease that elects the single instance allowed to run jobs
+LEADER_LEASE = "scheduler"
+
+# Whether this instance currently holds the scheduler lease
+# (leader-only jobs return immediately on other instances)
+is_leader = False
+_leadership_task: Optional[asyncio.Task] = None
 
 
 async def rss_scrape_job():
     """Scheduled job for RSS feeds scraping"""
+    # With feed sharding every worker scrapes its own share of the feeds
+    if not (is_leader or settings.feed_sharding_enabled):
+        return
+    from app.services.profiler import scrape_cycle_profile
     from app.services.rss_scraper import scrape_all_rss_feeds
+    if settings.feed_sharding_enabled:
+        # Peers assign stories concurrently - start each cycle from the stored stories
+        from app.services.stories import story_index
+        story_index.invalidate()
     logger.info("🔄 Running RSS feeds scraper job...")
     try:
-        total_saved = await scrape_all_rss_feeds(max_entries_first_run=10)
+        # Profiled when requested through /api/admin/profiles/scrape or PROFILE_SCRAPE_CYCLES
+        async with scrape_cycle_profile():
+            total_saved = await scrape_all_rss_feeds(
+                max_entries_first_run=10,
+                sharded=settings.feed_sharding_enabled
+            )
         logger.info(f"✅ RSS scraper job completed: {total_saved} events saved")
     except Exception as e:
         logger.error(f"❌ RSS scraper job failed: {e}")
@@ -27,6 +49,8 @@ async def rss_scrape_job():
 
 async def db_cleanup_job():
     """Scheduled job for database cleanup"""
+    if not is_leader:
+        return
     from app.services.db_cleanup import cleanup_old_events
     logger.info("🗑️  Running database cleanup job...")
     try:
@@ -36,12 +60,51 @@ async def db_cleanup_job():
         logger.error(f"❌ Database cleanup job failed: {e}")
 
 
+async def recap_precompute_job():
+    """Scheduled job for precomputing recaps of the busiest sources"""
+    if not is_leader:
+        return
+    from app.services.recap_store import precompute_busiest_recaps
+    logger.info("📝 Running recap precompute job...")
+    try:
+        refreshed = await precompute_busiest_recaps(settings.recap_precompute_sources)
+        logger.info(f"✅ Recap precompute job completed: {refreshed} recaps ready")
+    except Exception as e:
+        logger.error(f"❌ Recap precompute job failed: {e}")
+
+
+async def llm_usage_job():
+    """Scheduled job for rolling up LLM call telemetry"""
+    if not is_leader:
+        return
+    from app.services.llm_telemetry import llm_telemetry
+    try:
+        await llm_telemetry.flush()
+        rows = await llm_telemetry.aggregate()
+        pruned = await llm_telemetry.prune()
+        logger.info(f"📊 LLM usage rolled up: {rows} hourly rows, {pruned} old call records pruned")
+    except Exception as e:
+        logger.error(f"❌ LLM usage job failed: {e}")
+
+
+def _first_scrape_time() -> datetime:
+    """When the startup scrape runs - deferred under fast start so it doesn't compete with the first requests"""
+    delay = settings.startup_scrape_delay if settings.fast_start else 0
+    return datetime.now() + timedelta(seconds=delay)
+
+
 async def start_scheduler():
     """Start the background task scheduler"""
-    # Add RSS scraper job (every 5 minutes)
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.triggers.interval import IntervalTrigger
+    
+    global scheduler
+    scheduler = AsyncIOScheduler()
+    
+    # Add RSS scraper job (every 5 minutes by default)
     scheduler.add_job(
         rss_scrape_job,
-        trigger=IntervalTrigger(seconds=300),  # 5 minutes
+        trigger=IntervalTrigger(seconds=settings.rss_scrape_interval),
         id="rss_scraper",
         name="RSS Feeds Scraper",
         replace_existing=True,
@@ -58,16 +121,66 @@ async def start_scheduler():
         max_instances=1
     )
     
+    # Add LLM usage rollup job (hourly)
+    scheduler.add_job(
+        llm_usage_job,
+        trigger=IntervalTrigger(hours=1),
+        id="llm_usage",
+        name="LLM Usage Rollup",
+        replace_existing=True,
+        max_instances=1
+    )
+    
+    # Add recap precompute job (optional)
+    if settings.recap_precompute_sources > 0:
+        scheduler.add_job(
+            recap_precompute_job,
+            trigger=IntervalTrigger(seconds=settings.recap_precompute_interval),
+            id="recap_precompute",
+            name="Recap Precompute",
+            replace_existing=True,
+            max_instances=1
+        )
+    
     scheduler.start()
     logger.info("📅 Scheduler started:")
-    logger.info("   - RSS scraper: every 5 minutes")
+    logger.info(f"   - RSS scraper: every {settings.rss_scrape_interval}s" + (" (sharded)" if settings.feed_sharding_enabled else ""))
     logger.info("   - Database cleanup: every 24 hours")
+    logger.info("   - LLM usage rollup: every hour")
+    if settings.fast_start and settings.startup_scrape_delay > 0:
+        logger.info(f"   - First scrape: {settings.startup_scrape_delay}s after startup")
+    if settings.recap_precompute_sources > 0:
+        logger.info(f"   - Recap precompute: top {settings.recap_precompute_sources} sources every {settings.recap_precompute_interval}s")
     
-    # Run initial scrape after startup
-    scheduler.add_job(rss_scrape_job, id="initial_rss", replace_existing=True)
+    global _leadership_task
+    _leadership_task = asyncio.create_task(_leadership_loop())
+    
+    if settings.feed_sharding_enabled:
+        from app.services.feed_shards import send_heartbeat
+        await send_heartbeat()
+        # Run initial scrape after startup
+        scheduler.add_job(
+            rss_scrape_job,
+            trigger='date',
+            run_date=_first_scrape_time(),
+            id="initial_rss",
+            replace_existing=True
+        )
+
+
+def _schedule_initial_jobs():
+    """Queue the startup scrape and cleanup (runs once we are leader)"""
+    # Run initial scrape after startup (sharded workers already queued theirs)
+    if not settings.feed_sharding_enabled:
+        scheduler.add_job(
+            rss_scrape_job,
+            trigger='date',
+            run_date=_first_scrape_time(),
+            id="initial_rss",
+            replace_existing=True
+        )
     
     # Run initial cleanup after startup (in 1 minute to let DB initialize)
-    from datetime import datetime, timedelta
     scheduler.add_job(
         db_cleanup_job, 
         trigger='date', 
@@ -77,9 +190,76 @@ async def start_scheduler():
     )
 
 
+async def _leadership_loop():
+    """Acquire and renew the scheduler lease (and the worker heartbeat when sharding)"""
+    from app.services.leases import try_acquire_lease, INSTANCE_ID
+    global is_leader
+    
+    ttl = settings.leader_lease_seconds
+    initial_jobs_scheduled = False
+    while True:
+        try:
+            held = await try_acquire_lease(LEADER_LEASE, ttl)
+            if settings.feed_sharding_enabled:
+                from app.services.feed_shards import send_heartbeat
+                await send_heartbeat()
+        except Exception as e:
+            logger.error(f"❌ Scheduler lease renewal failed: {e}")
+            held = False
+        
+        if held and not is_leader:
+            is_leader = True
+            # Another instance may have opened stories while we were not leading
+            from app.services.stories import story_index
+            story_index.invalidate()
+            if not initial_jobs_scheduled:
+                _schedule_initial_jobs()
+                initial_jobs_scheduled = True
+            logger.info(f"👑 Scheduler lease acquired by {INSTANCE_ID} - running jobs")
+        elif not held and is_leader:
+            is_leader = False
+            logger.warning(f"⚠️  Scheduler lease lost by {INSTANCE_ID} - leader jobs skipped")
+        
+        # Renew well before the lease expires
+        await asyncio.sleep(ttl / 3)
+
+
+def scheduler_state() -> dict:
+    """Whether the scheduler and its lease loop are running in this process"""
+    return {
+        "running": scheduler is not None and scheduler.running,
+        "lease_loop": _leadership_task is not None and not _leadership_task.done(),
+        "leader": is_leader,
+    }
+
+
 async def stop_scheduler():
     """Stop the background task scheduler"""
-    if scheduler.running:
+    global _leadership_task, is_leader
+    if _leadership_task is not None:
+        _leadership_task.cancel()
+        _leadership_task = None
+    
+    if scheduler is not None and scheduler.running:
         scheduler.shutdown(wait=False)
         logger.info("📅 Scheduler stopped")
+    
+    from app.services.parse_pool import shutdown_parse_pool
+    shutdown_parse_pool()
+    
+    if settings.feed_sharding_enabled:
+        from app.services.feed_shards import stop_heartbeat
+        try:
+            await stop_heartbeat()
+        except Exception as e:
+            logger.error(f"❌ Failed to leave the feed worker pool: {e}")
+    
+    if is_leader:
+        is_leader = False
+        from app.services.leases import release_lease
+        try:
+            # Let a standby instance take over without waiting for expiry
+            await release_lease(LEADER_LEASE)
+        except Exception as e:
+            logger.error(f"❌ Failed to release scheduler lease: {e}")
 
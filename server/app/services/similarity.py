@@ -0,0 +1,52 @@
+"""
+Cheap local similarity measures for grouping news events
+Character shingles + Jaccard for text, haversine for distance - no external services
+"""
+import math
+import re
+from typing import Optional
+
+# Words are runs of letters/digits in any script (Hebrew, Arabic, Latin)
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Lowercase and collapse punctuation/whitespace"""
+    if not text:
+        return ""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def shingles(text: Optional[str], size: int = 3) -> frozenset[str]:
+    """
+    Character n-grams of the normalized text.
+    Character shingles tolerate Hebrew prefixes (ו, ה, ב, ל...) better than whole words.
+    """
+    normalized = normalize_text(text)
+    if len(normalized) <= size:
+        return frozenset([normalized]) if normalized else frozenset()
+    return frozenset(normalized[i:i + size] for i in range(len(normalized) - size + 1))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    intersection = len(a & b)
+    return intersection / (len(a) + len(b) - intersection)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometers"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    h = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for prompt budgeting (Hebrew averages ~3 characters per token)"""
+    return len(text) // 3 + 1
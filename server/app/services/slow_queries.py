@@ -0,0 +1,290 @@
+"""
+Slow-query log
+Statements slower than SLOW_QUERY_THRESHOLD_MS are logged with their
+parameters and aggregated per fingerprint. The first time a fingerprint is
+slow its plan is captured with EXPLAIN QUERY PLAN (SQLite) or EXPLAIN
+(Postgres) on a separate connection; plans that scan whole tables turn into
+index suggestions in the admin report.
+"""
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, inspect
+
+from app.config import get_settings
+from app.services.metrics import fingerprint
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Slow fingerprints tracked at once
+MAX_TRACKED = 200
+
+# Slow executions of a full-scanning fingerprint before an index is suggested
+SUGGEST_AFTER = 3
+
+# Statement kinds worth explaining
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+# SQLite plan details
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)\b(?! USING)")
+_SQLITE_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+# Postgres plan lines
+_PG_SCAN = re.compile(r"Seq Scan on (\w+)")
+_PG_INDEX = re.compile(r"Index (?:Only )?Scan(?: Backward)? using (\w+)")
+
+# column references in WHERE / ORDER BY of the generated SQL ("table.column <op>")
+_WHERE = re.compile(r"\bWHERE\b(.*?)(?:\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|$)", re.IGNORECASE | re.DOTALL)
+_ORDER_BY = re.compile(r"\bORDER BY\b(.*?)(?:\bLIMIT\b|$)", re.IGNORECASE | re.DOTALL)
+_EQUALITY = re.compile(r"(\w+)\.(\w+)\s*(?:=|\bIN\b|\bIS\b)", re.IGNORECASE)
+_RANGE = re.compile(r"(\w+)\.(\w+)\s*(?:>=|<=|>|<|\bBETWEEN\b)", re.IGNORECASE)
+_WRAPPED_LIKE = re.compile(r"(?:lower|upper)\((\w+)\.(\w+)\)\s*(?:NOT\s+)?I?LIKE|(\w+)\.(\w+)\s+(?:NOT\s+)?ILIKE", re.IGNORECASE)
+_LEADING_WILDCARD_LIKE = re.compile(r"(\w+)\.(\w+)\)?\s+(?:NOT\s+)?I?LIKE", re.IGNORECASE)
+_COLUMN = re.compile(r"(\w+)\.(\w+)")
+
+
+def _short(value, limit: int = 200):
+    """Parameter value trimmed for the log"""
+    if isinstance(value, str) and len(value) > limit:
+        return value[:limit] + "..."
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    return value
+
+
+def _loggable_params(parameters, executemany: bool):
+    if executemany:
+        return {"executemany": len(parameters), "first": _loggable_params(parameters[0], False) if parameters else None}
+    if isinstance(parameters, dict):
+        return {key: _short(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_short(value) for value in parameters]
+    return parameters
+
+
+@dataclass
+class SlowQuery:
+    fingerprint: str
+    statement: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    max_params: object = None
+    first_seen: datetime = field(default_factory=datetime.utcnow)
+    last_seen: datetime = field(default_factory=datetime.utcnow)
+    plan: Optional[list[str]] = None
+    plan_error: Optional[str] = None
+    explained_at: Optional[datetime] = None
+    full_scans: list[str] = field(default_factory=list)
+    indexes_used: list[str] = field(default_factory=list)
+    temp_sort: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "max_ms": round(self.max_ms, 1),
+            "max_params": self.max_params,
+            "first_seen": self.first_seen.isoformat(),
+            "last_seen": self.last_seen.isoformat(),
+            "statement": self.statement,
+            "plan": self.plan,
+            "plan_error": self.plan_error,
+            "explained_at": self.explained_at.isoformat() if self.explained_at else None,
+            "full_scans": self.full_scans,
+            "indexes_used": self.indexes_used,
+            "temp_sort": self.temp_sort,
+        }
+
+
+class SlowQueryLog:
+    """Records statements over the threshold and captures their plans"""
+
+    def __init__(self):
+        self.queries: dict[str, SlowQuery] = {}
+        self.engine = None
+        self._explain_tasks: set[asyncio.Task] = set()
+
+    # --- Recording -------------------------------------------------------------
+
+    def instrument(self, engine):
+        """Attach the cursor hooks to an async engine"""
+        self.engine = engine
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the execution context, which is dropped with a statement that raises
+        if context is not None:
+            context._slow_query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_slow_query_start", None)
+        if start is None:
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms < settings.slow_query_threshold_ms or statement.lstrip().upper().startswith("EXPLAIN"):
+            return
+        self.record(statement, parameters, executemany, elapsed_ms)
+
+    def record(self, statement: str, parameters, executemany: bool, elapsed_ms: float):
+        key = fingerprint(statement)
+        params = _loggable_params(parameters, executemany)
+        logger.warning(f"🐢 Slow query ({elapsed_ms:.0f} ms): {key} | params={params}")
+
+        query = self.queries.get(key)
+        if query is None:
+            if len(self.queries) >= MAX_TRACKED:
+                return
+            query = self.queries[key] = SlowQuery(fingerprint=key, statement=statement[:4000])
+            if not executemany and statement.lstrip().upper().startswith(_EXPLAINABLE):
+                self._schedule_explain(query, statement, parameters)
+        query.count += 1
+        query.total_ms += elapsed_ms
+        query.last_seen = datetime.utcnow()
+        if elapsed_ms >= query.max_ms:
+            query.max_ms = elapsed_ms
+            query.max_params = params
+
+    # --- Plans -------------------------------------------------------------------
+
+    def _schedule_explain(self, query: SlowQuery, statement: str, parameters):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # Explained on its own connection, after the slow statement's transaction moved on
+        task = loop.create_task(self._explain(query, statement, parameters))
+        self._explain_tasks.add(task)
+        task.add_done_callback(self._explain_tasks.discard)
+
+    async def _explain(self, query: SlowQuery, statement: str, parameters):
+        dialect = self.engine.dialect.name
+        prefix = "EXPLAIN QUERY PLAN" if dialect == "sqlite" else "EXPLAIN"
+        try:
+            async with self.engine.connect() as conn:
+                result = await conn.exec_driver_sql(f"{prefix} {statement}", parameters)
+                rows = result.all()
+        except Exception as e:
+            query.plan_error = str(e)[:500]
+            logger.debug(f"EXPLAIN failed for {query.fingerprint}: {e}")
+            return
+
+        if dialect == "sqlite":
+            # (id, parent, notused, detail)
+            query.plan = [row[-1] for row in rows]
+            query.full_scans = sorted({m.group(1) for line in query.plan for m in [_SQLITE_SCAN.match(line)] if m})
+            query.indexes_used = sorted({m.group(1) for line in query.plan for m in [_SQLITE_INDEX.search(line)] if m})
+            query.temp_sort = any("USE TEMP B-TREE" in line for line in query.plan)
+        else:
+            query.plan = [row[0] for row in rows]
+            query.full_scans = sorted({m.group(1) for line in query.plan for m in [_PG_SCAN.search(line)] if m})
+            query.indexes_used = sorted({m.group(1) for line in query.plan for m in [_PG_INDEX.search(line)] if m})
+            query.temp_sort = any(line.strip().startswith("Sort") for line in query.plan)
+        query.explained_at = datetime.utcnow()
+        logger.warning(f"🐢 Plan for {query.fingerprint}:\n    " + "\n    ".join(query.plan))
+
+    # --- Report --------------------------------------------------------------------
+
+    async def _existing_indexes(self, tables: set[str]) -> dict[str, list[list[str]]]:
+        def load(sync_conn):
+            inspector = inspect(sync_conn)
+            indexes = {}
+            for table in tables:
+                try:
+                    columns = [index["column_names"] for index in inspector.get_indexes(table)]
+                    unique = inspector.get_unique_constraints(table)
+                    columns.extend(constraint["column_names"] for constraint in unique)
+                    primary = inspector.get_pk_constraint(table).get("constrained_columns")
+                    if primary:
+                        columns.append(primary)
+                    indexes[table] = columns
+                except Exception:
+                    indexes[table] = []
+            return indexes
+
+        async with self.engine.connect() as conn:
+            return await conn.run_sync(load)
+
+    @staticmethod
+    def _suggest(query: SlowQuery, table: str, existing: list[list[str]]) -> dict:
+        where = _WHERE.search(query.statement)
+        where_sql = where.group(1) if where else ""
+        order = _ORDER_BY.search(query.statement)
+        order_sql = order.group(1) if order else ""
+
+        def columns(pattern) -> list[str]:
+            found = []
+            for m in pattern.finditer(where_sql):
+                if m.group(1) == table and m.group(2) not in found:
+                    found.append(m.group(2))
+            return found
+
+        notes = []
+        for m in _WRAPPED_LIKE.finditer(where_sql):
+            t, column = (m.group(1), m.group(2)) if m.group(1) else (m.group(3), m.group(4))
+            if t == table:
+                notes.append(
+                    f"{column} is matched with a case-insensitive LIKE - no B-tree index can serve it; "
+                    f"filter on an exact (normalized) value instead"
+                )
+        for m in _LEADING_WILDCARD_LIKE.finditer(where_sql):
+            if m.group(1) == table and isinstance(query.max_params, (list, tuple, dict)):
+                values = query.max_params.values() if isinstance(query.max_params, dict) else query.max_params
+                if any(isinstance(v, str) and v.startswith("%") for v in values):
+                    notes.append(f"{m.group(2)} is matched with a leading '%' wildcard, which always scans")
+                    break
+
+        # Equality columns first, then one range column, then the sort column
+        equality = columns(_EQUALITY)
+        ranges = [c for c in columns(_RANGE) if c not in equality]
+        index_columns = equality + ranges[:1]
+        if query.temp_sort and index_columns:
+            for m in _COLUMN.finditer(order_sql):
+                if m.group(1) == table and m.group(2) not in index_columns:
+                    index_columns.append(m.group(2))
+                break
+
+        suggestion = {
+            "table": table,
+            "fingerprint": query.fingerprint,
+            "slow_executions": query.count,
+            "total_ms": round(query.total_ms, 1),
+            "notes": sorted(set(notes)),
+        }
+        if index_columns and not any(cols[:len(index_columns)] == index_columns for cols in existing):
+            name = f"idx_{table}_{'_'.join(index_columns)}"[:63]
+            suggestion["create_index"] = f"CREATE INDEX {name} ON {table} ({', '.join(index_columns)})"
+        elif index_columns:
+            suggestion["notes"].append(
+                f"An index on ({', '.join(index_columns)}) exists but the planner scans - "
+                f"run ANALYZE or check the filter's selectivity"
+            )
+        return suggestion
+
+    async def report(self) -> dict:
+        """Slow fingerprints by total time, plus index suggestions for repeated full scans"""
+        queries = sorted(self.queries.values(), key=lambda q: q.total_ms, reverse=True)
+        scanning = [q for q in queries if q.full_scans and q.count >= SUGGEST_AFTER]
+        tables = {table for q in scanning for table in q.full_scans}
+        existing = await self._existing_indexes(tables) if tables and self.engine is not None else {}
+        suggestions = [self._suggest(q, table, existing.get(table, [])) for q in scanning for table in q.full_scans]
+        return {
+            "threshold_ms": settings.slow_query_threshold_ms,
+            "queries": [q.to_dict() for q in queries],
+            "suggestions": suggestions,
+        }
+
+    def reset(self):
+        self.queries.clear()
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,293 @@
+"""
+Cross-source story grouping
+Each saved event joins the most similar open story nearby - close in space
+(grid index + haversine), recent (story_gap_hours) and with similar text
+(character shingle Jaccard) - or starts a new one. Only stories in the grid
+cells around the event are compared, so an assignment costs O(nearby stories).
+"""
+import asyncio
+import logging
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models import NewsEvent, Story, StoryMember
+from app.services.similarity import haversine_km, jaccard, normalize_text, shingles
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+KM_PER_DEGREE = 111.32
+
+# Shingle sets of the latest members kept per story for text matching
+TEXTS_PER_STORY = 5
+
+# Assignments between sweeps of expired stories
+PRUNE_EVERY = 200
+
+
+def event_text(event) -> str:
+    return f"{event.original_title or ''} {event.summary_text or ''}"
+
+
+def joined_centroid(story, event) -> Optional[tuple[float, float]]:
+    """Centroid after a member joins, or None when the event has no coordinates"""
+    if event.latitude is None or event.longitude is None:
+        return None
+    if story.latitude is None or not story.located_count:
+        # The first member with coordinates places the story
+        return event.latitude, event.longitude
+    n = story.located_count
+    return (story.latitude * n + event.latitude) / (n + 1), (story.longitude * n + event.longitude) / (n + 1)
+
+
+@dataclass
+class OpenStory:
+    """An open story in the index"""
+    story_id: int
+    latitude: Optional[float]
+    longitude: Optional[float]
+    location_key: str
+    last_seen: datetime
+    event_count: int
+    located_count: int  # Members with coordinates - the centroid averages only these
+    texts: deque = field(default_factory=lambda: deque(maxlen=TEXTS_PER_STORY))
+    cell: Optional[tuple[int, int]] = None
+
+
+class StoryIndex:
+    """
+    Open stories bucketed by normalized location name, and those with a
+    centroid also in a lat/lon grid with cells story_distance_km tall.
+    """
+
+    def __init__(self, distance_km: float, gap: timedelta, min_similarity: float):
+        self.distance_km = distance_km
+        self.gap = gap
+        self.min_similarity = min_similarity
+        self.cell_degrees = distance_km / KM_PER_DEGREE
+        self.cells: dict[tuple[int, int], list[OpenStory]] = {}
+        self.by_location: dict[str, list[OpenStory]] = {}
+        self.loaded = False
+        self.lock = asyncio.Lock()
+        self._assignments = 0
+        self.comparisons = 0
+
+    def invalidate(self):
+        """Reload from the database before the next assignment (other instances opened stories meanwhile)"""
+        self.loaded = False
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return (math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees))
+
+    def _nearby(self, latitude: float, longitude: float):
+        """Stories in the cells that can hold points within distance_km"""
+        row, col = self._cell(latitude, longitude)
+        # A degree of longitude shrinks with latitude, so look further along the row
+        cos_lat = max(math.cos(math.radians(min(abs(latitude) + self.cell_degrees, 89.0))), 0.01)
+        col_span = math.ceil(1 / cos_lat)
+        for r in (row - 1, row, row + 1):
+            for c in range(col - col_span, col + col_span + 1):
+                yield from self.cells.get((r, c), ())
+
+    def _add(self, story: OpenStory):
+        if story.latitude is not None and story.longitude is not None:
+            story.cell = self._cell(story.latitude, story.longitude)
+            self.cells.setdefault(story.cell, []).append(story)
+        self.by_location.setdefault(story.location_key, []).append(story)
+
+    def _remove(self, story: OpenStory):
+        for buckets, key in ((self.cells, story.cell), (self.by_location, story.location_key)):
+            bucket = buckets.get(key)
+            if bucket is not None and story in bucket:
+                bucket.remove(story)
+                if not bucket:
+                    del buckets[key]
+        story.cell = None
+
+    def match(self, event, text_shingles: frozenset) -> tuple[Optional[OpenStory], float]:
+        """Most similar open story the event belongs to, with its similarity"""
+        timestamp = event.timestamp_detected or datetime.utcnow()
+        if event.latitude is not None and event.longitude is not None:
+            # Nearby centroids, plus same-place stories that have no coordinates yet
+            location_key = normalize_text(event.location_name)
+            candidates = list(self._nearby(event.latitude, event.longitude))
+            if location_key:
+                candidates.extend(s for s in self.by_location.get(location_key, ()) if s.latitude is None)
+        else:
+            # Only a real place name can match - no name and no coordinates is no location
+            location_key = normalize_text(event.location_name)
+            candidates = self.by_location.get(location_key, []) if location_key else []
+
+        best, best_similarity = None, self.min_similarity
+        for story in candidates:
+            if timestamp - story.last_seen > self.gap:
+                continue
+            if story.latitude is not None and event.latitude is not None and haversine_km(
+                event.latitude, event.longitude, story.latitude, story.longitude
+            ) > self.distance_km:
+                continue
+            self.comparisons += 1
+            similarity = max((jaccard(text_shingles, text) for text in story.texts), default=0.0)
+            if similarity >= best_similarity:
+                best, best_similarity = story, similarity
+        return best, best_similarity
+
+    def joined(self, story: OpenStory, event, text_shingles: frozenset):
+        """Fold a new member into an indexed story (centroid, last seen, texts)"""
+        self._remove(story)
+        centroid = joined_centroid(story, event)
+        if centroid is not None:
+            story.latitude, story.longitude = centroid
+            story.located_count += 1
+        story.event_count += 1
+        story.last_seen = max(story.last_seen, event.timestamp_detected or datetime.utcnow())
+        story.texts.append(text_shingles)
+        self._add(story)
+
+    def opened(self, story_id: int, event, text_shingles: frozenset) -> OpenStory:
+        story = OpenStory(
+            story_id=story_id,
+            latitude=event.latitude,
+            longitude=event.longitude if event.latitude is not None else None,
+            location_key=normalize_text(event.location_name),
+            last_seen=event.timestamp_detected or datetime.utcnow(),
+            event_count=1,
+            located_count=1 if event.latitude is not None else 0,
+        )
+        story.texts.append(text_shingles)
+        self._add(story)
+        return story
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """Drop stories that can no longer be joined"""
+        cutoff = (now or datetime.utcnow()) - self.gap
+        removed = 0
+        for buckets in (self.cells, self.by_location):
+            for key in list(buckets):
+                kept = [story for story in buckets[key] if story.last_seen >= cutoff]
+                if buckets is self.by_location:
+                    # Every story has a location bucket - count each once
+                    removed += len(buckets[key]) - len(kept)
+                if kept:
+                    buckets[key] = kept
+                else:
+                    del buckets[key]
+        return removed
+
+    def __len__(self) -> int:
+        return sum(len(b) for b in self.by_location.values())
+
+    async def load(self, db: AsyncSession):
+        """Index the stories still open, with the texts of their latest members"""
+        self.cells.clear()
+        self.by_location.clear()
+        cutoff = datetime.utcnow() - self.gap
+        stories = (await db.execute(select(Story).where(Story.last_seen >= cutoff))).scalars().all()
+        indexed: dict[int, OpenStory] = {}
+        for row in stories:
+            story = OpenStory(
+                story_id=row.id,
+                latitude=row.latitude,
+                longitude=row.longitude,
+                location_key=normalize_text(row.location_name),
+                last_seen=row.last_seen,
+                event_count=row.event_count,
+                located_count=row.located_count,
+            )
+            indexed[row.id] = story
+            self._add(story)
+        if indexed:
+            members = await db.execute(
+                select(StoryMember.story_id, NewsEvent.original_title, NewsEvent.summary_text)
+                .join(NewsEvent, NewsEvent.id == StoryMember.event_id)
+                .where(StoryMember.story_id.in_(list(indexed)))
+                .order_by(StoryMember.event_id)
+            )
+            for story_id, title, summary in members.all():
+                indexed[story_id].texts.append(shingles(f"{title or ''} {summary or ''}"))
+        self.loaded = True
+        logger.info(f"📰 Story index loaded: {len(indexed)} open stories")
+
+
+story_index = StoryIndex(
+    distance_km=settings.story_distance_km,
+    gap=timedelta(hours=settings.story_gap_hours),
+    min_similarity=settings.story_similarity,
+)
+
+
+@dataclass
+class StoryAssignment:
+    """A story membership staged in the event's transaction, applied to the index after the commit"""
+    story_id: int
+    joined: bool  # Joined an existing story (False: the event opened it)
+    apply: Callable[[], None]
+
+
+async def assign_story(db: AsyncSession, event: NewsEvent) -> Optional[StoryAssignment]:
+    """
+    Stage the story membership of a flushed, uncommitted event in its transaction,
+    so readers never see the event without it. Call .apply() after the commit.
+    """
+    if not settings.stories_enabled:
+        return None
+    async with story_index.lock:
+        if not story_index.loaded:
+            await story_index.load(db)
+        return await _assign(db, event)
+
+
+async def _assign(db: AsyncSession, event: NewsEvent) -> StoryAssignment:
+    text_shingles = shingles(event_text(event))
+    story, similarity = story_index.match(event, text_shingles)
+    timestamp = event.timestamp_detected or datetime.utcnow()
+
+    if story is not None:
+        values = {"event_count": Story.event_count + 1, "last_seen": max(story.last_seen, timestamp)}
+        centroid = joined_centroid(story, event)
+        if centroid is not None:
+            values["latitude"], values["longitude"] = centroid
+            values["located_count"] = Story.located_count + 1
+        await db.execute(update(Story).where(Story.id == story.story_id).values(**values))
+        db.add(StoryMember(event_id=event.id, story_id=story.story_id, similarity=round(similarity, 3)))
+        await db.flush()
+        return StoryAssignment(
+            story_id=story.story_id,
+            joined=True,
+            apply=lambda: _applied(lambda: story_index.joined(story, event, text_shingles)),
+        )
+
+    row = Story(
+        title=event.original_title or (event.summary_text or "")[:200],
+        location_name=event.location_name,
+        latitude=event.latitude,
+        longitude=event.longitude if event.latitude is not None else None,
+        category=event.category,
+        event_count=1,
+        located_count=1 if event.latitude is not None else 0,
+        first_seen=timestamp,
+        last_seen=timestamp,
+    )
+    db.add(row)
+    await db.flush()
+    db.add(StoryMember(event_id=event.id, story_id=row.id))
+    await db.flush()
+    return StoryAssignment(
+        story_id=row.id,
+        joined=False,
+        apply=lambda: _applied(lambda: story_index.opened(row.id, event, text_shingles)),
+    )
+
+
+def _applied(update_index: Callable[[], object]):
+    update_index()
+    story_index._assignments += 1
+    if story_index._assignments % PRUNE_EVERY == 0:
+        story_index.prune()
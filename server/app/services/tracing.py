@@ -0,0 +1,335 @@
+"""
+Span tracing for scrape cycles
+A sampled scrape cycle records a tree of timed spans (feed, fetch, parse,
+LLM call, save...) with attributes. Finished traces are stored in the traces
+table - so /api/admin/traces works from API processes when a separate worker
+scrapes - and optionally a rotating JSON-lines file; no external collector.
+Unsampled cycles only pay for a context variable lookup per span.
+"""
+import asyncio
+import logging
+import logging.handlers
+import random
+import time
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+import orjson
+from sqlalchemy import select, delete, desc
+
+from app.config import get_settings
+from app.database import async_session_maker
+from app.models import TraceRecord
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Spans recorded per trace - the rest are counted as dropped
+MAX_SPANS_PER_TRACE = 5000
+
+
+class _NoopSpan:
+    """Stands in for a span when the current work isn't traced"""
+    trace = None
+
+    def set(self, **attrs):
+        pass
+
+    def end(self, error: Optional[str] = None, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start", "duration_ms", "attrs", "error", "_token")
+
+    def __init__(self, trace: "Trace", span_id: int, parent_id: Optional[int], name: str, attrs: dict):
+        self.trace = trace
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.attrs = attrs
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, error: Optional[str] = None, **attrs):
+        if self.duration_ms is not None:
+            return
+        self.attrs.update(attrs)
+        if error:
+            self.error = error
+        self.duration_ms = (time.perf_counter() - self.start) * 1000
+        if self.span_id == 0:
+            self.trace.finish()
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.end(error=f"{exc_type.__name__}: {exc}" if exc_type else None)
+        return False
+
+
+class Trace:
+    def __init__(self, name: str, attrs: dict):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started_at = datetime.utcnow()
+        self.spans: list[Span] = []
+        self.dropped = 0
+        self.root = self.add(name, None, attrs)
+
+    def add(self, name: str, parent_id: Optional[int], attrs: dict):
+        if len(self.spans) >= MAX_SPANS_PER_TRACE:
+            self.dropped += 1
+            return NOOP_SPAN
+        span = Span(self, len(self.spans), parent_id, name, attrs)
+        self.spans.append(span)
+        return span
+
+    def finish(self):
+        trace_store.add(self.to_dict())
+
+    def to_dict(self) -> dict:
+        origin = self.root.start
+        now = time.perf_counter()
+        spans = []
+        for span in self.spans:
+            item = {
+                "id": span.span_id,
+                "parent": span.parent_id,
+                "name": span.name,
+                "start_ms": round((span.start - origin) * 1000, 3),
+                "duration_ms": round(span.duration_ms if span.duration_ms is not None else (now - span.start) * 1000, 3),
+                "attrs": span.attrs,
+            }
+            if span.duration_ms is None:
+                # Left open by an interrupted cycle
+                item["unfinished"] = True
+            if span.error:
+                item["error"] = span.error
+            spans.append(item)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": spans[0]["duration_ms"],
+            "attrs": self.root.attrs,
+            "dropped_spans": self.dropped,
+            "spans": spans,
+        }
+
+
+class _Activation:
+    """Makes an existing span the parent of spans started in this context"""
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span):
+        self.span = span
+        self._token = None
+
+    def __enter__(self):
+        if self.span is not NOOP_SPAN and self.span is not None:
+            self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._token is not None:
+            _current_span.reset(self._token)
+        return False
+
+
+def span(name: str, parent=None, **attrs):
+    """
+    Child span of `parent` (default: the current span). Use as a context manager,
+    or call .end() on it. Returns a no-op span when nothing is being traced.
+    """
+    if parent is None:
+        parent = _current_span.get()
+    if parent is None or parent is NOOP_SPAN:
+        return NOOP_SPAN
+    return parent.trace.add(name, parent.span_id, attrs)
+
+
+def use_span(active):
+    """Run a block with `active` as the current span (e.g. in another task)"""
+    return _Activation(active)
+
+
+def _sampled() -> bool:
+    return settings.tracing_sample_rate > 0 and random.random() < settings.tracing_sample_rate
+
+
+def start_trace(name: str, force: bool = False, **attrs):
+    """
+    Root span of a new trace if sampled (or forced, e.g. a capture requested
+    through the admin API) - or a plain child span when already inside a trace
+    """
+    parent = _current_span.get()
+    if parent is not None:
+        return span(name, parent, **attrs)
+    if not (force or _sampled()):
+        return NOOP_SPAN
+    return Trace(name, attrs).root
+
+
+class TraceStore:
+    """Finished traces in the traces table (newest tracing_buffer_size kept), optionally mirrored to a rotating file"""
+
+    def __init__(self):
+        self._save_tasks: set[asyncio.Task] = set()
+        self._file_logger: Optional[logging.Logger] = None
+        if settings.tracing_export_path:
+            handler = logging.handlers.RotatingFileHandler(
+                settings.tracing_export_path,
+                maxBytes=settings.tracing_export_max_mb * 1024 * 1024,
+                backupCount=3,
+                encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._file_logger = logging.getLogger("geonews.traces")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.addHandler(handler)
+
+    def add(self, trace: dict):
+        if self._file_logger is not None:
+            try:
+                self._file_logger.info(orjson.dumps(trace).decode())
+            except Exception as e:
+                logger.error(f"Failed to export trace {trace['trace_id']}: {e}")
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # Traces end inside synchronous span code - the insert runs as its own task
+        task = loop.create_task(self.save(trace))
+        self._save_tasks.add(task)
+        task.add_done_callback(self._save_tasks.discard)
+
+    async def save(self, trace: dict):
+        try:
+            async with async_session_maker() as db:
+                db.add(TraceRecord(
+                    trace_id=trace["trace_id"],
+                    name=trace["name"][:100],
+                    started_at=datetime.fromisoformat(trace["started_at"]),
+                    duration_ms=trace["duration_ms"],
+                    span_count=len(trace["spans"]),
+                    error_count=sum(1 for s in trace["spans"] if "error" in s),
+                    attrs_json=orjson.dumps(trace["attrs"], default=str).decode(),
+                    trace_json=orjson.dumps(trace, default=str).decode(),
+                ))
+                await db.flush()
+                # Keep the newest tracing_buffer_size traces
+                oldest_kept = (
+                    select(TraceRecord.started_at)
+                    .order_by(desc(TraceRecord.started_at))
+                    .offset(settings.tracing_buffer_size - 1)
+                    .limit(1)
+                    .scalar_subquery()
+                )
+                await db.execute(delete(TraceRecord).where(TraceRecord.started_at < oldest_kept))
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to store trace {trace['trace_id']}: {e}")
+
+    async def get(self, trace_id: str) -> Optional[dict]:
+        async with async_session_maker() as db:
+            record = await db.get(TraceRecord, trace_id)
+            return orjson.loads(record.trace_json) if record else None
+
+    async def summaries(self) -> list[dict]:
+        async with async_session_maker() as db:
+            result = await db.execute(select(TraceRecord).order_by(desc(TraceRecord.started_at)))
+            return [
+                {
+                    "trace_id": t.trace_id,
+                    "name": t.name,
+                    "started_at": t.started_at.isoformat(),
+                    "duration_ms": t.duration_ms,
+                    "attrs": orjson.loads(t.attrs_json) if t.attrs_json else {},
+                    "spans": t.span_count,
+                    "errors": t.error_count,
+                }
+                for t in result.scalars().all()
+            ]
+
+
+trace_store = TraceStore()
+
+
+def _labels(trace: dict) -> list[str]:
+    """Span labels - spans that introduce a feed are labelled with it"""
+    spans = trace["spans"]
+    labels = []
+    for s in spans:
+        feed = s["attrs"].get("feed")
+        parent = spans[s["parent"]] if s["parent"] is not None else None
+        if feed and (parent is None or parent["attrs"].get("feed") != feed):
+            labels.append(f"{s['name']}[{feed}]")
+        else:
+            labels.append(s["name"])
+    return labels
+
+
+def timeline(trace: dict) -> list[dict]:
+    """Spans in start order with their depth, for a waterfall view"""
+    spans = trace["spans"]
+    depths = []
+    for s in spans:
+        # Parents are always recorded before their children
+        depths.append(depths[s["parent"]] + 1 if s["parent"] is not None else 0)
+    labels = _labels(trace)
+    rows = [
+        {
+            "depth": depths[s["id"]],
+            "label": labels[s["id"]],
+            "start_ms": s["start_ms"],
+            "duration_ms": s["duration_ms"],
+            "attrs": s["attrs"],
+            **({"error": s["error"]} if "error" in s else {}),
+        }
+        for s in spans
+    ]
+    rows.sort(key=lambda row: row["start_ms"])
+    return rows
+
+
+def flame(trace: dict) -> dict[str, float]:
+    """
+    Self time per stack ("a;b;c" -> ms), the collapsed format flame graph tools read.
+    Children of a span run concurrently, so self time is clamped at zero.
+    """
+    spans = trace["spans"]
+    labels = _labels(trace)
+    stacks = []
+    child_time = defaultdict(float)
+    for s in spans:
+        stacks.append(f"{stacks[s['parent']]};{labels[s['id']]}" if s["parent"] is not None else labels[s["id"]])
+        if s["parent"] is not None:
+            child_time[s["parent"]] += s["duration_ms"]
+
+    totals: dict[str, float] = defaultdict(float)
+    for s in spans:
+        totals[stacks[s["id"]]] += max(0.0, s["duration_ms"] - child_time[s["id"]])
+    return {stack: round(ms, 3) for stack, ms in sorted(totals.items())}
@@ -0,0 +1,52 @@
+"""
+Admin requests for the ingestion worker
+With APP_ROLE=api the admin endpoints run in a process that never scrapes, so
+requests like "trace the next N scrape cycles" are stored in the
+worker_requests table and consumed by whichever instance runs the next cycle.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app.database import async_session_maker
+from app.models import WorkerRequest
+
+logger = logging.getLogger(__name__)
+
+TRACE_CYCLES = "trace_cycles"
+PROFILE_CYCLES = "profile_cycles"
+
+
+async def request_cycles(name: str, count: int):
+    """Ask for the next N cycles (0 cancels a pending request)"""
+    async with async_session_maker() as db:
+        request = await db.get(WorkerRequest, name)
+        if request is None:
+            db.add(WorkerRequest(name=name, remaining=count))
+        else:
+            request.remaining = count
+            request.requested_at = datetime.utcnow()
+        await db.commit()
+
+
+async def pending_cycles(name: str) -> int:
+    async with async_session_maker() as db:
+        result = await db.execute(select(WorkerRequest.remaining).where(WorkerRequest.name == name))
+        return result.scalar() or 0
+
+
+async def consume_cycle(name: str) -> bool:
+    """Take one requested cycle if any is left - atomic across instances"""
+    try:
+        async with async_session_maker() as db:
+            result = await db.execute(
+                update(WorkerRequest)
+                .where(WorkerRequest.name == name, WorkerRequest.remaining > 0)
+                .values(remaining=WorkerRequest.remaining - 1)
+            )
+            await db.commit()
+            return result.rowcount > 0
+    except Exception as e:
+        logger.warning(f"⚠️  Could not read worker request {name}: {e}")
+        return False
@@ -0,0 +1,137 @@
+"""
+Backfill coordinates for events that have a location name but no coordinates
+Rows are streamed in primary key order (keyset chunks, so memory stays bounded),
+each distinct location name is resolved once through the LOCATION_FALLBACKS
+table and the results are written back with one executemany UPDATE per chunk.
+The last processed id is checkpointed after every chunk, so an interrupted run
+resumes where it stopped.
+
+Every updated id is also written to the updated_events log in the same
+transaction. Running servers pick the edits up from it (the change follower
+refreshes the hot window and the result cache) and delta sync clients get the
+edited events back from /api/events/changes - no restart needed.
+
+Run from the server directory:
+    python backfill_coordinates.py [--dry-run] [--chunk-size 5000] [--restart]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+
+from sqlalchemy import select, update, insert, or_
+
+from app.database import async_session_maker, engine
+from app.models import NewsEvent, UpdatedEvent
+from app.services.ai_processor import match_location_fallback
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_CHECKPOINT = ".backfill_coordinates.checkpoint"
+
+
+def read_checkpoint(path: str) -> int:
+    """Last processed event id, or 0 when there is no checkpoint"""
+    try:
+        with open(path) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path: str, last_id: int):
+    # Write then rename, so a crash never leaves a truncated checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(last_id))
+    os.replace(tmp_path, path)
+
+
+async def backfill(chunk_size: int, dry_run: bool, checkpoint: str, restart: bool) -> dict:
+    """Resolve and update missing coordinates chunk by chunk. Returns run totals."""
+    last_id = 0 if restart else read_checkpoint(checkpoint)
+    if last_id:
+        logger.info(f"Resuming after event id {last_id}")
+
+    scanned = updated = 0
+    unresolved: Counter = Counter()
+    started = time.perf_counter()
+
+    while True:
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(NewsEvent.id, NewsEvent.location_name)
+                .where(
+                    NewsEvent.id > last_id,
+                    NewsEvent.location_name.is_not(None),
+                    or_(NewsEvent.latitude.is_(None), NewsEvent.longitude.is_(None))
+                )
+                .order_by(NewsEvent.id)
+                .limit(chunk_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            params = []
+            for event_id, location_name in rows:
+                match = match_location_fallback(location_name)
+                if match is None:
+                    unresolved[location_name] += 1
+                    continue
+                latitude, longitude = match[1]
+                params.append({"id": event_id, "latitude": latitude, "longitude": longitude})
+
+            if params and not dry_run:
+                # ORM bulk UPDATE by primary key - a single executemany for the chunk
+                await db.execute(update(NewsEvent), params)
+                # Logged with the update, so followers and delta clients never miss an edit
+                await db.execute(insert(UpdatedEvent), [{"event_id": p["id"]} for p in params])
+                await db.commit()
+
+        scanned += len(rows)
+        updated += len(params)
+        last_id = rows[-1][0]
+        if not dry_run:
+            write_checkpoint(checkpoint, last_id)
+        rate = scanned / (time.perf_counter() - started)
+        logger.info(f"  {scanned:,} rows scanned, {updated:,} resolved, up to id {last_id} ({rate:,.0f} rows/s)")
+
+    # A finished run starts from the beginning next time
+    if not dry_run and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    return {
+        "scanned": scanned,
+        "updated": updated,
+        "unresolved": sum(unresolved.values()),
+        "top_unresolved": unresolved.most_common(10),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Backfill missing event coordinates from location names")
+    parser.add_argument("--dry-run", action="store_true", help="Resolve and report without writing")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per read/update batch")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="File holding the last processed event id")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and scan from the first event")
+    args = parser.parse_args()
+
+    totals = await backfill(args.chunk_size, args.dry_run, args.checkpoint, args.restart)
+    verb = "Would update" if args.dry_run else "Updated"
+    logger.info(
+        f"✅ {verb} {totals['updated']:,} of {totals['scanned']:,} events in {totals['seconds']:.1f}s "
+        f"({totals['unresolved']:,} unresolved)"
+    )
+    for location_name, count in totals["top_unresolved"]:
+        logger.info(f"   No coordinates for '{location_name}': {count:,} events")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Benchmark: hot-window in-memory index vs the SQL read path
+Runs /api/events, bbox and /api/stats queries at 10k, 100k and 1M events
+Run with: python benchmarks/bench_hot_window.py [sizes...]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Use a throwaway database - must be set before importing the app
+_db_dir = tempfile.mkdtemp(prefix="geonews-bench-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/bench.db"
+os.environ["DEBUG"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, delete
+
+from app.database import init_db, async_session_maker, close_db
+from app.models import NewsEvent
+from app.routers.events import _build_events_body, _build_stats_body
+from app.services.hot_window import hot_window
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+ITERATIONS = 20
+INSERT_BATCH = 20_000
+
+SOURCES = ["Ynet", "Haaretz", "Israel Defense", "ITIC", "Abu Ali Express", "Rotter", "JDN", "Kan News"]
+CATEGORIES = ["military", "political", "casualties", "infrastructure", "general"]
+
+# (name, hours, category, source, bbox)
+QUERIES = [
+    ("events 24h", 24, None, None, None),
+    ("events 24h military", 24, "military", None, None),
+    ("events 168h source=ynet", 168, None, "ynet", None),
+    ("events 168h bbox gaza", 168, None, None, (34.2, 31.2, 34.6, 31.6)),
+]
+
+
+async def seed(size: int):
+    """Bulk insert events spread over the last 168 hours"""
+    now = datetime.utcnow()
+    async with async_session_maker() as db:
+        await db.execute(delete(NewsEvent))
+        for start in range(0, size, INSERT_BATCH):
+            batch = []
+            for i in range(start, min(start + INSERT_BATCH, size)):
+                batch.append({
+                    "source_name": random.choice(SOURCES),
+                    "summary_text": f"סיכום אירוע {i}",
+                    "original_title": f"כותרת {i}",
+                    "location_name": "רצועת עזה",
+                    "latitude": random.uniform(29.5, 33.5),
+                    "longitude": random.uniform(34.0, 36.0),
+                    "category": random.choice(CATEGORIES),
+                    "timestamp_detected": now - timedelta(seconds=random.uniform(0, 167 * 3600)),
+                    "content_hash": f"{size}-{i}",
+                })
+            await db.execute(insert(NewsEvent), batch)
+        await db.commit()
+
+
+async def timed(build) -> float:
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        await build()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+async def run_size(size: int):
+    print(f"\n=== {size:,} events ===")
+    await seed(size)
+
+    hot_window.ready = False
+    results = {}
+    async with async_session_maker() as db:
+        for name, hours, category, source, bbox in QUERIES:
+            results[name] = [await timed(lambda: _build_events_body(db, hours, category, source, bbox, 100, 0))]
+        results["stats"] = [await timed(lambda: _build_stats_body(db))]
+
+        load_start = time.perf_counter()
+        await hot_window.load()
+        print(f"hot window load: {time.perf_counter() - load_start:.2f}s")
+
+        for name, hours, category, source, bbox in QUERIES:
+            results[name].append(await timed(lambda: _build_events_body(db, hours, category, source, bbox, 100, 0)))
+        results["stats"].append(await timed(lambda: _build_stats_body(db)))
+
+    print(f"{'query':<28} {'sql ms':>10} {'hot ms':>10} {'speedup':>9}")
+    for name, (sql_ms, hot_ms) in results.items():
+        print(f"{name:<28} {sql_ms:>10.2f} {hot_ms:>10.2f} {sql_ms / hot_ms:>8.1f}x")
+
+
+async def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    await init_db()
+    for size in sizes:
+        await run_size(size)
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
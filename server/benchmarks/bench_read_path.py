@@ -0,0 +1,336 @@
+"""
+Benchmark: read endpoints and retention cleanup at production-like volumes
+Seeds synthetic events (see synthetic_data.py) at each size, then measures
+/api/events, /api/stats and /api/recap/sources through the ASGI app, plus the
+retention cleanup job: latency percentiles, query plans, rows scanned and memory.
+Each run is saved to benchmarks/results/ so runs on different commits can be compared.
+
+Run with:
+    python benchmarks/bench_read_path.py [--sizes 10000 100000 1000000 5000000]
+    python benchmarks/bench_read_path.py --compare results/OLD.json results/NEW.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_ITERATIONS = 20
+
+# (name, path)
+ENDPOINTS = [
+    ("events 24h", "/api/events?hours=24"),
+    ("events 24h military", "/api/events?hours=24&category=military"),
+    ("events 168h source=Ynet", "/api/events?hours=168&source=ynet"),
+    ("events 168h bbox gaza", "/api/events?hours=168&bbox=34.2,31.2,34.6,31.6"),
+    ("events 24h offset 400", "/api/events?hours=24&limit=100&offset=400"),
+    ("stats", "/api/stats"),
+    ("recap sources", "/api/recap/sources"),
+]
+
+# Events are spread over this many days, so a slice is past the 30 day retention
+SEED_DAYS = 31
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=BENCH_DIR, capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+
+class StatementRecorder:
+    """Collects the statements an endpoint runs"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.event = event
+        self.sync_engine = engine.sync_engine
+        self.statements: list[tuple[str, object]] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        self.statements = []
+        self.event.listen(self.sync_engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        self.event.remove(self.sync_engine, "before_cursor_execute", self._record)
+        return False
+
+
+async def statement_costs(engine, statements: list[tuple[str, object]]) -> list[dict]:
+    """
+    Plan and work done by each statement, re-run on a dedicated connection.
+    SQLite: EXPLAIN QUERY PLAN plus sqlite_stmt counters (rows stepped by full
+    scans, VM steps, sorts). Postgres: EXPLAIN ANALYZE rows read by scan nodes.
+    """
+    from app.services.metrics import fingerprint
+
+    costs = []
+    dialect = engine.dialect.name
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                continue
+            cost = {"fingerprint": fingerprint(statement)}
+            try:
+                if dialect == "sqlite":
+                    plan = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                    cost["plan"] = [row[-1] for row in plan.all()]
+                    counters = "SELECT nscan, nstep, nsort, naidx FROM sqlite_stmt WHERE sql = ?"
+                    before = (await conn.exec_driver_sql(counters, (statement,))).first() or (0, 0, 0, 0)
+                    await conn.exec_driver_sql(statement, parameters)
+                    after = (await conn.exec_driver_sql(counters, (statement,))).first() or (0, 0, 0, 0)
+                    cost["rows_scanned"] = after[0] - before[0]
+                    cost["vm_steps"] = after[1] - before[1]
+                    cost["sorts"] = after[2] - before[2]
+                    cost["auto_index_rows"] = after[3] - before[3]
+                else:
+                    result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", parameters)
+                    plan = result.scalar()
+                    plan = json.loads(plan) if isinstance(plan, str) else plan
+                    root = plan[0]["Plan"]
+                    cost["plan"] = _pg_plan_lines(root)
+                    cost["rows_scanned"] = _pg_rows_scanned(root)
+            except Exception as e:
+                cost["error"] = str(e)[:300]
+            costs.append(cost)
+        await conn.rollback()
+    return costs
+
+
+def _pg_plan_lines(node: dict, depth: int = 0) -> list[str]:
+    line = "  " * depth + node["Node Type"]
+    if "Relation Name" in node:
+        line += f" on {node['Relation Name']}"
+    if "Index Name" in node:
+        line += f" using {node['Index Name']}"
+    lines = [line]
+    for child in node.get("Plans", []):
+        lines.extend(_pg_plan_lines(child, depth + 1))
+    return lines
+
+
+def _pg_rows_scanned(node: dict) -> int:
+    rows = 0
+    if "Relation Name" in node:
+        loops = node.get("Actual Loops", 1)
+        rows += (node.get("Actual Rows", 0) + node.get("Rows Removed by Filter", 0)) * loops
+    return rows + sum(_pg_rows_scanned(child) for child in node.get("Plans", []))
+
+
+async def bench_endpoint(client, engine, name: str, path: str, iterations: int) -> dict:
+    # Warm-up, also checks the endpoint works
+    response = await client.get(path)
+    response.raise_for_status()
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+
+    # Separate passes so tracing doesn't distort the timings
+    tracemalloc.start()
+    await client.get(path)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    with StatementRecorder(engine) as recorder:
+        await client.get(path)
+    statements = await statement_costs(engine, recorder.statements)
+
+    return {
+        "endpoint": name,
+        "path": path,
+        "iterations": iterations,
+        "p50_ms": round(_percentile(samples, 0.50), 2),
+        "p95_ms": round(_percentile(samples, 0.95), 2),
+        "p99_ms": round(_percentile(samples, 0.99), 2),
+        "max_ms": round(samples[-1], 2),
+        "mean_ms": round(sum(samples) / len(samples), 2),
+        "response_bytes": len(response.content),
+        "py_alloc_peak_kib": round(peak_bytes / 1024, 1),
+        "rows_scanned": sum(s.get("rows_scanned", 0) for s in statements),
+        "statements": statements,
+    }
+
+
+async def bench_cleanup(count_events) -> dict:
+    from app.services.db_cleanup import cleanup_old_events
+
+    before = await count_events()
+    tracemalloc.start()
+    started = time.perf_counter()
+    await cleanup_old_events()
+    seconds = time.perf_counter() - started
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "endpoint": "cleanup job",
+        "seconds": round(seconds, 3),
+        "rows_deleted": before - await count_events(),
+        "py_alloc_peak_kib": round(peak_bytes / 1024, 1),
+    }
+
+
+async def run(sizes: list[int], iterations: int, database_path: str) -> dict:
+    import httpx
+    from sqlalchemy import func, select
+
+    from app.database import engine, init_db, async_session_maker, close_db
+    from app.main import app
+    from app.models import NewsEvent
+    from synthetic_data import bulk_insert
+
+    async def count_events() -> int:
+        async with async_session_maker() as db:
+            return (await db.execute(select(func.count(NewsEvent.id)))).scalar() or 0
+
+    async def next_index() -> int:
+        # Cleanup deletes old rows, so the count can't be used to keep content hashes unique
+        async with async_session_maker() as db:
+            return (await db.execute(select(func.max(NewsEvent.id)))).scalar() or 0
+
+    await init_db()
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in sorted(sizes):
+            existing = await count_events()
+            missing = max(0, size - existing)
+            print(f"\n=== {size:,} events (adding {missing:,}) ===")
+            seed_seconds = await bulk_insert(missing, days=SEED_DAYS, start_index=await next_index(), progress=True)
+
+            size_result = {"size": size, "seed_seconds": round(seed_seconds, 1), "endpoints": []}
+            for name, path in ENDPOINTS:
+                result = await bench_endpoint(client, engine, name, path, iterations)
+                size_result["endpoints"].append(result)
+                print(
+                    f"{name:<26} p50 {result['p50_ms']:>9.2f}  p95 {result['p95_ms']:>9.2f}  "
+                    f"p99 {result['p99_ms']:>9.2f} ms  scanned {result['rows_scanned']:>10,}  "
+                    f"alloc {result['py_alloc_peak_kib']:>9,.0f} KiB"
+                )
+
+            cleanup = await bench_cleanup(count_events)
+            size_result["cleanup"] = cleanup
+            print(f"{'cleanup job':<26} {cleanup['seconds']:.3f}s, {cleanup['rows_deleted']:,} rows deleted")
+
+            size_result["max_rss_mib"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+            if database_path and os.path.exists(database_path):
+                size_result["database_mib"] = round(os.path.getsize(database_path) / 1024 / 1024, 1)
+            results.append(size_result)
+
+    dialect = engine.dialect.name
+    await close_db()
+    return {"dialect": dialect, "sizes": results}
+
+
+def save(report: dict) -> str:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    commit = report["commit"] or "unknown"
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"{stamp}-{commit[:10]}{'-dirty' if report['dirty'] else ''}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1, ensure_ascii=False)
+    return path
+
+
+def compare(old_path: str, new_path: str):
+    """Print latency and rows scanned changes between two saved runs"""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"old: {old['commit'][:10]} ({old['created_at']})\nnew: {new['commit'][:10]} ({new['created_at']})")
+
+    old_sizes = {s["size"]: s for s in old["sizes"]}
+    for size_result in new["sizes"]:
+        previous = old_sizes.get(size_result["size"])
+        if previous is None:
+            continue
+        print(f"\n=== {size_result['size']:,} events ===")
+        print(f"{'endpoint':<26} {'p50 old':>9} {'p50 new':>9} {'change':>8} {'p95 old':>9} {'p95 new':>9} {'change':>8} {'scanned old':>12} {'new':>12}")
+        before = {e["endpoint"]: e for e in previous["endpoints"]}
+        for endpoint in size_result["endpoints"]:
+            was = before.get(endpoint["endpoint"])
+            if was is None:
+                continue
+            p50 = (endpoint["p50_ms"] - was["p50_ms"]) / was["p50_ms"] * 100 if was["p50_ms"] else 0
+            p95 = (endpoint["p95_ms"] - was["p95_ms"]) / was["p95_ms"] * 100 if was["p95_ms"] else 0
+            print(
+                f"{endpoint['endpoint']:<26} {was['p50_ms']:>9.2f} {endpoint['p50_ms']:>9.2f} {p50:>+7.1f}% "
+                f"{was['p95_ms']:>9.2f} {endpoint['p95_ms']:>9.2f} {p95:>+7.1f}% "
+                f"{was['rows_scanned']:>12,} {endpoint['rows_scanned']:>12,}"
+            )
+        print(f"{'cleanup job':<26} {previous['cleanup']['seconds']:>8.3f}s {size_result['cleanup']['seconds']:>8.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read path and cleanup benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="Timed requests per endpoint and size")
+    parser.add_argument("--database-url", help="Benchmark this database instead of a throwaway SQLite file (rows are added to it)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two saved result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    database_path = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        database_path = os.path.join(tempfile.mkdtemp(prefix="geonews-bench-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{database_path}"
+    # Measure the database path itself: no result cache, no in-memory index, no slow-query capture
+    os.environ["DEBUG"] = "false"
+    os.environ["QUERY_CACHE_MAX_BYTES"] = "0"
+    os.environ["HOT_WINDOW_ENABLED"] = "false"
+    os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+    sys.path.insert(0, os.path.dirname(BENCH_DIR))
+    sys.path.insert(0, BENCH_DIR)
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    started = datetime.utcnow()
+    report = asyncio.run(run(args.sizes, args.iterations, database_path))
+    report = {
+        "commit": _git("rev-parse", "HEAD"),
+        "branch": _git("rev-parse", "--abbrev-ref", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": started.isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "iterations": args.iterations,
+        **report,
+    }
+    print(f"\n📄 Results saved to {save(report)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Micro-benchmark: per-row cost of the /api/events read path
+Compares the ORM + Pydantic path with the Core rows + orjson path on 500-row responses
+Run with: python benchmarks/bench_serialization.py
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Use a throwaway database - must be set before importing the app
+_db_dir = tempfile.mkdtemp(prefix="geonews-bench-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/bench.db"
+os.environ["DEBUG"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, desc
+
+from app.database import init_db, async_session_maker, close_db
+from app.models import NewsEvent
+from app.schemas import NewsEventResponse, NewsEventsListResponse
+from app.services.event_rows import select_event_rows, encode_events_list
+
+ROWS = 500
+ITERATIONS = 50
+
+
+async def seed():
+    """Insert ROWS events with realistic field sizes"""
+    now = datetime.utcnow()
+    async with async_session_maker() as db:
+        for i in range(ROWS):
+            db.add(NewsEvent(
+                source_name=random.choice(["Ynet", "Haaretz", "Israel Defense", "ITIC"]),
+                original_url=f"https://example.com/article/{i}",
+                original_title="כותרת לדוגמה עבור אירוע חדשותי " * 2,
+                original_text="טקסט מקורי של הכתבה " * 40,
+                summary_text="סיכום קצר של האירוע בעברית " * 4,
+                location_name="רצועת עזה",
+                latitude=31.5 + random.random(),
+                longitude=34.4 + random.random(),
+                category=random.choice(["military", "political", "general"]),
+                confidence_score=random.random(),
+                timestamp_detected=now - timedelta(minutes=i),
+                timestamp_original=now - timedelta(minutes=i + 5),
+                content_hash=hashlib.sha256(str(i).encode()).hexdigest(),
+            ))
+        await db.commit()
+
+
+async def orm_path(db) -> bytes:
+    """Previous path: ORM hydration, model_validate, response_model re-validation"""
+    result = await db.execute(select(NewsEvent).order_by(desc(NewsEvent.timestamp_detected)).limit(ROWS))
+    events = result.scalars().all()
+    response = NewsEventsListResponse(
+        events=[NewsEventResponse.model_validate(e) for e in events],
+        total=len(events),
+        filtered_hours=24
+    )
+    # FastAPI validates the returned object against response_model, then JSON encodes it
+    validated = NewsEventsListResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False).encode()
+
+
+async def core_path(db) -> bytes:
+    """New path: Core row tuples encoded straight to JSON bytes"""
+    result = await db.execute(select_event_rows().order_by(desc(NewsEvent.timestamp_detected)).limit(ROWS))
+    rows = result.all()
+    return encode_events_list(rows, len(rows), 24)
+
+
+async def measure(name: str, path) -> float:
+    async with async_session_maker() as db:
+        body = await path(db)  # warm up
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            await path(db)
+        elapsed = time.perf_counter() - start
+    per_row_us = elapsed / (ITERATIONS * ROWS) * 1e6
+    print(f"{name:<28} {elapsed / ITERATIONS * 1000:8.2f} ms/response {per_row_us:8.2f} µs/row  ({len(body)} bytes)")
+    return per_row_us
+
+
+async def main():
+    await init_db()
+    await seed()
+    print(f"=== /api/events read path: {ROWS} rows x {ITERATIONS} iterations ===")
+    before = await measure("ORM + Pydantic (before)", orm_path)
+    after = await measure("Core rows + orjson (after)", core_path)
+    print(f"Speedup: {before / after:.1f}x per row")
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Startup budget check: import time and time to ready of the API process
+Each run is a fresh interpreter, so nothing is cached between runs. Fails (exit
+code 1) when the median exceeds the budget or a module that should load lazily
+(openai, feedparser, apscheduler) is imported before it is needed.
+
+Run with:
+    python benchmarks/bench_startup.py [--runs 5] [--import-budget-ms 1200] [--ready-budget-ms 500]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported by `import app.main` - they load on first use
+LAZY_MODULES = ["openai", "feedparser", "apscheduler"]
+
+IMPORT_BUDGET_MS = 1200
+READY_BUDGET_MS = 500
+
+# Runs in a fresh interpreter and prints one JSON line
+PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import app.main
+import_ms = (time.perf_counter() - started) * 1000
+lazy = [m for m in LAZY_MODULES if m in sys.modules]
+
+async def ready():
+    # Lifespan startup up to the point the server accepts requests
+    started = time.perf_counter()
+    async with app.main.app.router.lifespan_context(app.main.app):
+        ready_ms = (time.perf_counter() - started) * 1000
+    return ready_ms
+
+print(json.dumps({"import_ms": import_ms, "ready_ms": asyncio.run(ready()), "lazy_imported": lazy}))
+"""
+
+
+def probe(env: dict) -> dict:
+    code = f"LAZY_MODULES = {LAZY_MODULES!r}\n{PROBE}"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=SERVER_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API process startup budget")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--ready-budget-ms", type=float, default=READY_BUDGET_MS)
+    args = parser.parse_args()
+
+    database_path = os.path.join(tempfile.mkdtemp(prefix="geonews-startup-"), "startup.db")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{database_path}",
+        "DEBUG": "false",
+        "OPENAI_API_KEY": "sk-startup-check",
+        # The first run creates the schema - later runs measure a warm redeploy
+        "FAST_START": "true",
+    }
+    probe(env)
+
+    runs = [probe(env) for _ in range(args.runs)]
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    ready_ms = statistics.median(run["ready_ms"] for run in runs)
+    lazy_imported = sorted({module for run in runs for module in run["lazy_imported"]})
+
+    print(f"{'':<12} {'median':>9} {'min':>9} {'max':>9} {'budget':>9}")
+    for label, key, median, budget in (
+        ("import", "import_ms", import_ms, args.import_budget_ms),
+        ("ready", "ready_ms", ready_ms, args.ready_budget_ms),
+    ):
+        values = [run[key] for run in runs]
+        print(f"{label:<12} {median:>7.0f}ms {min(values):>7.0f}ms {max(values):>7.0f}ms {budget:>7.0f}ms")
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import took {import_ms:.0f}ms (budget {args.import_budget_ms:.0f}ms)")
+    if ready_ms > args.ready_budget_ms:
+        failures.append(f"startup took {ready_ms:.0f}ms (budget {args.ready_budget_ms:.0f}ms)")
+    if lazy_imported:
+        failures.append(f"imported at startup: {', '.join(lazy_imported)}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Synthetic event generator for load testing and benchmarks
+Produces realistic news_events rows: skewed source and category mixes, coordinates
+clustered around hotspots, Hebrew titles/summaries of realistic length and a
+day/night posting rhythm. Rows are generated with NumPy and bulk inserted.
+
+Seed a database directly with:
+    python benchmarks/synthetic_data.py 1000000 [--days 30] [--database-url URL]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+import numpy as np
+
+SOURCES = [
+    "Abu Ali Express", "Ynet", "Kan News", "Haaretz", "N12", "Times of Israel",
+    "Israel Defense", "ITIC", "Rotter", "JDN", "Walla", "Maariv",
+    "Al Jazeera", "Reuters", "BBC Middle East", "INSS",
+]
+# Zipf-like: a few channels produce most of the traffic
+SOURCE_WEIGHTS = 1.0 / np.arange(1, len(SOURCES) + 1) ** 1.1
+
+CATEGORIES = ["military", "political", "casualties", "infrastructure", "general"]
+CATEGORY_WEIGHTS = np.array([0.42, 0.23, 0.09, 0.06, 0.20])
+
+# (location name, lat, lon, weight, spread in km)
+HOTSPOTS = [
+    ("רצועת עזה", 31.50, 34.47, 0.22, 12),
+    ("חאן יונס", 31.35, 34.30, 0.06, 4),
+    ("רפיח", 31.29, 34.25, 0.05, 3),
+    ("שדרות", 31.52, 34.60, 0.05, 3),
+    ("אשקלון", 31.67, 34.57, 0.04, 4),
+    ("קריית שמונה", 33.21, 35.57, 0.06, 5),
+    ("דרום לבנון", 33.27, 35.40, 0.08, 15),
+    ("ביירות", 33.89, 35.50, 0.04, 6),
+    ("ג'נין", 32.46, 35.30, 0.05, 4),
+    ("שכם", 32.22, 35.26, 0.03, 4),
+    ("ירושלים", 31.77, 35.21, 0.07, 6),
+    ("תל אביב", 32.08, 34.78, 0.07, 6),
+    ("חיפה", 32.79, 34.99, 0.03, 5),
+    ("אילת", 29.55, 34.95, 0.02, 4),
+    ("דמשק", 33.51, 36.29, 0.03, 10),
+    ("תימן", 15.55, 48.52, 0.03, 150),
+    ("טהראן", 35.69, 51.42, 0.03, 30),
+    ("וושינגטון", 38.90, -77.04, 0.02, 10),
+]
+HOTSPOT_WEIGHTS = np.array([h[3] for h in HOTSPOTS])
+
+# Hourly posting rhythm (Israel time): quiet at night, peaks in the evening
+HOUR_WEIGHTS = np.array([
+    2, 1.5, 1, 1, 1, 1.5, 3, 5, 6, 6, 6, 6,
+    6, 6, 6, 6, 7, 7, 8, 8, 7, 6, 4, 3,
+], dtype=float)
+
+_WORDS = (
+    "צה״ל דיווח על תקיפה באזור לאחר זיהוי של מחבלים שפעלו בסמוך לכוחות הביטחון "
+    "לפי הדיווח נורו רקטות לעבר יישובי העוטף וכיפת ברזל יירטה חלק מהשיגורים "
+    "הממשלה התכנסה לדיון מיוחד בעקבות ההסלמה והשרים נדרשו להחליט על המשך הפעולה "
+    "תושבי הצפון התבקשו להישאר בקרבת מרחבים מוגנים עד להודעה חדשה מפיקוד העורף "
+    "בבית החולים נמסר כי מצבם של הפצועים יציב וצוותי הרפואה ממשיכים לטפל בנפגעים "
+    "תשתיות החשמל באזור נפגעו ועבודות התיקון צפויות להימשך מספר ימים לפי חברת החשמל "
+    "גורמים מדיניים מסרו כי המגעים להסדרה נמשכים בתיווך מצרים וקטאר למרות הפערים "
+    "דובר הצבא הודיע כי הכוחות השלימו את המבצע ולא נרשמו נפגעים בקרב הלוחמים "
+    "עשרות משאיות סיוע נכנסו דרך המעבר לאחר בדיקה ביטחונית של הגורמים המוסמכים "
+    "כלי התקשורת באזור דיווחו על פיצוצים עזים שנשמעו בשעות הלילה המאוחרות"
+).split()
+
+# Distinct titles/summaries drawn from; rows index into these pools
+TEXT_POOL_SIZE = 4096
+
+
+def _sentence(rng: np.random.Generator, min_words: int, max_words: int) -> str:
+    count = int(rng.integers(min_words, max_words + 1))
+    return " ".join(rng.choice(_WORDS, size=count))
+
+
+def _text_pools(rng: np.random.Generator) -> tuple[list[str], list[str]]:
+    # Titles ~40-90 characters, summaries ~150-450 characters (two to three sentences)
+    titles = [_sentence(rng, 7, 14) for _ in range(TEXT_POOL_SIZE)]
+    summaries = [
+        ". ".join(_sentence(rng, 10, 22) for _ in range(int(rng.integers(2, 4)))) + "."
+        for _ in range(TEXT_POOL_SIZE)
+    ]
+    return titles, summaries
+
+
+def generate_batches(
+    count: int,
+    days: float = 30,
+    batch_size: int = 50_000,
+    seed: int = 0,
+    start_index: int = 0,
+    now: Optional[datetime] = None
+) -> Iterator[list[dict]]:
+    """
+    Yield `count` synthetic events in batches of insert-ready dicts.
+    Timestamps are spread over the last `days`; start_index keeps content hashes
+    unique across calls (pass the highest event id already stored).
+    """
+    rng = np.random.default_rng(seed + start_index)
+    titles, summaries = _text_pools(rng)
+    now = now or datetime.utcnow()
+    hour_probabilities = HOUR_WEIGHTS / HOUR_WEIGHTS.sum()
+    day_seconds = days * 86400
+
+    for batch_start in range(0, count, batch_size):
+        n = min(batch_size, count - batch_start)
+        sources = rng.choice(len(SOURCES), size=n, p=SOURCE_WEIGHTS / SOURCE_WEIGHTS.sum())
+        categories = rng.choice(len(CATEGORIES), size=n, p=CATEGORY_WEIGHTS)
+        spots = rng.choice(len(HOTSPOTS), size=n, p=HOTSPOT_WEIGHTS / HOTSPOT_WEIGHTS.sum())
+
+        spot_lat = np.array([HOTSPOTS[i][1] for i in range(len(HOTSPOTS))])[spots]
+        spot_lon = np.array([HOTSPOTS[i][2] for i in range(len(HOTSPOTS))])[spots]
+        spread_deg = np.array([HOTSPOTS[i][4] for i in range(len(HOTSPOTS))])[spots] / 111.0
+        latitudes = np.round(spot_lat + rng.normal(0, spread_deg / 2), 5)
+        longitudes = np.round(spot_lon + rng.normal(0, spread_deg / 2), 5)
+
+        # Day offset uniform, hour of day following the posting rhythm
+        day_offsets = rng.integers(0, max(1, int(days)), size=n) * 86400
+        hours = rng.choice(24, size=n, p=hour_probabilities)
+        offsets = day_offsets + hours * 3600 + rng.uniform(0, 3600, size=n)
+        offsets = np.minimum(offsets, day_seconds)
+        confidences = np.round(rng.beta(8, 2, size=n), 2)
+        title_ids = rng.integers(0, TEXT_POOL_SIZE, size=n)
+        summary_ids = rng.integers(0, TEXT_POOL_SIZE, size=n)
+
+        batch = []
+        for j in range(n):
+            index = start_index + batch_start + j
+            detected = now - timedelta(seconds=float(offsets[j]))
+            summary = summaries[summary_ids[j]]
+            batch.append({
+                "source_name": SOURCES[sources[j]],
+                "original_url": f"https://example.com/news/{index}",
+                "original_text": summary,
+                "original_title": titles[title_ids[j]],
+                "summary_text": summary,
+                "location_name": HOTSPOTS[spots[j]][0],
+                "latitude": float(latitudes[j]),
+                "longitude": float(longitudes[j]),
+                "category": CATEGORIES[categories[j]],
+                "confidence_score": float(confidences[j]),
+                "timestamp_detected": detected,
+                "timestamp_original": detected - timedelta(minutes=5),
+                # Same length as a real sha256 hex digest
+                "content_hash": f"{seed:08x}{index:056x}",
+            })
+        yield batch
+
+
+async def bulk_insert(count: int, days: float = 30, seed: int = 0, start_index: int = 0, progress: bool = False) -> float:
+    """Insert `count` synthetic events in one transaction. Returns seconds taken."""
+    from sqlalchemy import insert, text
+    from app.database import async_session_maker
+    from app.models import NewsEvent
+
+    started = time.perf_counter()
+    async with async_session_maker() as db:
+        if db.bind.dialect.name == "sqlite":
+            # Bulk load - don't wait for fsync on every page write
+            await db.execute(text("PRAGMA synchronous=OFF"))
+        inserted = 0
+        for batch in generate_batches(count, days=days, seed=seed, start_index=start_index):
+            await db.execute(insert(NewsEvent), batch)
+            inserted += len(batch)
+            if progress:
+                rate = inserted / (time.perf_counter() - started)
+                print(f"\r  {inserted:,}/{count:,} rows ({rate:,.0f}/s)", end="", flush=True)
+        await db.commit()
+    if progress:
+        print()
+    return time.perf_counter() - started
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Insert synthetic news events")
+    parser.add_argument("rows", type=int, help="Events to insert")
+    parser.add_argument("--days", type=float, default=30, help="Spread events over the last N days")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL / .env")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("DEBUG", "false")
+    # Every bulk insert batch would otherwise be logged as a slow query
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from sqlalchemy import func, select
+    from app.database import init_db, async_session_maker, close_db
+    from app.models import NewsEvent
+
+    await init_db()
+    async with async_session_maker() as db:
+        existing = (await db.execute(select(func.count(NewsEvent.id)))).scalar() or 0
+        # Ids only grow, so hashes stay unique even after rows were deleted
+        next_index = (await db.execute(select(func.max(NewsEvent.id)))).scalar() or 0
+    print(f"Inserting {args.rows:,} events over {args.days:g} days ({existing:,} already present)...")
+    seconds = await bulk_insert(args.rows, days=args.days, seed=args.seed, start_index=next_index, progress=True)
+    print(f"✅ Inserted {args.rows:,} events in {seconds:.1f}s")
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
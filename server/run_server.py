@@ -1,18 +1,43 @@
 #!/usr/bin/env python
 """
-Development server runner for GeoNews backend
+Server runner for GeoNews backend
+Development: python run_server.py
+Production:  APP_ROLE=api python run_server.py --prod [--workers N]
 """
+import argparse
+import os
+
 import uvicorn
 from app.config import get_settings
 
 settings = get_settings()
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host=settings.host,
-        port=settings.port,
-        reload=settings.debug,
-        log_level="info"
-    )
-
+    parser = argparse.ArgumentParser(description="Run the GeoNews API server")
+    parser.add_argument("--prod", action="store_true", help="Multi-worker production profile (uvloop/httptools, no reload)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: WEB_CONCURRENCY or CPU count)")
+    args = parser.parse_args()
+    
+    if args.prod:
+        workers = args.workers or int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+        # Uvicorn workers don't share memory - every worker runs its own
+        # change follower, and ingestion belongs in run_worker.py
+        uvicorn.run(
+            "app.main:app",
+            host=settings.host,
+            port=settings.port,
+            workers=workers,
+            loop="uvloop",
+            http="httptools",
+            proxy_headers=True,
+            forwarded_allow_ips="*",
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host=settings.host,
+            port=settings.port,
+            reload=settings.debug,
+            log_level="info"
+        )
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Ingestion worker for GeoNews backend
+Runs the scraper, cleanup and recap jobs without serving HTTP, so API
+processes (APP_ROLE=api) can be scaled across cores without duplicating ingestion
+"""
+import asyncio
+import logging
+import signal
+
+from app.config import get_settings
+from app.database import init_db, close_db
+from app.services.llm_telemetry import llm_telemetry
+from app.services.scheduler import start_scheduler, stop_scheduler
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("run_worker")
+
+settings = get_settings()
+
+
+async def main():
+    logger.info("🚀 Starting GeoNews ingestion worker...")
+    await init_db()
+    logger.info("✅ Database initialized")
+    
+    # Jobs only run while this worker holds the scheduler lease
+    await start_scheduler()
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+    
+    logger.info("🛑 Shutting down GeoNews ingestion worker...")
+    await stop_scheduler()
+    await llm_telemetry.flush()
+    await close_db()
+    logger.info("✅ Cleanup complete")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""
+Shared test setup
+Settings are read once at import, so the environment is set before any app
+module is imported: a throwaway SQLite database, no SQL echo, no slow-query log.
+All async tests run on one event loop - the engine's pooled connections belong
+to the loop that opened them.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+_database_dir = tempfile.mkdtemp(prefix="geonews-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_database_dir}/test.db"
+os.environ["DEBUG"] = "false"
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+os.environ["HOT_WINDOW_ENABLED"] = "false"
+
+
+@pytest.fixture(scope="session")
+def event_loop_runner():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture
+def run(event_loop_runner):
+    """Run a coroutine to completion on the session loop"""
+    return event_loop_runner
+
+
+@pytest.fixture(scope="session")
+def database(event_loop_runner):
+    from app.database import init_db
+    event_loop_runner(init_db())
+
+
+@pytest.fixture
+def db(database, run):
+    """Empty tables for a test"""
+    from app.database import Base, engine
+
+    async def clear():
+        async with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                await conn.execute(table.delete())
+
+    run(clear())
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete
+
+from app.database import async_session_maker
+from app.models import DeletedEvent, NewsEvent, UpdatedEvent
+
+
+@pytest.fixture
+def changes(run, db):
+    """GET /api/events/changes with the given query parameters, returning the JSON body"""
+    from app.main import app
+
+    async def get(**params):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/api/events/changes", params=params)
+        assert response.status_code == 200
+        return response.json()
+
+    return lambda **params: run(get(**params))
+
+
+@pytest.fixture
+def add_events(run):
+    counter = iter(range(1_000_000))
+
+    async def add(count):
+        async with async_session_maker() as session:
+            events = [
+                NewsEvent(
+                    source_name="Ynet",
+                    summary_text=f"event {n}",
+                    category="general",
+                    content_hash=f"hash-{n}",
+                    timestamp_detected=datetime.utcnow() - timedelta(minutes=1),
+                )
+                for n in (next(counter) for _ in range(count))
+            ]
+            session.add_all(events)
+            await session.commit()
+            return [event.id for event in events]
+
+    return lambda count: run(add(count))
+
+
+@pytest.fixture
+def add_log(run):
+    async def add(model, event_ids):
+        async with async_session_maker() as session:
+            rows = [model(event_id=event_id) for event_id in event_ids]
+            session.add_all(rows)
+            await session.commit()
+            return [row.id for row in rows]
+
+    return lambda model, event_ids: run(add(model, event_ids))
+
+
+def test_first_call_returns_window_and_watermarks(changes, add_events):
+    ids = add_events(3)
+    body = changes()
+    assert [event["id"] for event in body["events"]] == ids
+    assert body["watermark"]["event_id"] == ids[-1]
+    assert body["has_more"] is False
+    assert body["reset"] is False
+
+
+def test_since_id_returns_only_newer_events(changes, add_events):
+    first = add_events(2)
+    watermark = changes()["watermark"]["event_id"]
+    assert watermark == first[-1]
+
+    second = add_events(2)
+    body = changes(since_id=watermark)
+    assert [event["id"] for event in body["events"]] == second
+    assert body["watermark"]["event_id"] == second[-1]
+
+    # Nothing new - the watermark stays put
+    body = changes(since_id=second[-1])
+    assert body["events"] == []
+    assert body["watermark"]["event_id"] == second[-1]
+
+
+def test_limit_pages_through_events(changes, add_events):
+    ids = add_events(3)
+    body = changes(since_id=0, limit=2)
+    assert [event["id"] for event in body["events"]] == ids[:2]
+    assert body["has_more"] is True
+
+    body = changes(since_id=body["watermark"]["event_id"], limit=2)
+    assert [event["id"] for event in body["events"]] == ids[2:]
+    assert body["has_more"] is False
+
+
+def test_deletions_since_watermark(changes, add_events, add_log):
+    ids = add_events(3)
+    start = changes()["watermark"]["deleted_id"]
+    tombstones = add_log(DeletedEvent, ids[:2])
+
+    body = changes(since_id=ids[-1], since_deleted_id=start)
+    assert body["deleted_ids"] == ids[:2]
+    assert body["watermark"]["deleted_id"] == tombstones[-1]
+    assert body["reset"] is False
+
+    body = changes(since_id=ids[-1], since_deleted_id=tombstones[-1])
+    assert body["deleted_ids"] == []
+
+
+def test_reset_when_tombstones_expired(changes, add_events, add_log, run):
+    ids = add_events(3)
+    start = changes()["watermark"]["deleted_id"]
+    tombstones = add_log(DeletedEvent, ids)
+
+    async def expire(tombstone_ids):
+        async with async_session_maker() as session:
+            await session.execute(delete(DeletedEvent).where(DeletedEvent.id.in_(tombstone_ids)))
+            await session.commit()
+
+    # The client fell behind tombstone retention - deletions it never saw are gone
+    run(expire(tombstones[:2]))
+    body = changes(since_id=ids[-1], since_deleted_id=start)
+    assert body["deleted_ids"] == ids[2:]
+    assert body["reset"] is True
+
+
+def test_edited_events_come_back(changes, add_events, add_log):
+    ids = add_events(3)
+    start = changes()["watermark"]["updated_id"]
+    log = add_log(UpdatedEvent, [ids[0]])
+
+    body = changes(since_id=ids[-1], since_updated_id=start)
+    assert [event["id"] for event in body["events"]] == [ids[0]]
+    assert body["watermark"]["updated_id"] == log[-1]
+
+
+def test_edits_above_client_watermark_are_skipped(changes, add_events, add_log):
+    ids = add_events(2)
+    start = changes()["watermark"]["updated_id"]
+    add_log(UpdatedEvent, [ids[1]])
+
+    # The client hasn't received ids[1] yet - it arrives as a new event instead
+    body = changes(since_id=ids[0], since_updated_id=start)
+    assert [event["id"] for event in body["events"]] == [ids[1]]
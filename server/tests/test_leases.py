@@ -0,0 +1,43 @@
+from app.services.leases import get_active_leases, get_lease_holder, release_lease, try_acquire_lease
+
+
+def test_first_claim_and_renewal(run, db):
+    assert run(try_acquire_lease("scheduler", 60, holder="a"))
+    assert run(try_acquire_lease("scheduler", 60, holder="a"))
+    assert run(get_lease_holder("scheduler")) == "a"
+
+
+def test_held_lease_is_not_taken(run, db):
+    assert run(try_acquire_lease("scheduler", 60, holder="a"))
+    assert not run(try_acquire_lease("scheduler", 60, holder="b"))
+    assert run(get_lease_holder("scheduler")) == "a"
+
+
+def test_expired_lease_is_taken_over(run, db):
+    # A holder that stopped renewing - its lease already ran out
+    assert run(try_acquire_lease("scheduler", -1, holder="a"))
+    assert run(get_lease_holder("scheduler")) is None
+
+    assert run(try_acquire_lease("scheduler", 60, holder="b"))
+    assert run(get_lease_holder("scheduler")) == "b"
+    # The old holder can't renew it back
+    assert not run(try_acquire_lease("scheduler", 60, holder="a"))
+
+
+def test_release_hands_over_immediately(run, db):
+    assert run(try_acquire_lease("scheduler", 60, holder="a"))
+    # Only the holder can release
+    run(release_lease("scheduler", holder="b"))
+    assert run(get_lease_holder("scheduler")) == "a"
+
+    run(release_lease("scheduler", holder="a"))
+    assert run(get_lease_holder("scheduler")) is None
+    assert run(try_acquire_lease("scheduler", 60, holder="b"))
+
+
+def test_active_leases_by_prefix(run, db):
+    run(try_acquire_lease("feed:Ynet", 60, holder="a"))
+    run(try_acquire_lease("feed:Haaretz", 60, holder="b"))
+    run(try_acquire_lease("feed:Expired", -1, holder="c"))
+    run(try_acquire_lease("scheduler", 60, holder="a"))
+    assert run(get_active_leases("feed:")) == {"feed:Ynet": "a", "feed:Haaretz": "b"}
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from app.services import query_cache
+from app.services.query_cache import bump_generation, get_or_build, make_key, result_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    result_cache.clear()
+    result_cache.hits = result_cache.misses = result_cache.coalesced = 0
+
+
+def counting_build(body: bytes = b"body", delay: float = 0.0):
+    calls = []
+
+    async def build() -> bytes:
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return body
+
+    return build, calls
+
+
+def test_miss_then_hit(run):
+    build, calls = counting_build()
+    key = make_key("events", hours=24)
+    assert run(get_or_build(key, build)) == (b"body", False)
+    assert run(get_or_build(key, build)) == (b"body", True)
+    assert len(calls) == 1
+
+
+def test_key_normalizes_strings():
+    assert make_key("events", source=" Ynet ") == make_key("events", source="ynet")
+    assert make_key("events", source="") == make_key("events", source=None)
+
+
+def test_bump_generation_invalidates(run):
+    build, calls = counting_build()
+    old_key = make_key("events", hours=24)
+    run(get_or_build(old_key, build))
+
+    bump_generation()
+
+    new_key = make_key("events", hours=24)
+    assert new_key != old_key
+    assert result_cache.get(old_key) is None
+    assert run(get_or_build(new_key, build)) == (b"body", False)
+    assert len(calls) == 2
+
+
+def test_result_of_stale_generation_not_stored(run):
+    key = make_key("events", hours=24)
+
+    async def build() -> bytes:
+        # New data committed while the query ran
+        bump_generation()
+        return b"stale"
+
+    assert run(get_or_build(key, build)) == (b"stale", False)
+    assert result_cache.get(key) is None
+
+
+def test_concurrent_misses_coalesce(run):
+    build, calls = counting_build(delay=0.01)
+    key = make_key("events", hours=24)
+
+    async def requests():
+        return await asyncio.gather(*(get_or_build(key, build) for _ in range(5)))
+
+    results = run(requests())
+    assert len(calls) == 1
+    assert [hit for _, hit in results].count(False) == 1
+    assert all(body == b"body" for body, _ in results)
+    assert (result_cache.misses, result_cache.coalesced) == (1, 4)
+
+
+def test_build_error_reaches_waiters_and_is_not_cached(run):
+    key = make_key("events", hours=24)
+
+    async def failing() -> bytes:
+        await asyncio.sleep(0.01)
+        raise ValueError("query failed")
+
+    async def requests():
+        return await asyncio.gather(*(get_or_build(key, failing) for _ in range(3)), return_exceptions=True)
+
+    results = run(requests())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert result_cache.get(key) is None
+    assert key not in query_cache.result_cache._inflight
+
+
+def test_waiter_builds_when_builder_is_cancelled(run):
+    build, calls = counting_build(delay=0.01)
+    key = make_key("events", hours=24)
+
+    async def slow() -> bytes:
+        await asyncio.sleep(10)
+        return b"never"
+
+    async def requests():
+        first = asyncio.create_task(get_or_build(key, slow))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(get_or_build(key, build))
+        await asyncio.sleep(0)
+        # The client of the building request disconnected
+        first.cancel()
+        return await second
+
+    assert run(requests()) == (b"body", False)
+    assert len(calls) == 1
+
+
+def test_lru_eviction_by_size():
+    cache = query_cache.QueryResultCache(max_bytes=10, ttl_seconds=60)
+    cache.set(("a",), b"12345")
+    cache.set(("b",), b"12345")
+    cache.get(("a",))
+    cache.set(("c",), b"12345")
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == b"12345"
+    assert cache.get(("c",)) == b"12345"
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.similarity import shingles
+from app.services.stories import StoryIndex, event_text
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+ROCKET = "Rocket hits a building in the Haifa port area"
+BUDGET = "Parliament votes on the state budget bill"
+
+
+def make_event(text, latitude=None, longitude=None, location_name=None, minutes=0):
+    return SimpleNamespace(
+        original_title=text,
+        summary_text=text,
+        latitude=latitude,
+        longitude=longitude,
+        location_name=location_name,
+        timestamp_detected=NOW + timedelta(minutes=minutes),
+    )
+
+
+@pytest.fixture
+def index():
+    return StoryIndex(distance_km=15.0, gap=timedelta(hours=6), min_similarity=0.3)
+
+
+def open_story(index, story_id, event):
+    return index.opened(story_id, event, shingles(event_text(event)))
+
+
+def match(index, event):
+    return index.match(event, shingles(event_text(event)))
+
+
+def test_nearby_similar_report_matches(index):
+    story = open_story(index, 1, make_event(ROCKET, 32.79, 34.99, "Haifa"))
+    found, similarity = match(index, make_event(ROCKET, 32.80, 35.00, "Haifa", minutes=10))
+    assert found is story
+    assert similarity >= 0.3
+
+
+def test_distant_report_does_not_match(index):
+    open_story(index, 1, make_event(ROCKET, 32.79, 34.99, "Haifa"))
+    # Eilat is ~350 km away
+    found, _ = match(index, make_event(ROCKET, 29.56, 34.95, "Eilat", minutes=10))
+    assert found is None
+
+
+def test_different_text_does_not_match(index):
+    open_story(index, 1, make_event(ROCKET, 32.79, 34.99, "Haifa"))
+    found, _ = match(index, make_event(BUDGET, 32.79, 34.99, "Haifa", minutes=10))
+    assert found is None
+
+
+def test_report_after_gap_does_not_match(index):
+    open_story(index, 1, make_event(ROCKET, 32.79, 34.99, "Haifa"))
+    found, _ = match(index, make_event(ROCKET, 32.79, 34.99, "Haifa", minutes=7 * 60))
+    assert found is None
+
+
+def test_report_without_coordinates_matches_by_location_name(index):
+    story = open_story(index, 1, make_event(ROCKET, 32.79, 34.99, "Haifa"))
+    found, _ = match(index, make_event(ROCKET, location_name=" haifa ", minutes=10))
+    assert found is story
+
+
+def test_report_without_any_location_does_not_match(index):
+    open_story(index, 1, make_event(ROCKET))
+    found, _ = match(index, make_event(ROCKET, minutes=10))
+    assert found is None
+
+
+def test_located_report_matches_story_without_coordinates(index):
+    story = open_story(index, 1, make_event(ROCKET, location_name="Haifa"))
+    found, _ = match(index, make_event(ROCKET, 32.79, 34.99, "Haifa", minutes=10))
+    assert found is story
+
+
+def test_centroid_averages_only_located_members(index):
+    story = open_story(index, 1, make_event(ROCKET, location_name="Haifa"))
+    first = make_event(ROCKET, 32.70, 35.00, "Haifa", minutes=5)
+    index.joined(story, first, shingles(event_text(first)))
+    assert (story.latitude, story.longitude, story.located_count) == (32.70, 35.00, 1)
+
+    second = make_event(ROCKET, 32.80, 35.00, "Haifa", minutes=10)
+    index.joined(story, second, shingles(event_text(second)))
+    assert story.latitude == pytest.approx(32.75)
+    assert (story.event_count, story.located_count) == (3, 2)
+    # Still reachable by name for reports without coordinates
+    found, _ = match(index, make_event(ROCKET, location_name="Haifa", minutes=15))
+    assert found is story
+
+
+def test_prune_drops_expired_stories(index):
+    open_story(index, 1, make_event(ROCKET, 32.79, 34.99, "Haifa"))
+    open_story(index, 2, make_event(BUDGET, location_name="Jerusalem", minutes=5 * 60))
+    open_story(index, 3, make_event(BUDGET))
+    assert len(index) == 3
+
+    removed = index.prune(now=NOW + timedelta(hours=8))
+    assert removed == 2
+    assert len(index) == 1
+    assert not index.cells
+    found, _ = match(index, make_event(BUDGET, location_name="Jerusalem", minutes=6 * 60))
+    assert found is not None and found.story_id == 2